@@ -15,7 +15,7 @@ def generate_dalle_image(prompt, model="dalle-3"):
 def scrape_url(url, depth=1):
     # Simple web scraping using requests and extracting text as a sample functionality
     try:
-        response = requests.get(url)
+        response = requests.get(url, timeout=20)
         response.raise_for_status()
         content = response.text[:500]  # Return the first 500 characters
         return f"Scraped content from '{url}': {content}..."
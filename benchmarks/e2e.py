@@ -0,0 +1,164 @@
+"""
+End-to-end benchmarks for the Swarm loop against the local fake OpenAI
+server (tests/fake_server.py), going through the real OpenAI client, HTTP
+and SSE parsing.
+
+The server runs in a separate process so CPU time and memory are the
+client's alone. Run from the repository root:
+
+    python -m benchmarks.e2e --runs 200 --concurrency 8 --latency 0.05
+
+Reports, per scenario: turns/sec, p50/p95/p99 run latency, CPU time per
+turn and peak RSS. Pass --json to save the numbers for comparison.
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from openai import OpenAI
+
+from swarm import Agent, Swarm
+
+
+def simple_agent() -> Agent:
+    return Agent(name="Simple")
+
+
+def handoff_chain(depth: int = 4) -> Agent:
+    agents = [Agent(name=f"Agent {i}") for i in range(depth)]
+    for i, (current, following) in enumerate(zip(agents, agents[1:])):
+
+        def transfer(following=following):
+            return following
+
+        transfer.__name__ = f"transfer_to_agent_{i + 1}"
+        current.functions = [transfer]
+    return agents[0]
+
+
+def parallel_tools(width: int = 4) -> Agent:
+    def make_tool(i):
+        def tool(query: str):
+            return f"result {i} for {query}"
+
+        tool.__name__ = f"lookup_{i}"
+        return tool
+
+    return Agent(
+        name="Tools",
+        functions=[make_tool(i) for i in range(width)],
+        parallel_tool_calls=True,
+    )
+
+
+SCENARIOS: Dict[str, tuple] = {
+    "run": (simple_agent, False),
+    "run_and_stream": (simple_agent, True),
+    "handoff_chain": (handoff_chain, False),
+    "parallel_tools": (parallel_tools, False),
+}
+
+
+def start_server(latency: float, tokens_per_second: float):
+    command = [sys.executable, "-m", "tests.fake_server", "--port", "0"]
+    command += ["--latency", str(latency)]
+    if tokens_per_second:
+        command += ["--tokens-per-second", str(tokens_per_second)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    return process, base_url
+
+
+def run_once(swarm: Swarm, agent: Agent, stream: bool) -> int:
+    messages = [{"role": "user", "content": "Hello"}]
+    if stream:
+        for event in swarm.run(agent=agent, messages=messages, stream=True):
+            if "response" in event:
+                response = event["response"]
+    else:
+        response = swarm.run(agent=agent, messages=messages)
+    return response.usage.completions
+
+
+def percentile(cuts, p: int) -> float:
+    return cuts[p - 1] * 1000
+
+
+def bench(
+    swarm: Swarm, make_agent: Callable[[], Agent], stream: bool, runs: int, concurrency: int
+) -> dict:
+    agent = make_agent()
+    run_once(swarm, agent, stream)  # warm up connections and compiled tools
+
+    def timed(_):
+        started = time.perf_counter()
+        turns = run_once(swarm, agent, stream)
+        return time.perf_counter() - started, turns
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(runs)))
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+
+    latencies = [latency for latency, _ in results]
+    turns = sum(t for _, t in results)
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "runs": runs,
+        "turns": turns,
+        "turns_per_sec": turns / wall,
+        "p50_ms": percentile(cuts, 50),
+        "p95_ms": percentile(cuts, 95),
+        "p99_ms": percentile(cuts, 99),
+        "cpu_ms_per_turn": cpu / turns * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="median server latency before the first token, in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    process, base_url = start_server(args.latency, args.tokens_per_second)
+    swarm = Swarm(client=OpenAI(base_url=base_url, api_key="fake", max_retries=0))
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            make_agent, stream = SCENARIOS[name]
+            results[name] = bench(swarm, make_agent, stream, args.runs, args.concurrency)
+    finally:
+        swarm.close()
+        process.terminate()
+        process.wait()
+
+    columns = list(next(iter(results.values())))
+    print(f"{'scenario':<16}" + "".join(f"{c:>16}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:<16}" + "".join(
+            f"{row[c]:>16.2f}" if isinstance(row[c], float) else f"{row[c]:>16}"
+            for c in columns
+        ))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
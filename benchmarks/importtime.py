@@ -0,0 +1,83 @@
+"""
+Startup benchmark: how long `import swarm` takes in a fresh interpreter.
+
+Each run starts a new `python -X importtime -c "import swarm"` and reads
+the cumulative time of the top-level swarm import from its report. Run
+from the repository root:
+
+    python -m benchmarks.importtime --runs 20 --json importtime.json
+
+Reports the min and median import time and the slowest modules of the
+fastest run. --max-ms makes it exit non-zero when the median is slower,
+so CI can catch a heavy import sneaking back in.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds per module, for one run."""
+    report = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def slowest(times: Dict[str, int], module: str, count: int) -> List[Tuple[str, int]]:
+    # cumulative times nest, so a package shows up along with its submodules
+    others = [(name, us) for name, us in times.items() if name != module]
+    return sorted(others, key=lambda item: -item[1])[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="swarm")
+    parser.add_argument("--top", type=int, default=10,
+                        help="how many of the slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail if the median import time is above this")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    totals = [times[args.module] / 1000 for times in runs]
+    fastest = runs[totals.index(min(totals))]
+    results = {
+        "module": args.module,
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "min_ms": min(totals),
+        "median_ms": statistics.median(totals),
+        "openai_imported": any(name.split(".")[0] == "openai" for name in fastest),
+        "slowest_ms": {name: us / 1000 for name, us in slowest(fastest, args.module, args.top)},
+    }
+
+    print(f"import {args.module}: min {results['min_ms']:.1f} ms, "
+          f"median {results['median_ms']:.1f} ms over {args.runs} runs")
+    print(f"openai imported: {results['openai_imported']}")
+    for name, ms in results["slowest_ms"].items():
+        print(f"{ms:>10.1f} ms  {name}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.max_ms is not None and results["median_ms"] > args.max_ms:
+        sys.exit(f"median import time {results['median_ms']:.1f} ms is above {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
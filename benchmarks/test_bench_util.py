@@ -0,0 +1,167 @@
+"""
+Microbenchmarks for the per-chunk and per-turn helpers in swarm.util.
+Needs pytest-benchmark (`pip install -e .[bench]`); see benchmarks/README.md
+for recording a baseline and comparing against it.
+"""
+
+import copy
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from openai.types.chat.chat_completion_chunk import (  # noqa: E402
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+
+from swarm import Agent, Swarm  # noqa: E402
+from swarm.util import (  # noqa: E402
+    StreamAccumulator,
+    function_to_json,
+    merge_chunk,
+)
+from tests.mock_client import MockOpenAIClient  # noqa: E402
+
+STREAM_TOKENS = 1000
+TOOL_CALLS = 3
+ARGUMENT_CHUNKS = 200
+AGENT_FUNCTIONS = 60
+
+
+def content_deltas():
+    deltas = [{"role": "assistant", "content": "", "tool_calls": None}]
+    deltas += [
+        {"content": f" token{i}", "role": None, "tool_calls": None}
+        for i in range(STREAM_TOKENS)
+    ]
+    return deltas
+
+
+def tool_call_deltas():
+    arguments = json.dumps({"query": "x" * (ARGUMENT_CHUNKS * 4)})
+    size = max(1, len(arguments) // ARGUMENT_CHUNKS)
+    fragments = [arguments[i:i + size] for i in range(0, len(arguments), size)]
+    deltas = [{"role": "assistant", "content": None, "tool_calls": None}]
+    for index in range(TOOL_CALLS):
+        deltas.append(
+            {
+                "content": None,
+                "role": None,
+                "tool_calls": [
+                    {
+                        "index": index,
+                        "id": f"call_{index}",
+                        "type": "function",
+                        "function": {"name": f"tool_{index}", "arguments": ""},
+                    }
+                ],
+            }
+        )
+        deltas += [
+            {
+                "content": None,
+                "role": None,
+                "tool_calls": [
+                    {
+                        "index": index,
+                        "id": None,
+                        "type": None,
+                        "function": {"name": None, "arguments": fragment},
+                    }
+                ],
+            }
+            for fragment in fragments
+        ]
+    return deltas
+
+
+def empty_message():
+    return {
+        "content": "",
+        "sender": "Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": {
+            index: {"function": {"arguments": "", "name": ""}, "id": "", "type": ""}
+            for index in range(TOOL_CALLS)
+        },
+    }
+
+
+def to_choice_delta(delta: dict) -> ChoiceDelta:
+    tool_calls = None
+    if delta["tool_calls"]:
+        tool_calls = [
+            ChoiceDeltaToolCall(
+                index=call["index"],
+                id=call["id"],
+                type=call["type"],
+                function=ChoiceDeltaToolCallFunction(**call["function"]),
+            )
+            for call in delta["tool_calls"]
+        ]
+    return ChoiceDelta(role=delta["role"], content=delta["content"], tool_calls=tool_calls)
+
+
+def make_functions(count: int):
+    functions = []
+    for i in range(count):
+
+        def function(query: str, limit: int = 10, exact: bool = False, context_variables: dict = None):
+            """Looks something up."""
+            return query
+
+        function.__name__ = f"function_{i}"
+        functions.append(function)
+    return functions
+
+
+def merge_all(message: dict, deltas: list) -> dict:
+    for delta in deltas:
+        merge_chunk(message, delta)
+    return message
+
+
+def accumulate_all(deltas: list) -> dict:
+    accumulator = StreamAccumulator()
+    for delta in deltas:
+        accumulator.add(delta, "Agent")
+    return accumulator.message("Agent")
+
+
+@pytest.mark.parametrize("make_deltas", [content_deltas, tool_call_deltas])
+def test_merge_chunk(benchmark, make_deltas):
+    deltas = make_deltas()
+
+    # merge_chunk pops keys from its deltas, so every round needs fresh copies
+    def setup():
+        return (empty_message(), copy.deepcopy(deltas)), {}
+
+    benchmark.pedantic(merge_all, setup=setup, rounds=50)
+
+
+@pytest.mark.parametrize("make_deltas", [content_deltas, tool_call_deltas])
+def test_stream_accumulator(benchmark, make_deltas):
+    deltas = [to_choice_delta(delta) for delta in make_deltas()]
+    message = benchmark(accumulate_all, deltas)
+    assert message["role"] == "assistant"
+
+
+def test_function_to_json(benchmark):
+    functions = make_functions(AGENT_FUNCTIONS)
+    benchmark(lambda: [function_to_json(f) for f in functions])
+
+
+def test_compile_agent_cold(benchmark):
+    agent = Agent(functions=make_functions(AGENT_FUNCTIONS))
+    swarm = Swarm(client=MockOpenAIClient())
+
+    def compile_cold():
+        swarm._compiled.clear()
+        return swarm.compile(agent)
+
+    compiled = benchmark(compile_cold)
+    assert len(compiled.tools) == AGENT_FUNCTIONS
@@ -22,12 +22,16 @@ def run_function_evals(agent, test_cases, n=1, eval_path=None):
         }
         print(50 * "--")
         print(f"\033[94mConversation: \033[0m{test_case['conversation']}\n")
-        for i in range(n):
-            print(f"\033[90mIteration: {i + 1}/{n}\033[0m")
-            response = client.run(
-                agent=agent, messages=test_case["conversation"], max_turns=1
-            )
-            output = extract_response_info(response)
+        jobs = [
+            {"agent": agent, "messages": test_case["conversation"], "max_turns": 1}
+            for _ in range(n)
+        ]
+        for result in client.run_many(jobs):
+            print(f"\033[90mIteration: {result.index + 1}/{n}\033[0m")
+            if not result.ok:
+                print(f"\033[91mError: {result.error}\033[0m\n")
+                continue
+            output = extract_response_info(result.response)
             actual_function = output.get("tool_calls", "None")
             actual_message = output.get("message", "None")
 
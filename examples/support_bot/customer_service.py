@@ -1,13 +1,13 @@
 import re
 
 import qdrant_client
-from openai import OpenAI
 
 from swarm import Agent
+from swarm.clients import get_client
 from swarm.repl import run_demo_loop
 
 # Initialize connections
-client = OpenAI()
+client = get_client()
 qdrant = qdrant_client.QdrantClient(host="localhost")
 
 # Set embedding model
@@ -1,13 +1,13 @@
 import re
 
 import qdrant_client
-from openai import OpenAI
 
-from swarm import Agent
+from swarm import Agent, cacheable
+from swarm.clients import get_client
 from swarm.repl import run_demo_loop
 
 # Initialize connections
-client = OpenAI()
+client = get_client()
 qdrant = qdrant_client.QdrantClient(host="localhost")
 
 # Set embedding model
@@ -37,6 +37,7 @@ def query_qdrant(query, collection_name, vector_name="article", top_k=5):
     return query_results
 
 
+@cacheable(ttl=3600)
 def query_docs(query):
     """Query the knowledge base for relevant articles."""
     print(f"Searching knowledge base with query: {query}")
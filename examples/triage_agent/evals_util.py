@@ -1,9 +1,10 @@
-from openai import OpenAI
 import instructor
 from pydantic import BaseModel
 from typing import Optional
 
-__client = instructor.from_openai(OpenAI())
+from swarm.clients import get_client
+
+__client = instructor.from_openai(get_client())
 
 
 class BoolEvalResult(BaseModel):
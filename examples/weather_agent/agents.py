@@ -1,8 +1,9 @@
 import json
 
-from swarm import Agent
+from swarm import Agent, cacheable
 
 
+@cacheable(ttl=600)
 def get_weather(location, time="now"):
     """Get the current weather in a given location. Location MUST be a city."""
     return json.dumps({"location": location, "temperature": "65", "time": time})
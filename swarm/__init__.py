@@ -1,4 +1,18 @@
-from .core import Swarm
+from .core import Swarm, AsyncSwarm
+from .batch import BatchResult
+from .session import Session, AsyncSession
+from .tools import cacheable, run_in_process, tool_timeout
 from .types import Agent, Response
 
-__all__ = ["Swarm", "Agent", "Response"]
+__all__ = [
+    "Swarm",
+    "AsyncSwarm",
+    "BatchResult",
+    "Session",
+    "AsyncSession",
+    "Agent",
+    "Response",
+    "cacheable",
+    "run_in_process",
+    "tool_timeout",
+]
@@ -0,0 +1,65 @@
+# Standard library imports
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# Local imports
+from .types import Response
+
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of one job in a `run_many` batch.
+
+    Attributes:
+        index (int): Position of the job in the input.
+        job (dict): The run() keyword arguments the job was started with.
+        response (Response): The run's response, if it succeeded.
+        error (BaseException): The exception the run raised, if it failed.
+    """
+
+    index: int
+    job: dict
+    response: Optional[Response] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+ProgressCallback = Callable[[int, Optional[int], BatchResult], None]
+
+
+class StartRateLimiter:
+    """
+    Spaces out job starts so no more than `rate` jobs start per second.
+    Safe to share between threads; `await_slot` is the asyncio variant.
+    """
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+            return start - now
+
+    def wait(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,241 @@
+# Standard library imports
+import abc
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional
+
+# Local imports
+from .util import StreamAccumulator
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+__CACHE_KEY_FIELDS__ = (
+    "model",
+    "messages",
+    "tools",
+    "tool_choice",
+    "parallel_tool_calls",
+)
+
+
+def completion_cache_key(create_params: dict) -> str:
+    """
+    Returns a stable hash of the parts of a chat.completions.create request
+    that determine its answer. Whether the request streams is deliberately
+    left out, so streamed and non-streamed requests share entries.
+    """
+    payload = {field: create_params.get(field) for field in __CACHE_KEY_FIELDS__}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class CompletionCache(abc.ABC):
+    """
+    Base class for completion caches. Entries are assistant message dicts
+    (as produced by ChatCompletionMessage.model_dump) keyed by
+    completion_cache_key.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the cached message for key, or None on a miss."""
+
+    @abc.abstractmethod
+    def set(self, key: str, message: dict) -> None:
+        """Stores message under key."""
+
+
+class MemoryCache(CompletionCache):
+    """
+    In-process LRU cache.
+
+    Args:
+        maxsize: Max number of entries kept; the least recently used entry
+            is evicted first.
+        ttl: Seconds an entry stays valid, or None to keep it until evicted.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, message = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return message
+
+    def set(self, key: str, message: dict) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, message)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache(CompletionCache):
+    """
+    On-disk cache backed by a SQLite file, shared by every process that opens
+    the same path.
+
+    Args:
+        path: Database file; ":memory:" keeps it in memory.
+        ttl: Seconds an entry stays valid, or None to keep it forever.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, message TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message, created FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            message, created = row
+            if self.ttl is not None and created + self.ttl <= time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+        return json.loads(message)
+
+    def set(self, key: str, message: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, message, created) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(message), time.time()),
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def replay_completion(message: dict, model: str) -> "ChatCompletion":
+    """Rebuilds a non-streamed completion from a cached message."""
+    from openai.types.chat import ChatCompletion
+    from openai.types.chat.chat_completion import Choice
+
+    from .types import ChatCompletionMessage
+
+    return ChatCompletion(
+        id="cached",
+        created=int(time.time()),
+        model=model,
+        object="chat.completion",
+        choices=[
+            Choice(
+                index=0,
+                finish_reason="tool_calls" if message.get("tool_calls") else "stop",
+                message=ChatCompletionMessage.model_validate(message),
+            )
+        ],
+    )
+
+
+def replay_chunks(message: dict, model: str) -> List["ChatCompletionChunk"]:
+    """
+    Rebuilds the chunks of a streamed completion from a cached message: one
+    chunk carrying the role and content, then one per tool call.
+    """
+    from openai.types.chat import ChatCompletionChunk
+    from openai.types.chat.chat_completion_chunk import (
+        Choice as ChunkChoice,
+        ChoiceDelta,
+        ChoiceDeltaToolCall,
+        ChoiceDeltaToolCallFunction,
+    )
+
+    def chunk(delta: ChoiceDelta) -> ChatCompletionChunk:
+        return ChatCompletionChunk(
+            id="cached",
+            created=int(time.time()),
+            model=model,
+            object="chat.completion.chunk",
+            choices=[ChunkChoice(index=0, delta=delta, finish_reason=None)],
+        )
+
+    chunks = [
+        chunk(ChoiceDelta(role=message.get("role"), content=message.get("content")))
+    ]
+    for index, tool_call in enumerate(message.get("tool_calls") or []):
+        function = tool_call["function"]
+        chunks.append(
+            chunk(
+                ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=index,
+                            id=tool_call["id"],
+                            type=tool_call["type"],
+                            function=ChoiceDeltaToolCallFunction(
+                                name=function["name"],
+                                arguments=function["arguments"],
+                            ),
+                        )
+                    ]
+                )
+            )
+        )
+    return chunks
+
+
+def _recorded_message(accumulator: StreamAccumulator) -> dict:
+    tool_calls = accumulator.tool_call_dicts()
+    for tool_call in tool_calls:
+        tool_call["type"] = tool_call["type"] or "function"
+    return {
+        "role": accumulator.role,
+        "content": "".join(accumulator.content) or None,
+        "tool_calls": tool_calls or None,
+    }
+
+
+def record_stream(stream: Iterable, on_complete: Callable[[dict], None]):
+    """
+    Passes a completion stream through, calling on_complete with the final
+    message only if the stream was consumed to the end.
+    """
+    accumulator = StreamAccumulator()
+    for chunk in stream:
+        if chunk.choices:
+            accumulator.add(chunk.choices[0].delta)
+        yield chunk
+    on_complete(_recorded_message(accumulator))
+
+
+async def arecord_stream(stream, on_complete: Callable[[dict], None]):
+    accumulator = StreamAccumulator()
+    async for chunk in stream:
+        if chunk.choices:
+            accumulator.add(chunk.choices[0].delta)
+        yield chunk
+    on_complete(_recorded_message(accumulator))
+
+
+async def areplay_chunks(message: dict, model: str):
+    for chunk in replay_chunks(message, model):
+        yield chunk
@@ -0,0 +1,199 @@
+"""
+Process-wide OpenAI clients with a tunable connection pool.
+
+Every client owns its own connection pool, so clients created separately
+(one per Swarm, per module and per script) each pay for their own TCP and
+TLS setup. `get_client` returns one shared client per name instead; Swarm
+and AsyncSwarm use the "default" one when no client is passed. Configure it
+once at startup, before anything else asks for it:
+
+    from swarm.clients import configure_clients, get_client, warm_up
+
+    configure_clients(max_connections=200, http2=True, timeout=60)
+    warm_up(get_client(), connections=8)
+
+Options not given keep openai's defaults.
+"""
+
+# Standard library imports
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+_shared_clients: Dict[str, Any] = {}
+_shared_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_client_options: Dict[str, dict] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def _httpx():
+    try:
+        import httpx
+    except ImportError:  # newer openai releases are built on httpx2
+        import httpx2 as httpx
+    return httpx
+
+
+def _client_kwargs(
+    async_client: bool,
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+    keepalive_expiry: Optional[float] = None,
+    http2: bool = False,
+    timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None,
+    **client_kwargs,
+) -> Tuple[dict, Any]:
+    import openai
+
+    httpx = _httpx()
+    limits = openai.DEFAULT_CONNECTION_LIMITS
+    default_timeout = openai.DEFAULT_TIMEOUT
+    http_client_class = (
+        openai.DefaultAsyncHttpxClient if async_client else openai.DefaultHttpxClient
+    )
+    http_client = http_client_class(
+        limits=httpx.Limits(
+            max_connections=_or(max_connections, limits.max_connections),
+            max_keepalive_connections=_or(
+                max_keepalive_connections, limits.max_keepalive_connections
+            ),
+            keepalive_expiry=_or(keepalive_expiry, limits.keepalive_expiry),
+        ),
+        timeout=httpx.Timeout(
+            _or(timeout, default_timeout.read),
+            connect=_or(connect_timeout, default_timeout.connect),
+        ),
+        http2=http2,
+    )
+    return client_kwargs, http_client
+
+
+def _or(value, default):
+    return default if value is None else value
+
+
+def _options(name: str, options: dict) -> dict:
+    # called with _shared_clients_lock held; the first call for a name
+    # decides its options, so its sync and async clients always match
+    if name not in _client_options:
+        _client_options[name] = options
+    return _client_options[name]
+
+
+def configure_clients(name: str = "default", **options) -> None:
+    """
+    Sets the options (see `get_client`) of the shared clients called `name`
+    without creating one. Raises RuntimeError if they were already decided
+    differently, by an earlier configure_clients or get_client call.
+    """
+    with _shared_clients_lock:
+        if _options(name, options) != options:
+            raise RuntimeError(f"shared client {name!r} is already configured")
+
+
+def get_client(name: str = "default", **options):
+    """
+    Returns the process-wide OpenAI client called `name`, creating it with
+    `options` the first time. Later calls ignore `options`.
+
+    Options:
+        max_connections: Connections open at once, across all hosts.
+        max_keepalive_connections: Idle connections kept for reuse.
+        keepalive_expiry: Seconds an idle connection is kept.
+        http2: Use HTTP/2 (needs the `h2` package).
+        timeout: Default request timeout in seconds.
+        connect_timeout: Timeout for opening a connection.
+
+    Anything else (api_key, base_url, max_retries, ...) goes to OpenAI().
+    """
+    with _shared_clients_lock:
+        client = _shared_clients.get(name)
+        if client is None:
+            import openai
+
+            kwargs, http_client = _client_kwargs(False, **_options(name, options))
+            client = _shared_clients[name] = openai.OpenAI(
+                http_client=http_client, **kwargs
+            )
+        return client
+
+
+def get_async_client(name: str = "default", **options):
+    """
+    AsyncOpenAI counterpart of `get_client`, sharing its options.
+
+    Async connections belong to the event loop that opened them, so the
+    client is shared per event loop. Called outside a running loop it
+    returns a new client, configured the same way, every time; an
+    AsyncSwarm made without a client asks for one on each run instead,
+    so it shares the client of whichever loop runs it.
+    """
+    import openai
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _shared_clients_lock:
+        clients = _shared_async_clients.get(loop, {}) if loop else {}
+        client = clients.get(name)
+        if client is None:
+            kwargs, http_client = _client_kwargs(True, **_options(name, options))
+            client = openai.AsyncOpenAI(http_client=http_client, **kwargs)
+            if loop:
+                _shared_async_clients.setdefault(loop, {})[name] = client
+        return client
+
+
+def close_clients() -> None:
+    """Closes the shared sync clients; the next get_client makes new ones."""
+    with _shared_clients_lock:
+        clients = list(_shared_clients.values())
+        _shared_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def warm_up(client, connections: int = 1, timeout: float = 10.0) -> int:
+    """
+    Opens `connections` pooled connections ahead of the first completion by
+    sending that many concurrent, token-free requests (a model listing).
+    Returns how many reached the server; failures are ignored.
+    """
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        return sum(pool.map(lambda _: _ping(client, timeout), range(connections)))
+
+
+async def awarm_up(client, connections: int = 1, timeout: float = 10.0) -> int:
+    """Like `warm_up`, for an AsyncOpenAI client."""
+    results = await asyncio.gather(
+        *(_aping(client, timeout) for _ in range(connections))
+    )
+    return sum(results)
+
+
+def _ping(client, timeout: float) -> bool:
+    import openai
+
+    try:
+        client.with_options(max_retries=0, timeout=timeout).models.list()
+    except openai.APIStatusError:
+        pass  # any HTTP response means the connection is open
+    except openai.APIError:
+        return False
+    return True
+
+
+async def _aping(client, timeout: float) -> bool:
+    import openai
+
+    try:
+        await client.with_options(max_retries=0, timeout=timeout).models.list()
+    except openai.APIStatusError:
+        pass
+    except openai.APIError:
+        return False
+    return True
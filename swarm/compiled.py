@@ -0,0 +1,127 @@
+# Standard library imports
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Local imports
+from .util import function_to_json
+from .types import Agent, AgentFunction
+
+__CTX_VARS_NAME__ = "context_variables"
+__TOOL_OPTIONS_ATTR__ = "__swarm_tool__"
+
+
+def tool_options(func: AgentFunction) -> dict:
+    """Returns the options set on an agent function by swarm.tools decorators."""
+    return getattr(func, __TOOL_OPTIONS_ATTR__, {})
+
+
+def set_tool_option(func: AgentFunction, name: str, value) -> AgentFunction:
+    setattr(func, __TOOL_OPTIONS_ATTR__, {**tool_options(func), name: value})
+    return func
+
+
+@dataclass
+class CompiledFunction:
+    """
+    Everything the run loop needs to know about an agent function, worked out
+    once instead of on every turn.
+
+    Attributes:
+        func (AgentFunction): The function itself.
+        name (str): The name the model calls it by.
+        tool (dict): The tool schema sent to the model, with
+            context_variables hidden.
+        takes_context (bool): Whether context_variables is passed in.
+        is_coroutine (bool): Whether the function must be awaited.
+        cache (ToolCache): Result cache set by @cacheable, if any.
+        timeout (float): Time limit set by @tool_timeout; `...` if unset,
+            None for no limit.
+        in_process (bool): Whether @run_in_process sends it to the process
+            pool.
+    """
+
+    func: AgentFunction
+    name: str
+    tool: dict
+    takes_context: bool
+    is_coroutine: bool
+    cache: Optional[Any] = None
+    timeout: Any = ...
+    in_process: bool = False
+
+    @classmethod
+    def from_function(cls, func: AgentFunction) -> "CompiledFunction":
+        tool = function_to_json(func)
+        # hide context_variables from model
+        params = tool["function"]["parameters"]
+        params["properties"].pop(__CTX_VARS_NAME__, None)
+        if __CTX_VARS_NAME__ in params["required"]:
+            params["required"].remove(__CTX_VARS_NAME__)
+
+        options = tool_options(func)
+        return cls(
+            func=func,
+            name=func.__name__,
+            tool=tool,
+            takes_context=__CTX_VARS_NAME__ in inspect.signature(func).parameters,
+            is_coroutine=inspect.iscoroutinefunction(func),
+            cache=options.get("cache"),
+            timeout=options.get("timeout", ...),
+            in_process=options.get("in_process", False),
+        )
+
+
+@dataclass
+class CompiledAgent:
+    """
+    The precomputed tool payload and function map for one set of agent
+    functions, plus the agents its functions can hand off to.
+
+    Compiled agents are keyed on the exact functions they were built from, so
+    changing `Agent.functions` yields a different CompiledAgent.
+    """
+
+    functions: Tuple[AgentFunction, ...]
+    tools: List[dict]
+    function_map: Dict[str, CompiledFunction]
+    handoffs: List[Agent] = field(default_factory=list)
+
+    @classmethod
+    def from_functions(cls, functions: Tuple[AgentFunction, ...]) -> "CompiledAgent":
+        compiled = [CompiledFunction.from_function(f) for f in functions]
+        handoffs = []
+        for f in functions:
+            for agent in find_handoff_agents(f):
+                if not any(agent is seen for seen in handoffs):
+                    handoffs.append(agent)
+
+        return cls(
+            functions=functions,
+            tools=[c.tool for c in compiled],
+            function_map={c.name: c for c in compiled},
+            handoffs=handoffs,
+        )
+
+
+def find_handoff_agents(func: AgentFunction) -> List[Agent]:
+    """
+    Finds the agents a function can hand off to by looking at the globals and
+    closure variables its code refers to. This only sees agents referenced
+    directly (e.g. `return sales_agent`); agents built at call time are
+    compiled lazily when the handoff happens.
+    """
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return []
+
+    candidates = []
+    func_globals = getattr(func, "__globals__", {})
+    candidates.extend(func_globals.get(name) for name in code.co_names)
+    for cell in getattr(func, "__closure__", None) or ():
+        try:
+            candidates.append(cell.cell_contents)
+        except ValueError:  # cell not filled in yet
+            continue
+
+    return [c for c in candidates if isinstance(c, Agent)]
@@ -1,33 +1,298 @@
+from __future__ import annotations
+
 # Standard library imports
+import asyncio
 import copy
+import functools
+import inspect
 import json
-from collections import defaultdict
-from typing import List, Callable, Union
-
-# Package/library imports
-from openai import OpenAI
-
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Callable, Optional, Tuple, Union
 
 # Local imports
-from .util import function_to_json, debug_print, merge_chunk
+from .clients import awarm_up, get_async_client, get_client, warm_up
+from .cache import (
+    CompletionCache,
+    areplay_chunks,
+    arecord_stream,
+    completion_cache_key,
+    record_stream,
+    replay_chunks,
+    replay_completion,
+)
+from .history import HistoryPolicy, HistoryPolicyChain
+from .ratelimit import (
+    AsyncLimitedStream,
+    LimitedStream,
+    RateLimiter,
+    estimate_request_tokens,
+)
+from .hedging import (
+    AsyncPrefetchedStream,
+    HedgePolicy,
+    PrefetchedStream,
+    aclose_quietly,
+    close_quietly,
+    discard_future,
+)
+from .observers import SwarmObserver
+from .singleflight import SingleFlight
+from .tools import ToolTimeoutError, call_in_process
+from .retry import Deadline, DeadlineExceeded, RetryPolicy
+from .batch import BatchResult, ProgressCallback, StartRateLimiter
+from .session import AsyncSession, Session
+from .compiled import CompiledAgent, CompiledFunction, __CTX_VARS_NAME__
+from .util import (
+    StreamAccumulator,
+    debug_print,
+    run_coroutine_sync,
+    run_in_daemon_thread,
+)
 from .types import (
     Agent,
     AgentFunction,
-    ChatCompletionMessage,
-    ChatCompletionMessageToolCall,
-    Function,
     Response,
+    RunUsage,
     Result,
 )
 
-__CTX_VARS_NAME__ = "context_variables"
+if TYPE_CHECKING:
+    from .types import ChatCompletionMessage, ChatCompletionMessageToolCall
+
+__COMPILED_CACHE_SIZE__ = 1024
+__COPY_MODES__ = ("deep", "shallow", "none")
+# how long a hedged request waits with no timeout of its own (openai's default)
+__HEDGE_MAX_WAIT__ = 600.0
+
+
+class _RunState:
+    """
+    Bookkeeping shared by the four run loops: the active agent, deadlines,
+    usage and observer notifications. It appends to `history` and updates
+    `context_variables` in place.
+    """
+
+    def __init__(
+        self,
+        swarm: "Swarm",
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        timeout: Optional[float],
+        turn_timeout: Optional[float],
+    ):
+        self.swarm = swarm
+        self.agent = agent
+        self.history = history
+        self.context_variables = context_variables
+        self.init_len = len(history)
+        self.deadline = Deadline(timeout)
+        self.turn_timeout = turn_timeout
+        self.deadline_exceeded = False
+        self.started = time.perf_counter()
+        self.turn = 0
+        self.usage = RunUsage()
+
+    def turns_left(self, max_turns: int) -> bool:
+        return len(self.history) - self.init_len < max_turns
+
+    def start_turn(self) -> Optional[Deadline]:
+        """Returns the turn's deadline, or None if the run's has passed."""
+        if self.deadline.expired():
+            self.deadline_exceeded = True
+            return None
+        if self.swarm.observers:
+            self.swarm._notify("on_turn_start", self.agent, self.turn)
+        self.turn += 1
+        return Deadline.earliest(self.deadline, self.turn_timeout)
+
+    def deadline_passed(self, error: Exception, turn_deadline: Deadline) -> bool:
+        """
+        Whether `error` means the turn ran out of time, in which case the run
+        ends with deadline_exceeded; any other error should be re-raised.
+        """
+        if isinstance(error, DeadlineExceeded) or turn_deadline.expired():
+            self.deadline_exceeded = True
+            return True
+        return False
+
+    def record_completion(
+        self,
+        requested: float,
+        usage: Optional[object],
+        first_token_at: Optional[float] = None,
+    ) -> None:
+        latency = time.perf_counter() - requested
+        self.usage.add_completion(latency, usage, self.agent.name)
+        if self.swarm.observers:
+            self.swarm._notify(
+                "on_completion",
+                self.agent,
+                latency,
+                first_token_at and first_token_at - requested,
+                usage,
+            )
+
+    def abandon_tools(self, tool_calls: list, debug: bool) -> None:
+        debug_print(debug, "Deadline exceeded running tools.")
+        self.history.extend(self.swarm._abandoned_tool_messages(tool_calls))
+        self.deadline_exceeded = True
+
+    def apply_tool_results(
+        self, partial_response: Response, tools_started: float
+    ) -> None:
+        """Adds the tool messages and context updates, and follows a handoff."""
+        self.usage.add_tool_time(time.perf_counter() - tools_started, self.agent.name)
+        self.history.extend(partial_response.messages)
+        self.context_variables.update(partial_response.context_variables)
+        if partial_response.agent:
+            if self.swarm.observers and partial_response.agent is not self.agent:
+                self.swarm._notify("on_handoff", self.agent, partial_response.agent)
+            self.agent = partial_response.agent
+
+    def response(self) -> Response:
+        response = Response(
+            messages=self.history[self.init_len:],
+            agent=self.agent,
+            context_variables=self.context_variables,
+            deadline_exceeded=self.deadline_exceeded,
+            usage=self.usage,
+        )
+        if self.swarm.observers:
+            elapsed = time.perf_counter() - self.started
+            self.swarm._notify("on_run_end", response, elapsed)
+        return response
 
 
 class Swarm:
-    def __init__(self, client=None):
+    def __init__(
+        self,
+        client=None,
+        tool_executor: Optional[Executor] = None,
+        max_tool_workers: Optional[int] = None,
+        cache: Optional[CompletionCache] = None,
+        history_policy: Union[HistoryPolicy, List[HistoryPolicy], None] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        observers: Optional[List[SwarmObserver]] = None,
+        tool_timeout: Optional[float] = None,
+        process_executor: Optional[Executor] = None,
+        max_process_workers: Optional[int] = None,
+        single_flight: Optional[SingleFlight] = None,
+    ):
+        """
+        Args:
+            client: OpenAI client to use. If omitted, the process-wide
+                default from swarm.clients.get_client() is shared.
+            tool_executor: Executor used to run an agent's tool calls
+                concurrently when `Agent.parallel_tool_calls` is set. If
+                omitted, a thread pool is created on first use.
+            max_tool_workers: max_workers for the default thread pool.
+            cache: Completion cache (e.g. swarm.cache.MemoryCache) consulted
+                before every chat completion request. Off by default.
+            history_policy: Policy, or list of policies applied in order,
+                that trims the history sent to the model on each turn (see
+                swarm.history). The Response still holds every message.
+            rate_limiter: Client-side request/token limits and adaptive
+                concurrency applied to every completion request; pass
+                swarm.ratelimit.get_rate_limiter() to share one per process.
+            hedge_policy: Default HedgePolicy for agents that don't set
+                their own; duplicates slow completion requests.
+            retry_policy: Retries failed completion requests (and agent
+                functions, if it lists tool_errors) with backoff.
+            observers: SwarmObservers notified of turns, completions, tool
+                calls, handoffs and finished runs (see swarm.observers).
+            tool_timeout: Seconds an agent function may run before the model
+                gets a timeout error instead; @tool_timeout overrides it.
+            process_executor: Executor for @run_in_process functions. If
+                omitted, a process pool is created on first use.
+            max_process_workers: max_workers for the default process pool.
+            single_flight: Lets identical completion requests in flight at
+                the same time share one upstream request (see
+                swarm.singleflight). Off by default.
+        """
         if not client:
-            client = OpenAI()
+            client = self._default_client()
         self.client = client
+        self.tool_executor = tool_executor
+        self.max_tool_workers = max_tool_workers
+        self.cache = cache
+        if isinstance(history_policy, list):
+            history_policy = HistoryPolicyChain(history_policy)
+        self.history_policy = history_policy
+        self.rate_limiter = rate_limiter
+        self.hedge_policy = hedge_policy
+        self.retry_policy = retry_policy
+        self.observers = list(observers or [])
+        self.tool_timeout = tool_timeout
+        self.process_executor = process_executor
+        self.max_process_workers = max_process_workers
+        self.single_flight = single_flight
+        self._owns_process_executor = False
+        self._owns_tool_executor = False
+        self._tool_executor_lock = threading.Lock()
+        self._compiled = OrderedDict()
+        self._compiled_lock = threading.Lock()
+
+    def _notify(self, hook: str, *args) -> None:
+        for observer in self.observers:
+            getattr(observer, hook)(*args)
+
+    def session(self, agent: Agent, **kwargs) -> Session:
+        """
+        Starts a stateful conversation with `agent`. Keyword arguments are
+        passed on to Session.
+        """
+        return Session(self, agent, **kwargs)
+
+    def compile(self, agent: Agent) -> CompiledAgent:
+        """
+        Precomputes tool schemas and function maps for an agent and every
+        agent reachable from it through handoff functions, so later turns
+        skip that work. Returns the starting agent's CompiledAgent.
+        """
+        root = self._compile_functions(agent.functions)
+        seen = {id(agent)}
+        pending = list(root.handoffs)
+        while pending:
+            next_agent = pending.pop()
+            if id(next_agent) in seen:
+                continue
+            seen.add(id(next_agent))
+            pending.extend(self._compile_functions(next_agent.functions).handoffs)
+        return root
+
+    def _compile_functions(self, functions: List[AgentFunction]) -> CompiledAgent:
+        # keyed on the functions themselves, so editing Agent.functions
+        # naturally misses the cache and recompiles
+        key = tuple(functions)
+        try:
+            with self._compiled_lock:
+                compiled = self._compiled.get(key)
+                if compiled is not None:
+                    self._compiled.move_to_end(key)
+                    return compiled
+        except TypeError:  # unhashable callable, don't cache
+            return CompiledAgent.from_functions(key)
+
+        compiled = CompiledAgent.from_functions(key)
+        with self._compiled_lock:
+            self._compiled[key] = compiled
+            if len(self._compiled) > __COMPILED_CACHE_SIZE__:
+                self._compiled.popitem(last=False)
+        return compiled
 
     def get_chat_completion(
         self,
@@ -37,23 +302,159 @@ class Swarm:
         model_override: str,
         stream: bool,
         debug: bool,
+        timeout: Optional[float] = None,
     ) -> ChatCompletionMessage:
+        create_params = self._create_params(
+            agent, history, context_variables, model_override, stream, debug
+        )
+        if timeout is not None:
+            create_params["timeout"] = timeout
+        hedge_policy = agent.hedge_policy or self.hedge_policy
+        if self.cache is None:
+            return self._shared_completion(create_params, hedge_policy)
+
+        key = completion_cache_key(create_params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            debug_print(debug, "Completion cache hit:", key)
+            if stream:
+                return iter(replay_chunks(cached, create_params["model"]))
+            return replay_completion(cached, create_params["model"])
+
+        completion = self._shared_completion(create_params, hedge_policy, key)
+        if stream:
+            return record_stream(completion, functools.partial(self.cache.set, key))
+        self.cache.set(key, completion.choices[0].message.model_dump(mode="json"))
+        return completion
+
+    def _shared_completion(
+        self,
+        create_params: dict,
+        hedge_policy: Optional[HedgePolicy] = None,
+        key: Optional[str] = None,
+    ):
+        if self.single_flight is None:
+            return self._request_completion(create_params, hedge_policy)
+        return self.single_flight.call(
+            key or completion_cache_key(create_params),
+            create_params["stream"],
+            lambda: self._request_completion(create_params, hedge_policy),
+            timeout=create_params.get("timeout"),
+        )
+
+    def _request_completion(
+        self, create_params: dict, hedge_policy: Optional[HedgePolicy] = None
+    ):
+        if self.retry_policy is None:
+            return self._create_completion(create_params, hedge_policy)
+        deadline = Deadline(create_params.get("timeout"))
+
+        def attempt():
+            params = create_params
+            if deadline.expires_at is not None:
+                params = {**create_params, "timeout": deadline.remaining()}
+            return self._create_completion(params, hedge_policy)
+
+        return self.retry_policy.call(attempt, deadline=deadline)
+
+    def _create_completion(
+        self, create_params: dict, hedge_policy: Optional[HedgePolicy] = None
+    ):
+        if hedge_policy is None:
+            return self._send_completion(create_params)
+        return self._hedged_completion(create_params, hedge_policy)
+
+    def _first_response(self, create_params: dict):
+        completion = self._send_completion(create_params)
+        if not create_params["stream"]:
+            return completion
+        # a stream only counts as answered once its first chunk is in
+        rest = iter(completion)
+        return PrefetchedStream(next(rest, None), rest, completion)
+
+    def _hedged_completion(self, create_params: dict, policy: HedgePolicy):
+        # each request gets a thread of its own that starts right away: queued
+        # on a pool, a primary would spend its hedge delay waiting for a worker
+        start = time.monotonic()
+        primary = run_in_daemon_thread(
+            self._first_response, (create_params,), name="swarm-hedge"
+        )
+        done, _ = wait([primary], timeout=policy.current_delay())
+        winner = primary
+        if not done:
+            hedge = run_in_daemon_thread(
+                self._first_response,
+                (policy.hedge_params(create_params),),
+                name="swarm-hedge",
+            )
+            remaining = create_params.get("timeout") or __HEDGE_MAX_WAIT__
+            done, _ = wait(
+                [primary, hedge],
+                timeout=max(remaining - (time.monotonic() - start), 0),
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                for future in (primary, hedge):
+                    future.cancel()
+                    future.add_done_callback(discard_future)
+                raise DeadlineExceeded("neither hedged request finished in time")
+            winner = primary if primary in done else hedge
+            loser = hedge if winner is primary else primary
+            if winner.exception() is not None and loser.exception() is None:
+                winner, loser = loser, winner
+            loser.cancel()
+            loser.add_done_callback(discard_future)
+            policy.record_hedge(won=winner is hedge)
+        result = winner.result()
+        policy.record_latency(time.monotonic() - start)
+        return result
+
+    def _send_completion(self, create_params: dict):
+        if self.rate_limiter is None:
+            return self.client.chat.completions.create(**create_params)
+
+        estimated = estimate_request_tokens(create_params)
+        deadline = Deadline(create_params.get("timeout"))
+        self.rate_limiter.acquire(estimated, deadline.remaining())
+        if deadline.expires_at is not None:
+            # time spent waiting for the limiter comes out of the request's
+            create_params = {**create_params, "timeout": deadline.remaining()}
+        try:
+            # the raw response carries the x-ratelimit-* headers
+            raw = self.client.chat.completions.with_raw_response.create(**create_params)
+            completion = raw.parse()
+        except BaseException as e:
+            self.rate_limiter.release(e)
+            raise
+        if create_params["stream"]:
+            # the request holds its concurrency slot until the stream is done
+            return LimitedStream(completion, self.rate_limiter, estimated, raw.headers)
+        self.rate_limiter.release(headers=raw.headers)
+        usage = getattr(completion, "usage", None)
+        self.rate_limiter.record_usage(estimated, getattr(usage, "total_tokens", None))
+        return completion
+
+    def _create_params(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+    ) -> dict:
         context_variables = defaultdict(str, context_variables)
         instructions = (
             agent.instructions(context_variables)
             if callable(agent.instructions)
             else agent.instructions
         )
+        if self.history_policy is not None:
+            history = self.history_policy.apply(history)
         messages = [{"role": "system", "content": instructions}] + history
         debug_print(debug, "Getting chat completion for...:", messages)
 
-        tools = [function_to_json(f) for f in agent.functions]
-        # hide context_variables from model
-        for tool in tools:
-            params = tool["function"]["parameters"]
-            params["properties"].pop(__CTX_VARS_NAME__, None)
-            if __CTX_VARS_NAME__ in params["required"]:
-                params["required"].remove(__CTX_VARS_NAME__)
+        tools = self._compile_functions(agent.functions).tools
 
         create_params = {
             "model": model_override or agent.model,
@@ -65,8 +466,10 @@ class Swarm:
 
         if tools:
             create_params["parallel_tool_calls"] = agent.parallel_tool_calls
+        if stream:
+            create_params["stream_options"] = {"include_usage": True}
 
-        return self.client.chat.completions.create(**create_params)
+        return create_params
 
     def handle_function_result(self, result, debug) -> Result:
         match result:
@@ -86,158 +489,573 @@ class Swarm:
                     debug_print(debug, error_message)
                     raise TypeError(error_message)
 
+    def _get_tool_executor(self) -> Executor:
+        if self.tool_executor is None:
+            with self._tool_executor_lock:
+                if self.tool_executor is None:
+                    self.tool_executor = ThreadPoolExecutor(
+                        max_workers=self.max_tool_workers,
+                        thread_name_prefix="swarm-tool",
+                    )
+                    self._owns_tool_executor = True
+        return self.tool_executor
+
+    def _get_process_executor(self) -> Executor:
+        if self.process_executor is None:
+            with self._tool_executor_lock:
+                if self.process_executor is None:
+                    # forking a process with live threads (the executors,
+                    # the background loop, the client's pool) can deadlock it
+                    method = (
+                        "forkserver"
+                        if "forkserver" in multiprocessing.get_all_start_methods()
+                        else "spawn"
+                    )
+                    self.process_executor = ProcessPoolExecutor(
+                        max_workers=self.max_process_workers,
+                        mp_context=multiprocessing.get_context(method),
+                    )
+                    self._owns_process_executor = True
+        return self.process_executor
+
+    def _default_client(self):
+        return get_client()
+
+    def warm_up(self, connections: int = 1) -> int:
+        """
+        Opens `connections` connections to the API ahead of the first run;
+        see swarm.clients.warm_up.
+        """
+        return warm_up(self.client, connections)
+
+    def close(self) -> None:
+        """Shut down the executors this Swarm created."""
+        if self._owns_tool_executor and self.tool_executor is not None:
+            self.tool_executor.shutdown(wait=False)
+            self.tool_executor = None
+            self._owns_tool_executor = False
+        if self._owns_process_executor and self.process_executor is not None:
+            self.process_executor.shutdown(wait=False, cancel_futures=True)
+            self.process_executor = None
+            self._owns_process_executor = False
+
+    def _prepare_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        function_map: dict,
+        context_variables: dict,
+        debug: bool,
+    ) -> Tuple[Optional[CompiledFunction], dict]:
+        name = tool_call.function.name
+        # handle missing tool case, skip to next tool
+        if name not in function_map:
+            debug_print(debug, f"Tool {name} not found in function map.")
+            return None, {}
+        args = json.loads(tool_call.function.arguments)
+        debug_print(
+            debug, f"Processing tool call: {name} with arguments {args}")
+
+        compiled = function_map[name]
+        # pass context_variables to agent functions
+        if compiled.takes_context:
+            args[__CTX_VARS_NAME__] = context_variables
+        return compiled, args
+
+    def _tool_outcome(
+        self, tool_call: ChatCompletionMessageToolCall, raw_result, debug: bool
+    ) -> Tuple[dict, Optional[Result]]:
+        result: Result = self.handle_function_result(raw_result, debug)
+        return self._tool_message(tool_call, result.value), result
+
+    def _missing_tool_outcome(
+        self, tool_call: ChatCompletionMessageToolCall
+    ) -> Tuple[dict, Optional[Result]]:
+        name = tool_call.function.name
+        return self._tool_message(tool_call, f"Error: Tool {name} not found."), None
+
+    def _execute_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        function_map: dict,
+        context_variables: dict,
+        debug: bool,
+    ) -> Tuple[dict, Optional[Result]]:
+        compiled, args = self._prepare_tool_call(
+            tool_call, function_map, context_variables, debug
+        )
+        if compiled is None:
+            return self._missing_tool_outcome(tool_call)
+        if not self.observers:
+            return self._run_tool_call(tool_call, compiled, args, debug)
+
+        started = self._tool_started(tool_call)
+        try:
+            outcome = self._run_tool_call(tool_call, compiled, args, debug)
+        except Exception as e:
+            self._tool_ended(tool_call, started, None, e)
+            raise
+        self._tool_ended(tool_call, started, outcome[0], None)
+        return outcome
+
+    def _run_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        compiled: CompiledFunction,
+        args: dict,
+        debug: bool,
+    ) -> Tuple[dict, Optional[Result]]:
+        try:
+            raw_result = self._call_function(compiled, args)
+        except ToolTimeoutError as e:
+            return self._timed_out_outcome(tool_call, e, debug)
+        return self._tool_outcome(tool_call, raw_result, debug)
+
+    def _timed_out_outcome(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        error: ToolTimeoutError,
+        debug: bool,
+    ) -> Tuple[dict, Optional[Result]]:
+        debug_print(debug, str(error))
+        return self._tool_message(tool_call, error.tool_content()), None
+
+    def _timeout_for(self, compiled: CompiledFunction) -> Optional[float]:
+        return self.tool_timeout if compiled.timeout is ... else compiled.timeout
+
+    def _tool_started(self, tool_call: ChatCompletionMessageToolCall) -> float:
+        self._notify("on_tool_start", tool_call.function.name, tool_call.id)
+        return time.perf_counter()
+
+    def _tool_ended(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        started: float,
+        message: Optional[dict],
+        error: Optional[BaseException],
+    ) -> None:
+        self._notify(
+            "on_tool_end",
+            tool_call.function.name,
+            tool_call.id,
+            time.perf_counter() - started,
+            len(message["content"]) if message else 0,
+            error,
+        )
+
+    def _call_function(self, compiled: CompiledFunction, args: dict):
+        timeout = self._timeout_for(compiled)
+
+        def call():
+            if compiled.in_process:
+                return self._call_in_process(compiled, args, timeout)
+            if timeout is not None and not compiled.is_coroutine:
+                raw_result = self._call_in_thread(compiled, args, timeout)
+            else:
+                raw_result = compiled.func(**args)
+            # coroutine functions run on the shared background loop
+            if inspect.isawaitable(raw_result):
+                if timeout is not None:
+                    raw_result = self._cancel_after(compiled, raw_result, timeout)
+                raw_result = run_coroutine_sync(raw_result)
+            return raw_result
+
+        invoke = call
+        if self.retry_policy is not None and self.retry_policy.tool_errors:
+            invoke = functools.partial(
+                self.retry_policy.call, call, self.retry_policy.is_retryable_tool_error
+            )
+        if compiled.cache is None:
+            return invoke()
+        raw_result, outcome = compiled.cache.call(args, invoke)
+        if self.observers:
+            self._notify("on_tool_cache", compiled.name, outcome)
+        return raw_result
+
+    def _call_in_thread(self, compiled: CompiledFunction, args: dict, timeout: float):
+        # not on a pool: an abandoned call would hold its worker for good
+        future = run_in_daemon_thread(
+            compiled.func, kwargs=args, name=f"swarm-tool-{compiled.name}"
+        )
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            # a running thread can't be stopped; its result is dropped
+            future.cancel()
+            raise ToolTimeoutError(compiled.name, timeout)
+
+    def _process_args(self, args: dict) -> dict:
+        # snapshot context_variables now; the pool pickles arguments later,
+        # on another thread
+        if __CTX_VARS_NAME__ in args:
+            return {**args, __CTX_VARS_NAME__: dict(args[__CTX_VARS_NAME__])}
+        return args
+
+    def _call_in_process(
+        self, compiled: CompiledFunction, args: dict, timeout: Optional[float]
+    ):
+        future = self._get_process_executor().submit(
+            call_in_process, compiled.func, self._process_args(args)
+        )
+        try:
+            raw_result, changed = future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise ToolTimeoutError(compiled.name, timeout)
+        return self._merge_process_context(raw_result, changed)
+
+    def _merge_process_context(self, raw_result, changed: dict):
+        # context_variables changed in the worker come back as a Result update
+        if not changed:
+            return raw_result
+        result = self.handle_function_result(raw_result, debug=False)
+        result.context_variables = {**changed, **result.context_variables}
+        return result
+
+    async def _cancel_after(self, compiled: CompiledFunction, awaitable, timeout: float):
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            raise ToolTimeoutError(compiled.name, timeout)
+
+    def _with_deadline(self, deadline: Deadline, fn: Callable, *args, **kwargs):
+        """
+        Runs fn, giving up once the deadline passes. The abandoned call keeps
+        running in the background; its result is ignored.
+        """
+        remaining = deadline.remaining()
+        if remaining is None:
+            return fn(*args, **kwargs)
+        if remaining <= 0:
+            raise DeadlineExceeded(f"no time left to run {fn.__name__}")
+        future = run_in_daemon_thread(fn, args, kwargs, name="swarm-deadline")
+        try:
+            return future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise DeadlineExceeded(f"{fn.__name__} did not finish before the deadline")
+
+    def _abandoned_tool_messages(
+        self, tool_calls: List[ChatCompletionMessageToolCall]
+    ) -> List[dict]:
+        # every tool call needs a result for the transcript to stay valid
+        return [
+            self._tool_message(
+                tool_call, "Error: deadline exceeded before the tool finished."
+            )
+            for tool_call in tool_calls
+        ]
+
+    def _tool_message(
+        self, tool_call: ChatCompletionMessageToolCall, content: str
+    ) -> dict:
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "tool_name": tool_call.function.name,
+            "content": content,
+        }
+
+    def _merge_tool_outcomes(
+        self, outcomes: List[Tuple[dict, Optional[Result]]]
+    ) -> Response:
+        # outcomes are in tool_call order, so later calls win on conflicting
+        # context keys and the last handoff is the one that sticks
+        partial_response = Response(
+            messages=[], agent=None, context_variables={})
+        for message, result in outcomes:
+            partial_response.messages.append(message)
+            if result is None:
+                continue
+            partial_response.context_variables.update(result.context_variables)
+            if result.agent:
+                partial_response.agent = result.agent
+        return partial_response
+
     def handle_tool_calls(
         self,
         tool_calls: List[ChatCompletionMessageToolCall],
         functions: List[AgentFunction],
         context_variables: dict,
         debug: bool,
+        parallel: bool = False,
+        started: Optional[dict] = None,
     ) -> Response:
-        function_map = {f.__name__: f for f in functions}
-        partial_response = Response(
-            messages=[], agent=None, context_variables={})
+        """
+        Runs the tool calls of one assistant message. `started` maps positions
+        in `tool_calls` to futures for calls that are already running.
+        """
+        function_map = self._compile_functions(functions).function_map
+        started = started or {}
 
-        for tool_call in tool_calls:
-            name = tool_call.function.name
-            # handle missing tool case, skip to next tool
-            if name not in function_map:
-                debug_print(debug, f"Tool {name} not found in function map.")
-                partial_response.messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "tool_name": name,
-                        "content": f"Error: Tool {name} not found.",
-                    }
+        if parallel and len(tool_calls) > 1:
+            executor = self._get_tool_executor()
+            futures = [
+                started.get(i)
+                or executor.submit(
+                    self._execute_tool_call,
+                    tool_call,
+                    function_map,
+                    context_variables,
+                    debug,
+                )
+                for i, tool_call in enumerate(tool_calls)
+            ]
+            outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [
+                started[i].result()
+                if i in started
+                else self._execute_tool_call(
+                    tool_call, function_map, context_variables, debug
                 )
+                for i, tool_call in enumerate(tool_calls)
+            ]
+
+        return self._merge_tool_outcomes(outcomes)
+
+    def _copy_inputs(
+        self, messages: List, context_variables: Optional[dict], copy_mode: str
+    ) -> Tuple[List, dict]:
+        """
+        Copies the caller's messages and context_variables for a run.
+
+        "deep" copies everything, so the caller's objects are never touched.
+        "shallow" copies only the containers and shares the message dicts and
+        context values. "none" also shares the context_variables dict, so
+        updates made by tools show up in the caller's dict. The history list
+        itself is always a new list, so the caller's transcript is never
+        appended to.
+        """
+        if copy_mode not in __COPY_MODES__:
+            raise ValueError(
+                f"Unknown copy_mode {copy_mode!r}, expected one of {__COPY_MODES__}"
+            )
+        if context_variables is None:
+            context_variables = {}
+        if copy_mode == "deep":
+            return copy.deepcopy(messages), copy.deepcopy(context_variables)
+        if copy_mode == "shallow":
+            return list(messages), dict(context_variables)
+        return list(messages), context_variables
+
+    def _tool_call_objects(
+        self, message: dict
+    ) -> List[ChatCompletionMessageToolCall]:
+        # convert tool_calls to objects
+        return [
+            self._tool_call_object(tool_call)
+            for tool_call in message["tool_calls"] or []
+        ]
+
+    def _tool_call_object(self, tool_call: dict) -> ChatCompletionMessageToolCall:
+        from .types import ChatCompletionMessageToolCall, Function
+
+        function = Function(
+            arguments=tool_call["function"]["arguments"],
+            name=tool_call["function"]["name"],
+        )
+        return ChatCompletionMessageToolCall(
+            id=tool_call["id"], function=function, type=tool_call["type"]
+        )
+
+    def _ready_tool_calls(
+        self, accumulator: StreamAccumulator, started: dict
+    ) -> List[Tuple[int, ChatCompletionMessageToolCall]]:
+        # a streamed tool call is complete once the next one begins or its
+        # arguments parse as a whole object
+        indices = sorted(accumulator.tool_calls)
+        ready = []
+        for position, index in enumerate(indices):
+            if index in started:
                 continue
-            args = json.loads(tool_call.function.arguments)
-            debug_print(
-                debug, f"Processing tool call: {name} with arguments {args}")
-
-            func = function_map[name]
-            # pass context_variables to agent functions
-            if __CTX_VARS_NAME__ in func.__code__.co_varnames:
-                args[__CTX_VARS_NAME__] = context_variables
-            raw_result = function_map[name](**args)
-
-            result: Result = self.handle_function_result(raw_result, debug)
-            partial_response.messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "tool_name": name,
-                    "content": result.value,
-                }
+            if position + 1 < len(indices) or accumulator.arguments_complete(index):
+                tool_call = accumulator.tool_call_dict(index)
+                tool_call["type"] = tool_call["type"] or "function"
+                ready.append((index, self._tool_call_object(tool_call)))
+        return ready
+
+    def _start_ready_tool_calls(
+        self,
+        accumulator: StreamAccumulator,
+        started: dict,
+        agent: Agent,
+        context_variables: dict,
+        debug: bool,
+    ) -> None:
+        function_map = self._compile_functions(agent.functions).function_map
+        for index, tool_call in self._ready_tool_calls(accumulator, started):
+            debug_print(debug, f"Starting {tool_call.function.name} while streaming.")
+            started[index] = self._get_tool_executor().submit(
+                self._execute_tool_call,
+                tool_call,
+                function_map,
+                context_variables,
+                debug,
             )
-            partial_response.context_variables.update(result.context_variables)
-            if result.agent:
-                partial_response.agent = result.agent
 
-        return partial_response
+    def _started_by_position(
+        self, accumulator: StreamAccumulator, started: dict
+    ) -> dict:
+        # handle_tool_calls numbers tool calls by position, not stream index
+        return {
+            position: started[index]
+            for position, index in enumerate(sorted(accumulator.tool_calls))
+            if index in started
+        }
 
     def run_and_stream(
         self,
         agent: Agent,
         messages: List,
-        context_variables: dict = {},
+        context_variables: Optional[dict] = None,
         model_override: str = None,
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        copy_mode: str = "deep",
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
     ):
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
-
-        while len(history) - init_len < max_turns:
-
-            message = {
-                "content": "",
-                "sender": agent.name,
-                "role": "assistant",
-                "function_call": None,
-                "tool_calls": defaultdict(
-                    lambda: {
-                        "function": {"arguments": "", "name": ""},
-                        "id": "",
-                        "type": "",
-                    }
-                ),
-            }
+        history, context_variables = self._copy_inputs(
+            messages, context_variables, copy_mode
+        )
+        return self._run_and_stream(
+            agent,
+            history,
+            context_variables,
+            model_override,
+            debug,
+            max_turns,
+            execute_tools,
+            timeout,
+            turn_timeout,
+        )
+
+    def _run_and_stream(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ):
+        run = _RunState(self, agent, history, context_variables, timeout, turn_timeout)
+
+        while run.turns_left(max_turns):
+            turn_deadline = run.start_turn()
+            if turn_deadline is None:
+                break
+            accumulator = StreamAccumulator()
 
             # get completion with current history, agent
-            completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
-                context_variables=context_variables,
-                model_override=model_override,
-                stream=True,
-                debug=debug,
-            )
+            requested = time.perf_counter()
+            try:
+                completion = self.get_chat_completion(
+                    agent=run.agent,
+                    history=history,
+                    context_variables=context_variables,
+                    model_override=model_override,
+                    stream=True,
+                    debug=debug,
+                    timeout=turn_deadline.remaining(),
+                )
+            except Exception as e:
+                if not run.deadline_passed(e, turn_deadline):
+                    raise
+                break
 
-            yield {"delim": "start"}
-            for chunk in completion:
-                delta = json.loads(chunk.choices[0].delta.json())
-                if delta["role"] == "assistant":
-                    delta["sender"] = active_agent.name
-                yield delta
-                delta.pop("role", None)
-                delta.pop("sender", None)
-                merge_chunk(message, delta)
+            first_token_at = completion_usage = None
+            speculate = (
+                execute_tools
+                and run.agent.speculative_tool_calls
+                and run.agent.parallel_tool_calls
+            )
+            started_tools = {}
+            try:
+                yield {"delim": "start"}
+                for chunk in completion:
+                    if chunk.choices:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        delta = chunk.choices[0].delta
+                        event = accumulator.add(delta, run.agent.name)
+                        if speculate and delta.tool_calls:
+                            self._start_ready_tool_calls(
+                                accumulator,
+                                started_tools,
+                                run.agent,
+                                context_variables,
+                                debug,
+                            )
+                        yield event
+                    if chunk.usage:
+                        completion_usage = chunk.usage
+                    if turn_deadline.expired():
+                        raise DeadlineExceeded("completion stream outlived the deadline")
+            except GeneratorExit:
+                # the consumer stopped; free the request, which may hold a
+                # rate limiter slot, even if no chunk was read yet
+                close_quietly(completion)
+                raise
+            except Exception as e:
+                if not run.deadline_passed(e, turn_deadline):
+                    raise
+                close_quietly(completion)
+                for future in started_tools.values():
+                    future.cancel()
             yield {"delim": "end"}
+            if run.deadline_exceeded:
+                # the partial message is dropped; it may hold half a tool call
+                debug_print(debug, "Deadline exceeded while streaming.")
+                break
+            run.record_completion(requested, completion_usage, first_token_at)
 
-            message["tool_calls"] = list(
-                message.get("tool_calls", {}).values())
-            if not message["tool_calls"]:
-                message["tool_calls"] = None
+            message = accumulator.message(run.agent.name)
+            tool_calls = self._tool_call_objects(message)
             debug_print(debug, "Received completion:", message)
             history.append(message)
 
-            if not message["tool_calls"] or not execute_tools:
+            if not tool_calls or not execute_tools:
                 debug_print(debug, "Ending turn.")
                 break
 
-            # convert tool_calls to objects
-            tool_calls = []
-            for tool_call in message["tool_calls"]:
-                function = Function(
-                    arguments=tool_call["function"]["arguments"],
-                    name=tool_call["function"]["name"],
-                )
-                tool_call_object = ChatCompletionMessageToolCall(
-                    id=tool_call["id"], function=function, type=tool_call["type"]
+            # handle function calls, updating context_variables, and switching agents
+            tools_started = time.perf_counter()
+            try:
+                partial_response = self._with_deadline(
+                    turn_deadline,
+                    self.handle_tool_calls,
+                    tool_calls,
+                    run.agent.functions,
+                    context_variables,
+                    debug,
+                    parallel=run.agent.parallel_tool_calls,
+                    started=self._started_by_position(accumulator, started_tools),
                 )
-                tool_calls.append(tool_call_object)
+            except DeadlineExceeded:
+                run.abandon_tools(tool_calls, debug)
+                break
+            run.apply_tool_results(partial_response, tools_started)
 
-            # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                tool_calls, active_agent.functions, context_variables, debug
-            )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
-
-        yield {
-            "response": Response(
-                messages=history[init_len:],
-                agent=active_agent,
-                context_variables=context_variables,
-            )
-        }
+        yield {"response": run.response()}
 
     def run(
         self,
         agent: Agent,
         messages: List,
-        context_variables: dict = {},
+        context_variables: Optional[dict] = None,
         model_override: str = None,
         stream: bool = False,
         debug: bool = False,
         max_turns: int = float("inf"),
         execute_tools: bool = True,
+        copy_mode: str = "deep",
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
     ) -> Response:
         if stream:
             return self.run_and_stream(
@@ -248,26 +1066,707 @@ class Swarm:
                 debug=debug,
                 max_turns=max_turns,
                 execute_tools=execute_tools,
+                copy_mode=copy_mode,
+                timeout=timeout,
+                turn_timeout=turn_timeout,
+            )
+        history, context_variables = self._copy_inputs(
+            messages, context_variables, copy_mode
+        )
+        return self._run(
+            agent,
+            history,
+            context_variables,
+            model_override,
+            debug,
+            max_turns,
+            execute_tools,
+            timeout,
+            turn_timeout,
+        )
+
+    def _run(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ) -> Response:
+        run = _RunState(self, agent, history, context_variables, timeout, turn_timeout)
+
+        while run.turns_left(max_turns) and run.agent:
+            turn_deadline = run.start_turn()
+            if turn_deadline is None:
+                break
+
+            # get completion with current history, agent
+            requested = time.perf_counter()
+            try:
+                completion = self.get_chat_completion(
+                    agent=run.agent,
+                    history=history,
+                    context_variables=context_variables,
+                    model_override=model_override,
+                    stream=False,
+                    debug=debug,
+                    timeout=turn_deadline.remaining(),
+                )
+            except Exception as e:
+                if not run.deadline_passed(e, turn_deadline):
+                    raise
+                debug_print(debug, "Deadline exceeded waiting for a completion.")
+                break
+            run.record_completion(requested, getattr(completion, "usage", None))
+            message = completion.choices[0].message
+            debug_print(debug, "Received completion:", message)
+            message.sender = run.agent.name
+            history.append(
+                json.loads(message.model_dump_json())
+            )  # to avoid OpenAI types (?)
+
+            if not message.tool_calls or not execute_tools:
+                debug_print(debug, "Ending turn.")
+                break
+
+            # handle function calls, updating context_variables, and switching agents
+            tools_started = time.perf_counter()
+            try:
+                partial_response = self._with_deadline(
+                    turn_deadline,
+                    self.handle_tool_calls,
+                    message.tool_calls,
+                    run.agent.functions,
+                    context_variables,
+                    debug,
+                    parallel=run.agent.parallel_tool_calls,
+                )
+            except DeadlineExceeded:
+                run.abandon_tools(message.tool_calls, debug)
+                break
+            run.apply_tool_results(partial_response, tools_started)
+
+        return run.response()
+
+    def _run_job(
+        self, index: int, job: dict, limiter: Optional[StartRateLimiter]
+    ) -> BatchResult:
+        if limiter:
+            limiter.wait()
+        try:
+            response = self.run(**{**job, "stream": False})
+        except Exception as e:
+            return BatchResult(index=index, job=job, error=e)
+        return BatchResult(index=index, job=job, response=response)
+
+    def run_many(
+        self,
+        jobs: Iterable[dict],
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Iterator[BatchResult]:
+        """
+        Runs many independent conversations on a thread pool and yields a
+        BatchResult for each as soon as it finishes.
+
+        Args:
+            jobs: Keyword arguments for run(), one dict per conversation.
+            max_concurrency: How many runs may be in flight at once.
+            rate_limit: Max runs started per second, if set.
+            on_progress: Called as on_progress(done, total, result) after
+                each job; total is None when jobs has no len().
+
+        A failing job yields a BatchResult with `error` set and does not
+        affect the others.
+        """
+        total = len(jobs) if hasattr(jobs, "__len__") else None
+        limiter = StartRateLimiter(rate_limit) if rate_limit else None
+        pending_jobs = enumerate(jobs)
+        done_count = 0
+
+        executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="swarm-batch"
+        )
+        in_flight = set()
+        try:
+            while True:
+                # keep the window full without queueing every job up front
+                for index, job in pending_jobs:
+                    in_flight.add(executor.submit(self._run_job, index, job, limiter))
+                    if len(in_flight) >= max_concurrency:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    done_count += 1
+                    if on_progress:
+                        on_progress(done_count, total, result)
+                    yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+
+class AsyncSwarm(Swarm):
+    """
+    Asyncio variant of Swarm built on AsyncOpenAI.
+
+    `run` is a coroutine and `run_and_stream` is an async generator; apart
+    from that the loop behaves exactly like the synchronous Swarm.
+    """
+
+    def __init__(self, client=None, **kwargs):
+        super().__init__(client=client, **kwargs)
+
+    def _default_client(self):
+        # resolved on each use (see the client property), not up front
+        return None
+
+    @property
+    def client(self):
+        # without a client of its own, an AsyncSwarm (even one made at import
+        # time) uses the shared client of the event loop running it
+        if self._client is None:
+            return get_async_client()
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+
+    def session(self, agent: Agent, **kwargs) -> AsyncSession:
+        return AsyncSession(self, agent, **kwargs)
+
+    async def warm_up(self, connections: int = 1) -> int:
+        return await awarm_up(self.client, connections)
+
+    async def get_chat_completion(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        stream: bool,
+        debug: bool,
+        timeout: Optional[float] = None,
+    ) -> ChatCompletionMessage:
+        build = functools.partial(
+            self._create_params,
+            agent, history, context_variables, model_override, stream, debug,
+        )
+        if self.history_policy is None:
+            create_params = build()
+        else:
+            # a policy may block, e.g. on a model call to summarize
+            loop = asyncio.get_running_loop()
+            create_params = await loop.run_in_executor(self._get_tool_executor(), build)
+        if timeout is not None:
+            create_params["timeout"] = timeout
+        hedge_policy = agent.hedge_policy or self.hedge_policy
+        if self.cache is None:
+            return await self._shared_completion(create_params, hedge_policy)
+
+        key = completion_cache_key(create_params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            debug_print(debug, "Completion cache hit:", key)
+            if stream:
+                return areplay_chunks(cached, create_params["model"])
+            return replay_completion(cached, create_params["model"])
+
+        completion = await self._shared_completion(create_params, hedge_policy, key)
+        if stream:
+            return arecord_stream(completion, functools.partial(self.cache.set, key))
+        self.cache.set(key, completion.choices[0].message.model_dump(mode="json"))
+        return completion
+
+    async def _shared_completion(
+        self,
+        create_params: dict,
+        hedge_policy: Optional[HedgePolicy] = None,
+        key: Optional[str] = None,
+    ):
+        if self.single_flight is None:
+            return await self._request_completion(create_params, hedge_policy)
+        return await self.single_flight.acall(
+            key or completion_cache_key(create_params),
+            create_params["stream"],
+            lambda: self._request_completion(create_params, hedge_policy),
+            timeout=create_params.get("timeout"),
+        )
+
+    async def _request_completion(
+        self, create_params: dict, hedge_policy: Optional[HedgePolicy] = None
+    ):
+        if self.retry_policy is None:
+            return await self._create_completion(create_params, hedge_policy)
+        deadline = Deadline(create_params.get("timeout"))
+
+        async def attempt():
+            params = create_params
+            if deadline.expires_at is not None:
+                params = {**create_params, "timeout": deadline.remaining()}
+            return await self._create_completion(params, hedge_policy)
+
+        return await self.retry_policy.acall(attempt, deadline=deadline)
+
+    async def _create_completion(
+        self, create_params: dict, hedge_policy: Optional[HedgePolicy] = None
+    ):
+        if hedge_policy is None:
+            return await self._send_completion(create_params)
+        return await self._hedged_completion(create_params, hedge_policy)
+
+    async def _first_response(self, create_params: dict):
+        completion = await self._send_completion(create_params)
+        if not create_params["stream"]:
+            return completion
+        rest = completion.__aiter__()
+        try:
+            first = await rest.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except asyncio.CancelledError:
+            await aclose_quietly(completion)
+            raise
+        return AsyncPrefetchedStream(first, rest, completion)
+
+    async def _hedged_completion(self, create_params: dict, policy: HedgePolicy):
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._first_response(create_params))
+        done, _ = await asyncio.wait([primary], timeout=policy.current_delay())
+        winner = primary
+        if not done:
+            hedge = asyncio.ensure_future(
+                self._first_response(policy.hedge_params(create_params))
+            )
+            done, _ = await asyncio.wait(
+                [primary, hedge], return_when=asyncio.FIRST_COMPLETED
+            )
+            winner = primary if primary in done else hedge
+            loser = hedge if winner is primary else primary
+            if winner.exception() is not None:
+                # the other request may still succeed
+                await asyncio.wait([loser])
+                if loser.exception() is None:
+                    winner, loser = loser, winner
+            if loser.done():
+                if not loser.cancelled() and loser.exception() is None:
+                    await aclose_quietly(loser.result())
+            else:
+                loser.cancel()
+            policy.record_hedge(won=winner is hedge)
+        result = winner.result()
+        policy.record_latency(time.monotonic() - start)
+        return result
+
+    async def _send_completion(self, create_params: dict):
+        if self.rate_limiter is None:
+            return await self.client.chat.completions.create(**create_params)
+
+        estimated = estimate_request_tokens(create_params)
+        await self.rate_limiter.aacquire(estimated)
+        try:
+            raw = await self.client.chat.completions.with_raw_response.create(
+                **create_params
+            )
+            completion = raw.parse()
+        except BaseException as e:
+            self.rate_limiter.release(e)
+            raise
+        if create_params["stream"]:
+            return AsyncLimitedStream(completion, self.rate_limiter, estimated, raw.headers)
+        self.rate_limiter.release(headers=raw.headers)
+        usage = getattr(completion, "usage", None)
+        self.rate_limiter.record_usage(estimated, getattr(usage, "total_tokens", None))
+        return completion
+
+    async def _aexecute_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        function_map: dict,
+        context_variables: dict,
+        debug: bool,
+    ) -> Tuple[dict, Optional[Result]]:
+        compiled, args = self._prepare_tool_call(
+            tool_call, function_map, context_variables, debug
+        )
+        if compiled is None:
+            return self._missing_tool_outcome(tool_call)
+        if not self.observers:
+            return await self._arun_tool_call(tool_call, compiled, args, debug)
+
+        started = self._tool_started(tool_call)
+        try:
+            outcome = await self._arun_tool_call(tool_call, compiled, args, debug)
+        except Exception as e:
+            self._tool_ended(tool_call, started, None, e)
+            raise
+        self._tool_ended(tool_call, started, outcome[0], None)
+        return outcome
+
+    async def _arun_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        compiled: CompiledFunction,
+        args: dict,
+        debug: bool,
+    ) -> Tuple[dict, Optional[Result]]:
+        try:
+            raw_result = await self._acall_function(compiled, args)
+        except ToolTimeoutError as e:
+            return self._timed_out_outcome(tool_call, e, debug)
+        return self._tool_outcome(tool_call, raw_result, debug)
+
+    async def _acall_function(self, compiled: CompiledFunction, args: dict):
+        timeout = self._timeout_for(compiled)
+
+        async def call():
+            if compiled.in_process:
+                loop = asyncio.get_running_loop()
+                raw_result, changed = await loop.run_in_executor(
+                    self._get_process_executor(),
+                    functools.partial(
+                        call_in_process, compiled.func, self._process_args(args)
+                    ),
+                )
+                return self._merge_process_context(raw_result, changed)
+            if compiled.is_coroutine:
+                raw_result = compiled.func(**args)
+            elif timeout is not None:
+                # may be abandoned, so it must not take a tool executor worker
+                raw_result = await asyncio.wrap_future(
+                    run_in_daemon_thread(
+                        compiled.func, kwargs=args, name=f"swarm-tool-{compiled.name}"
+                    )
+                )
+            else:
+                # a blocking function on the loop would stall every other run
+                loop = asyncio.get_running_loop()
+                raw_result = await loop.run_in_executor(
+                    self._get_tool_executor(),
+                    functools.partial(compiled.func, **args),
+                )
+            if inspect.isawaitable(raw_result):
+                raw_result = await raw_result
+            return raw_result
+
+        if timeout is not None:
+            untimed = call
+
+            async def call():
+                return await self._cancel_after(compiled, untimed(), timeout)
+
+        invoke = call
+        if self.retry_policy is not None and self.retry_policy.tool_errors:
+            invoke = functools.partial(
+                self.retry_policy.acall, call, self.retry_policy.is_retryable_tool_error
             )
-        active_agent = agent
-        context_variables = copy.deepcopy(context_variables)
-        history = copy.deepcopy(messages)
-        init_len = len(messages)
+        if compiled.cache is None:
+            return await invoke()
+        raw_result, outcome = await compiled.cache.acall(args, invoke)
+        if self.observers:
+            self._notify("on_tool_cache", compiled.name, outcome)
+        return raw_result
 
-        while len(history) - init_len < max_turns and active_agent:
+    def _start_ready_tool_calls(
+        self,
+        accumulator: StreamAccumulator,
+        started: dict,
+        agent: Agent,
+        context_variables: dict,
+        debug: bool,
+    ) -> None:
+        function_map = self._compile_functions(agent.functions).function_map
+        for index, tool_call in self._ready_tool_calls(accumulator, started):
+            debug_print(debug, f"Starting {tool_call.function.name} while streaming.")
+            started[index] = asyncio.ensure_future(
+                self._aexecute_tool_call(
+                    tool_call, function_map, context_variables, debug
+                )
+            )
+
+    async def _await_with_deadline(self, deadline: Deadline, awaitable):
+        remaining = deadline.remaining()
+        if remaining is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("did not finish before the deadline")
+
+    async def handle_tool_calls(
+        self,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        functions: List[AgentFunction],
+        context_variables: dict,
+        debug: bool,
+        parallel: bool = False,
+        started: Optional[dict] = None,
+    ) -> Response:
+        function_map = self._compile_functions(functions).function_map
+        started = started or {}
+
+        if parallel and len(tool_calls) > 1:
+            outcomes = await asyncio.gather(
+                *(
+                    started.get(i)
+                    or self._aexecute_tool_call(
+                        tool_call,
+                        function_map,
+                        context_variables,
+                        debug,
+                    )
+                    for i, tool_call in enumerate(tool_calls)
+                )
+            )
+        else:
+            outcomes = [
+                await started[i]
+                if i in started
+                else await self._aexecute_tool_call(
+                    tool_call, function_map, context_variables, debug
+                )
+                for i, tool_call in enumerate(tool_calls)
+            ]
+
+        return self._merge_tool_outcomes(outcomes)
+
+    def run_and_stream(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: Optional[dict] = None,
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        copy_mode: str = "deep",
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ):
+        history, context_variables = self._copy_inputs(
+            messages, context_variables, copy_mode
+        )
+        return self._run_and_stream(
+            agent,
+            history,
+            context_variables,
+            model_override,
+            debug,
+            max_turns,
+            execute_tools,
+            timeout,
+            turn_timeout,
+        )
+
+    async def _run_and_stream(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ):
+        run = _RunState(self, agent, history, context_variables, timeout, turn_timeout)
+
+        while run.turns_left(max_turns):
+            turn_deadline = run.start_turn()
+            if turn_deadline is None:
+                break
+            accumulator = StreamAccumulator()
 
             # get completion with current history, agent
-            completion = self.get_chat_completion(
-                agent=active_agent,
-                history=history,
+            requested = time.perf_counter()
+            try:
+                completion = await self._await_with_deadline(
+                    turn_deadline,
+                    self.get_chat_completion(
+                        agent=run.agent,
+                        history=history,
+                        context_variables=context_variables,
+                        model_override=model_override,
+                        stream=True,
+                        debug=debug,
+                        timeout=turn_deadline.remaining(),
+                    ),
+                )
+            except Exception as e:
+                if not run.deadline_passed(e, turn_deadline):
+                    raise
+                break
+
+            first_token_at = completion_usage = None
+            speculate = (
+                execute_tools
+                and run.agent.speculative_tool_calls
+                and run.agent.parallel_tool_calls
+            )
+            started_tools = {}
+            try:
+                yield {"delim": "start"}
+                async for chunk in completion:
+                    if chunk.choices:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        delta = chunk.choices[0].delta
+                        event = accumulator.add(delta, run.agent.name)
+                        if speculate and delta.tool_calls:
+                            self._start_ready_tool_calls(
+                                accumulator,
+                                started_tools,
+                                run.agent,
+                                context_variables,
+                                debug,
+                            )
+                        yield event
+                    if chunk.usage:
+                        completion_usage = chunk.usage
+                    if turn_deadline.expired():
+                        raise DeadlineExceeded("completion stream outlived the deadline")
+            except (GeneratorExit, asyncio.CancelledError):
+                await aclose_quietly(completion)
+                raise
+            except Exception as e:
+                if not run.deadline_passed(e, turn_deadline):
+                    raise
+                await aclose_quietly(completion)
+                for task in started_tools.values():
+                    task.cancel()
+            yield {"delim": "end"}
+            if run.deadline_exceeded:
+                # the partial message is dropped; it may hold half a tool call
+                debug_print(debug, "Deadline exceeded while streaming.")
+                break
+            run.record_completion(requested, completion_usage, first_token_at)
+
+            message = accumulator.message(run.agent.name)
+            tool_calls = self._tool_call_objects(message)
+            debug_print(debug, "Received completion:", message)
+            history.append(message)
+
+            if not tool_calls or not execute_tools:
+                debug_print(debug, "Ending turn.")
+                break
+
+            # handle function calls, updating context_variables, and switching agents
+            tools_started = time.perf_counter()
+            try:
+                partial_response = await self._await_with_deadline(
+                    turn_deadline,
+                    self.handle_tool_calls(
+                        tool_calls,
+                        run.agent.functions,
+                        context_variables,
+                        debug,
+                        parallel=run.agent.parallel_tool_calls,
+                        started=self._started_by_position(accumulator, started_tools),
+                    ),
+                )
+            except DeadlineExceeded:
+                run.abandon_tools(tool_calls, debug)
+                break
+            run.apply_tool_results(partial_response, tools_started)
+
+        yield {"response": run.response()}
+
+    async def run(
+        self,
+        agent: Agent,
+        messages: List,
+        context_variables: Optional[dict] = None,
+        model_override: str = None,
+        stream: bool = False,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        copy_mode: str = "deep",
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ) -> Response:
+        if stream:
+            return self.run_and_stream(
+                agent=agent,
+                messages=messages,
                 context_variables=context_variables,
                 model_override=model_override,
-                stream=stream,
                 debug=debug,
+                max_turns=max_turns,
+                execute_tools=execute_tools,
+                copy_mode=copy_mode,
+                timeout=timeout,
+                turn_timeout=turn_timeout,
             )
+        history, context_variables = self._copy_inputs(
+            messages, context_variables, copy_mode
+        )
+        return await self._run(
+            agent,
+            history,
+            context_variables,
+            model_override,
+            debug,
+            max_turns,
+            execute_tools,
+            timeout,
+            turn_timeout,
+        )
+
+    async def _run(
+        self,
+        agent: Agent,
+        history: List,
+        context_variables: dict,
+        model_override: str,
+        debug: bool,
+        max_turns: int,
+        execute_tools: bool,
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ) -> Response:
+        run = _RunState(self, agent, history, context_variables, timeout, turn_timeout)
+
+        while run.turns_left(max_turns) and run.agent:
+            turn_deadline = run.start_turn()
+            if turn_deadline is None:
+                break
+
+            # get completion with current history, agent
+            requested = time.perf_counter()
+            try:
+                completion = await self._await_with_deadline(
+                    turn_deadline,
+                    self.get_chat_completion(
+                        agent=run.agent,
+                        history=history,
+                        context_variables=context_variables,
+                        model_override=model_override,
+                        stream=False,
+                        debug=debug,
+                        timeout=turn_deadline.remaining(),
+                    ),
+                )
+            except Exception as e:
+                if not run.deadline_passed(e, turn_deadline):
+                    raise
+                debug_print(debug, "Deadline exceeded waiting for a completion.")
+                break
+            run.record_completion(requested, getattr(completion, "usage", None))
             message = completion.choices[0].message
             debug_print(debug, "Received completion:", message)
-            message.sender = active_agent.name
+            message.sender = run.agent.name
             history.append(
                 json.loads(message.model_dump_json())
             )  # to avoid OpenAI types (?)
@@ -277,16 +1776,72 @@ class Swarm:
                 break
 
             # handle function calls, updating context_variables, and switching agents
-            partial_response = self.handle_tool_calls(
-                message.tool_calls, active_agent.functions, context_variables, debug
-            )
-            history.extend(partial_response.messages)
-            context_variables.update(partial_response.context_variables)
-            if partial_response.agent:
-                active_agent = partial_response.agent
-
-        return Response(
-            messages=history[init_len:],
-            agent=active_agent,
-            context_variables=context_variables,
-        )
+            tools_started = time.perf_counter()
+            try:
+                partial_response = await self._await_with_deadline(
+                    turn_deadline,
+                    self.handle_tool_calls(
+                        message.tool_calls,
+                        run.agent.functions,
+                        context_variables,
+                        debug,
+                        parallel=run.agent.parallel_tool_calls,
+                    ),
+                )
+            except DeadlineExceeded:
+                run.abandon_tools(message.tool_calls, debug)
+                break
+            run.apply_tool_results(partial_response, tools_started)
+
+        return run.response()
+
+    async def _run_job(
+        self, index: int, job: dict, limiter: Optional[StartRateLimiter]
+    ) -> BatchResult:
+        if limiter:
+            await limiter.await_slot()
+        try:
+            response = await self.run(**{**job, "stream": False})
+        except Exception as e:
+            return BatchResult(index=index, job=job, error=e)
+        return BatchResult(index=index, job=job, response=response)
+
+    async def run_many(
+        self,
+        jobs: Iterable[dict],
+        max_concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Async generator counterpart of Swarm.run_many; runs the jobs as tasks
+        on the current event loop.
+        """
+        total = len(jobs) if hasattr(jobs, "__len__") else None
+        limiter = StartRateLimiter(rate_limit) if rate_limit else None
+        pending_jobs = enumerate(jobs)
+        done_count = 0
+
+        in_flight = set()
+        try:
+            while True:
+                for index, job in pending_jobs:
+                    in_flight.add(
+                        asyncio.ensure_future(self._run_job(index, job, limiter))
+                    )
+                    if len(in_flight) >= max_concurrency:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    result = task.result()
+                    done_count += 1
+                    if on_progress:
+                        on_progress(done_count, total, result)
+                    yield result
+        finally:
+            for task in in_flight:
+                task.cancel()
@@ -0,0 +1,140 @@
+# Standard library imports
+import threading
+from collections import deque
+from typing import Optional
+
+
+class HedgePolicy:
+    """
+    Fires a duplicate completion request when the first one is slow, and
+    uses whichever answers first.
+
+    A request counts as answered once a non-streamed response arrives or a
+    streamed response produces its first chunk. The hedge delay is the
+    `percentile` of recently observed latencies, or `initial_delay` until
+    `min_samples` latencies have been seen; pass `delay` to fix it instead.
+    The duplicate can go to `fallback_model`. The losing request is
+    cancelled (async) or closed as soon as it returns (sync).
+
+    Set on an Agent (`Agent(hedge_policy=...)`) or as the Swarm default.
+
+    Attributes:
+        hedges_fired (int): Duplicate requests sent so far.
+        hedges_won (int): Times the duplicate answered first.
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: float = 0.95,
+        initial_delay: float = 2.0,
+        min_samples: int = 20,
+        window: int = 200,
+        fallback_model: Optional[str] = None,
+    ):
+        if not 0 < percentile <= 1:
+            raise ValueError(f"percentile must be in (0, 1], got {percentile}")
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.fallback_model = fallback_model
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def current_delay(self) -> float:
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return ordered[index]
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def record_hedge(self, won: bool) -> None:
+        with self._lock:
+            self.hedges_fired += 1
+            if won:
+                self.hedges_won += 1
+
+    def hedge_params(self, create_params: dict) -> dict:
+        if self.fallback_model:
+            return {**create_params, "model": self.fallback_model}
+        return create_params
+
+
+class PrefetchedStream:
+    """
+    A completion stream whose first chunk has already been read. Iterating
+    yields that chunk and then the rest; `close` closes the source stream.
+    """
+
+    def __init__(self, first, rest, source):
+        self.first = first
+        self.rest = rest
+        self.source = source
+
+    def __iter__(self):
+        try:
+            if self.first is not None:
+                yield self.first
+            yield from self.rest
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        close = getattr(self.source, "close", None)
+        if close:
+            close()
+
+
+class AsyncPrefetchedStream(PrefetchedStream):
+    async def _iterate(self):
+        try:
+            if self.first is not None:
+                yield self.first
+            async for chunk in self.rest:
+                yield chunk
+        finally:
+            await self.aclose()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def aclose(self) -> None:
+        await aclose_quietly(self.source)
+
+
+def close_quietly(result) -> None:
+    """Closes an abandoned completion stream, ignoring errors."""
+    close = getattr(result, "close", None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def discard_future(future) -> None:
+    """Done-callback for the losing request: closes its stream if it got one."""
+    if not future.cancelled() and future.exception() is None:
+        close_quietly(future.result())
+
+
+async def aclose_quietly(result) -> None:
+    """Async counterpart of close_quietly; handles aclose() and async close()."""
+    close = getattr(result, "aclose", None) or getattr(result, "close", None)
+    if close:
+        try:
+            closed = close()
+            if hasattr(closed, "__await__"):
+                await closed
+        except Exception:
+            pass
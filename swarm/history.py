@@ -0,0 +1,213 @@
+# Standard library imports
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+# Local imports
+from .util import debug_print
+
+
+def estimate_tokens(message: dict) -> int:
+    """
+    Cheap token estimate for a message (about four characters per token),
+    good enough for keeping a prompt under budget without a tokenizer.
+    """
+    chars = len(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        chars += len(function.get("name") or "") + len(function.get("arguments") or "")
+    return chars // 4 + 4
+
+
+def _align_start(history: List[dict], start: int) -> int:
+    # never start on a tool result whose assistant tool call was cut off
+    aligned = start
+    while aligned < len(history) and history[aligned].get("role") == "tool":
+        aligned += 1
+    if aligned < len(history):
+        return aligned
+    # the window holds nothing but tool results: those are what the model
+    # answers next, so reach back to the assistant message that asked for them
+    while 0 < start < len(history) and history[start].get("role") == "tool":
+        start -= 1
+    return start
+
+
+class HistoryPolicy:
+    """
+    Decides which part of the history is sent to the model on each turn.
+    Policies return a new list and never modify the history they're given,
+    so the full transcript is still returned in the Response.
+    """
+
+    def apply(self, history: List[dict]) -> List[dict]:
+        return history
+
+
+class HistoryPolicyChain(HistoryPolicy):
+    """Applies several policies in order."""
+
+    def __init__(self, policies: List[HistoryPolicy]):
+        self.policies = list(policies)
+
+    def apply(self, history: List[dict]) -> List[dict]:
+        for policy in self.policies:
+            history = policy.apply(history)
+        return history
+
+
+class MessageWindow(HistoryPolicy):
+    """Keeps only the most recent `max_messages` messages."""
+
+    def __init__(self, max_messages: int):
+        self.max_messages = max_messages
+
+    def apply(self, history: List[dict]) -> List[dict]:
+        if len(history) <= self.max_messages:
+            return history
+        start = _align_start(history, len(history) - self.max_messages)
+        return history[start:]
+
+
+class TokenWindow(HistoryPolicy):
+    """
+    Keeps the most recent messages that fit in `max_tokens`. The latest
+    message is always kept, even if it alone is over budget.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        count_tokens: Callable[[dict], int] = estimate_tokens,
+    ):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+
+    def apply(self, history: List[dict]) -> List[dict]:
+        total = 0
+        start = len(history)
+        while start > 0:
+            total += self.count_tokens(history[start - 1])
+            if total > self.max_tokens and start < len(history):
+                break
+            start -= 1
+        if start == 0:
+            return history
+        return history[_align_start(history, start):]
+
+
+class TruncateToolOutputs(HistoryPolicy):
+    """
+    Shortens tool results longer than `max_chars`, except in the last
+    `keep_recent` messages, which the model is most likely still using.
+    """
+
+    def __init__(self, max_chars: int = 2000, keep_recent: int = 4):
+        self.max_chars = max_chars
+        self.keep_recent = keep_recent
+
+    def apply(self, history: List[dict]) -> List[dict]:
+        cutoff = max(len(history) - self.keep_recent, 0)
+        truncated = list(history)
+        for i in range(cutoff):
+            message = history[i]
+            content = message.get("content")
+            if message.get("role") != "tool" or not isinstance(content, str):
+                continue
+            if len(content) > self.max_chars:
+                dropped = len(content) - self.max_chars
+                truncated[i] = {
+                    **message,
+                    "content": f"{content[:self.max_chars]}... [truncated {dropped} characters]",
+                }
+        return truncated
+
+
+class SummarizeOldTurns(HistoryPolicy):
+    """
+    Replaces everything but the last `keep_recent` messages with a summary
+    once the history grows past `max_messages`.
+
+    `summarize` receives the messages to condense and returns the summary
+    text; it is usually a call to a cheap model. Compaction happens in
+    batches: the summary is reused, with the messages after it sent as
+    they are, until those grow past `max_messages` again. Then the old
+    summary and the messages dropped since are summarized together.
+    Summaries are remembered per conversation (by a digest of the messages
+    they cover), for the `max_summaries` most recent conversations, so one
+    policy can serve many sessions.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[List[dict]], str],
+        max_messages: int = 40,
+        keep_recent: int = 20,
+        max_summaries: int = 1024,
+        debug: bool = False,
+    ):
+        if keep_recent >= max_messages:
+            raise ValueError("keep_recent must be smaller than max_messages")
+        self.summarize = summarize
+        self.max_messages = max_messages
+        self.keep_recent = keep_recent
+        self.max_summaries = max_summaries
+        self.debug = debug
+        self._summaries = OrderedDict()  # digest of the covered prefix -> summary
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prefix_digests(messages: List[dict]) -> List[str]:
+        # digests[i] identifies messages[:i + 1]
+        running = hashlib.sha256()
+        digests = []
+        for message in messages:
+            running.update(json.dumps(message, sort_keys=True, default=str).encode())
+            digests.append(running.copy().hexdigest())
+        return digests
+
+    @staticmethod
+    def _summary_message(summary: str) -> dict:
+        return {
+            "role": "system",
+            "content": f"Summary of the earlier conversation: {summary}",
+        }
+
+    def _latest_summary(self, digests: List[str]) -> Tuple[int, Optional[str]]:
+        # (messages covered, summary) for the longest summarized prefix
+        with self._lock:
+            for covered in range(len(digests), 0, -1):
+                summary = self._summaries.get(digests[covered - 1])
+                if summary is not None:
+                    self._summaries.move_to_end(digests[covered - 1])
+                    return covered, summary
+        return 0, None
+
+    def apply(self, history: List[dict]) -> List[dict]:
+        if len(history) <= self.max_messages:
+            return history
+        digests = self._prefix_digests(history)
+        covered, summary = self._latest_summary(digests)
+        cut = _align_start(history, len(history) - self.keep_recent)
+        if summary is not None and (
+            len(history) - covered <= self.max_messages or cut <= covered
+        ):
+            return [self._summary_message(summary)] + history[covered:]
+        if cut == 0:
+            return history
+
+        if summary is None:
+            debug_print(self.debug, f"Summarizing {cut} messages.")
+            summary = self.summarize(history[:cut])
+        else:
+            debug_print(self.debug, f"Extending summary past {covered} messages.")
+            summary = self.summarize(
+                [self._summary_message(summary)] + history[covered:cut]
+            )
+        with self._lock:
+            self._summaries[digests[cut - 1]] = summary
+            while len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+        return [self._summary_message(summary)] + history[cut:]
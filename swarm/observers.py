@@ -0,0 +1,122 @@
+# Standard library imports
+import threading
+from typing import Any, Optional
+
+# Local imports
+from .types import Agent, Response
+
+
+class SwarmObserver:
+    """
+    Receives events from the Swarm loop. Subclass it and override the hooks
+    you need; the rest do nothing. Pass observers as `Swarm(observers=[...])`.
+
+    Hooks are called synchronously on the thread (or event loop) running the
+    loop, so they should be quick. Tool hooks run on the tool executor's
+    threads when tool calls run in parallel. Times are in seconds.
+    """
+
+    def on_turn_start(self, agent: Agent, turn: int) -> None:
+        pass
+
+    def on_completion(
+        self,
+        agent: Agent,
+        latency: float,
+        time_to_first_token: Optional[float],
+        usage: Optional[Any],
+    ) -> None:
+        """
+        Called when a completion has been fully received. `time_to_first_token`
+        is only known for streamed completions; `usage` is the CompletionUsage
+        reported by the API, if any.
+        """
+
+    def on_tool_start(self, name: str, tool_call_id: str) -> None:
+        pass
+
+    def on_tool_end(
+        self,
+        name: str,
+        tool_call_id: str,
+        duration: float,
+        result_size: int,
+        error: Optional[BaseException],
+    ) -> None:
+        """`result_size` is the length of the tool message content."""
+
+    def on_tool_cache(self, name: str, outcome: str) -> None:
+        """
+        Called for each call to a @cacheable function; `outcome` is "hit",
+        "miss" or "shared" (waited for an identical call in flight).
+        """
+
+    def on_handoff(self, from_agent: Agent, to_agent: Agent) -> None:
+        pass
+
+    def on_run_end(self, response: Response, duration: float) -> None:
+        pass
+
+
+class RunProfiler(SwarmObserver):
+    """
+    Adds up where run time goes: waiting for the model, running tools, and
+    everything else (`overhead`).
+
+    Tool time is the sum of tool durations, so with parallel tool calls it
+    can exceed the wall time they took and overhead can come out negative.
+
+    Attributes:
+        runs (int): Runs finished.
+        turns (int): Turns started.
+        run_time (float): Total run time.
+        model_time (float): Time spent waiting for completions.
+        tool_time (float): Time spent in agent functions.
+        prompt_tokens (int): Prompt tokens reported by the API.
+        completion_tokens (int): Completion tokens reported by the API.
+        tool_cache (dict): Counts of @cacheable outcomes ("hit", "miss",
+            "shared").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.runs = 0
+            self.turns = 0
+            self.run_time = 0.0
+            self.model_time = 0.0
+            self.tool_time = 0.0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.tool_cache = {"hit": 0, "miss": 0, "shared": 0}
+
+    @property
+    def overhead(self) -> float:
+        return self.run_time - self.model_time - self.tool_time
+
+    def on_turn_start(self, agent, turn):
+        with self._lock:
+            self.turns += 1
+
+    def on_completion(self, agent, latency, time_to_first_token, usage):
+        with self._lock:
+            self.model_time += latency
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens or 0
+                self.completion_tokens += usage.completion_tokens or 0
+
+    def on_tool_end(self, name, tool_call_id, duration, result_size, error):
+        with self._lock:
+            self.tool_time += duration
+
+    def on_tool_cache(self, name, outcome):
+        with self._lock:
+            self.tool_cache[outcome] += 1
+
+    def on_run_end(self, response, duration):
+        with self._lock:
+            self.runs += 1
+            self.run_time += duration
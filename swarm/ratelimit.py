@@ -0,0 +1,415 @@
+# Standard library imports
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Mapping, Optional
+
+# Local imports
+from .hedging import aclose_quietly, close_quietly
+from .history import estimate_tokens
+from .retry import Deadline, DeadlineExceeded
+
+_shared_limiters: Dict[str, "RateLimiter"] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens per minute and
+    holding at most `capacity` (a full minute's worth by default).
+
+    `reserve` takes the tokens immediately, possibly going into debt, and
+    returns how long the caller has to wait before using them. Callers are
+    therefore served in arrival order rather than racing for each refill.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        if per_minute <= 0:
+            raise ValueError(f"per_minute must be positive, got {per_minute}")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(
+            self.capacity, self._level + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._level -= amount
+            return max(0.0, -self._level / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Adds (or, if negative, takes) tokens without waiting."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self.capacity, self._level + amount)
+
+    def cap(self, amount: float) -> None:
+        """Holds at most `amount` tokens right now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self._level, amount)
+
+    def drain(self, seconds: float) -> None:
+        """Empties the bucket so nothing is let through for `seconds`."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level = min(self._level, -seconds * self.rate)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the number of requests in flight. Every throttled request
+    cuts the limit by `decrease` (at most once per `cooldown` seconds, so a
+    single burst of 429s counts once); every successful request raises it by
+    about one per `limit` requests, up to `max_limit`.
+
+    Waiting requests, sync or async, get a slot in arrival order.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        # threading.Events (sync) and (loop, future) pairs (async)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _take(self, waiter) -> bool:
+        # called with self._lock held
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        self._waiters.append(waiter)
+        return False
+
+    def _grant(self) -> None:
+        # called with self._lock held; hands free slots to waiters in order
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_resolve, future)
+                except RuntimeError:
+                    # its event loop is closed; nobody is waiting any more
+                    self.in_flight -= 1
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Waits for a slot; raises DeadlineExceeded after `timeout` seconds."""
+        event = threading.Event()
+        with self._lock:
+            if self._take(event):
+                return
+        if event.wait(timeout):
+            return
+        with self._lock:
+            try:
+                self._waiters.remove(event)
+            except ValueError:
+                # the slot was granted just as the wait timed out
+                return
+        raise DeadlineExceeded("no concurrency slot freed up before the deadline")
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            if self._take(waiter):
+                return
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    # the slot was granted just as we were cancelled
+                    self.in_flight -= 1
+                    self._grant()
+            raise
+
+    def throttle(self) -> None:
+        """Cuts the limit, unless it was cut less than `cooldown` ago."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self._last_decrease = now
+
+    def release(self, throttled: bool = False) -> None:
+        if throttled:
+            self.throttle()
+        with self._lock:
+            self.in_flight -= 1
+            if not throttled:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._grant()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def estimate_request_tokens(create_params: dict) -> int:
+    """Rough size of a chat completion request in tokens."""
+    tokens = sum(estimate_tokens(m) for m in create_params.get("messages") or [])
+    if create_params.get("tools"):
+        tokens += len(json.dumps(create_params["tools"])) // 4
+    return tokens + (create_params.get("max_tokens") or 0)
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    # handles both "12" / "0.5" (retry-after) and "1m30s" / "250ms" (x-ratelimit-reset-*)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def _parse_count(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+class RateLimiter:
+    """
+    Client-side limits on requests per minute and tokens per minute, plus an
+    optional AdaptiveConcurrency controller.
+
+    Token usage is estimated before each request and corrected once the
+    response reports actual usage. When the API answers 429, the buckets are
+    drained for as long as its retry-after / x-ratelimit-reset headers ask.
+
+    The x-ratelimit-remaining-* headers of successful responses keep the
+    buckets from holding more than the API says is left. Once less than
+    `headroom` of either limit remains, the request counts as throttled for
+    the concurrency controller, so it backs off before the first 429.
+
+    Use get_rate_limiter() to share one limiter between every Swarm in the
+    process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        headroom: float = 0.1,
+    ):
+        self.headroom = headroom
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = concurrency
+
+    def _reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        return delay
+
+    def _unreserve(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.adjust(1)
+        if self.tokens:
+            self.tokens.adjust(tokens)
+
+    def acquire(self, tokens: int, timeout: Optional[float] = None) -> None:
+        """
+        Waits until a request of `tokens` may be sent. Raises DeadlineExceeded,
+        without taking anything, if that would be more than `timeout` seconds.
+        """
+        deadline = Deadline(timeout)
+        delay = self._reserve(tokens)
+        if timeout is not None and delay > timeout:
+            self._unreserve(tokens)
+            raise DeadlineExceeded(f"rate limited for {delay:.1f}s, past the deadline")
+        if delay > 0:
+            time.sleep(delay)
+        if self.concurrency:
+            try:
+                self.concurrency.acquire(deadline.remaining())
+            except DeadlineExceeded:
+                self._unreserve(tokens)
+                raise
+
+    async def aacquire(self, tokens: int) -> None:
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.concurrency:
+            await self.concurrency.aacquire()
+
+    def release(
+        self, error: Optional[BaseException] = None, headers: Optional[Mapping] = None
+    ) -> None:
+        """
+        Ends a request: `error` if it failed, else the response `headers`
+        if they are known.
+        """
+        throttled = error is not None and is_rate_limit_error(error)
+        if throttled:
+            self._back_off(error)
+        elif headers is not None:
+            throttled = self._observe_headers(headers)
+        if self.concurrency:
+            self.concurrency.release(throttled=throttled)
+
+    def record_usage(self, estimated: int, actual: int) -> None:
+        if self.tokens and actual is not None:
+            self.tokens.adjust(estimated - actual)
+
+    def _observe_headers(self, headers: Mapping) -> bool:
+        # returns whether either limit is running low
+        low = False
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            remaining = _parse_count(headers.get(f"x-ratelimit-remaining-{kind}"))
+            if remaining is None:
+                continue
+            if bucket:
+                bucket.cap(remaining)
+            limit = _parse_count(headers.get(f"x-ratelimit-limit-{kind}"))
+            if limit and remaining < self.headroom * limit:
+                low = True
+        return low
+
+    def _back_off(self, error: BaseException) -> None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        waits = [
+            _parse_reset(headers.get(name))
+            for name in (
+                "retry-after",
+                "x-ratelimit-reset-requests",
+                "x-ratelimit-reset-tokens",
+            )
+        ]
+        wait = max((w for w in waits if w), default=1.0)
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.drain(wait)
+
+
+class LimitedStream:
+    """
+    A completion stream holding a RateLimiter slot. The slot is released
+    exactly once: when the stream ends or fails, or when it is closed, even
+    if it was never iterated. A stream read to the end also corrects the
+    token estimate with the usage its last chunk reports.
+    """
+
+    def __init__(
+        self,
+        stream,
+        limiter: RateLimiter,
+        estimated: int = 0,
+        headers: Optional[Mapping] = None,
+    ):
+        self.stream = stream
+        self.limiter = limiter
+        self.estimated = estimated
+        self.headers = headers
+        self.usage = None
+        self.released = False
+
+    def _release(self, error: Optional[BaseException] = None) -> None:
+        if not self.released:
+            self.released = True
+            self.limiter.release(error, self.headers if error is None else None)
+
+    def _finish(self) -> None:
+        if not self.released and self.usage is not None:
+            self.limiter.record_usage(
+                self.estimated, getattr(self.usage, "total_tokens", None)
+            )
+        self._release()
+
+    def __iter__(self):
+        try:
+            for chunk in self.stream:
+                self.usage = getattr(chunk, "usage", None) or self.usage
+                yield chunk
+        except Exception as e:
+            self._release(e)
+            raise
+        self._finish()
+
+    def close(self) -> None:
+        close_quietly(self.stream)
+        self._release()
+
+    def __del__(self):
+        # last resort for a stream dropped without being closed
+        self._release()
+
+
+class AsyncLimitedStream(LimitedStream):
+    """LimitedStream for an async completion stream."""
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self.stream:
+                self.usage = getattr(chunk, "usage", None) or self.usage
+                yield chunk
+        except Exception as e:
+            self._release(e)
+            raise
+        self._finish()
+
+    async def aclose(self) -> None:
+        await aclose_quietly(self.stream)
+        self._release()
+
+
+def get_rate_limiter(name: str = "default", **kwargs) -> RateLimiter:
+    """
+    Returns the process-wide RateLimiter called `name`, creating it with
+    `kwargs` the first time. Later calls ignore `kwargs`.
+    """
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(name)
+        if limiter is None:
+            limiter = _shared_limiters[name] = RateLimiter(**kwargs)
+        return limiter
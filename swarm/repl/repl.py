@@ -63,25 +63,16 @@ def run_demo_loop(
     client = Swarm()
     print("Starting Swarm CLI 🐝")
 
-    messages = []
-    agent = starting_agent
+    session = client.session(
+        starting_agent, context_variables=dict(context_variables or {}), debug=debug
+    )
 
     while True:
         user_input = input("\033[90mUser\033[0m: ")
-        messages.append({"role": "user", "content": user_input})
 
-        response = client.run(
-            agent=agent,
-            messages=messages,
-            context_variables=context_variables or {},
-            stream=stream,
-            debug=debug,
-        )
+        response = session.send(user_input, stream=stream)
 
         if stream:
             response = process_and_print_streaming_response(response)
         else:
             pretty_print_messages(response.messages)
-
-        messages.extend(response.messages)
-        agent = response.agent
@@ -0,0 +1,144 @@
+# Standard library imports
+import asyncio
+import random
+import sys
+import time
+from typing import Callable, Optional, Tuple, Type
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Connection errors, timeouts, 408/409/429 and 5xx responses are worth
+    retrying; anything else (bad request, auth, ...) will fail again.
+    """
+    # if openai was never imported the error can't be one of its own
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in (408, 409, 429) or status >= 500)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is abandoned because its deadline passed."""
+
+
+class Deadline:
+    """A point in time work has to finish by; `None` means no deadline."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+
+    @classmethod
+    def earliest(cls, deadline: "Deadline", timeout: Optional[float]) -> "Deadline":
+        """Returns a deadline `timeout` from now, capped at `deadline`."""
+        child = cls(timeout)
+        if deadline.expires_at is not None and (
+            child.expires_at is None or deadline.expires_at < child.expires_at
+        ):
+            child.expires_at = deadline.expires_at
+        return child
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+
+class RetryPolicy:
+    """
+    Retries failed completion requests, and optionally agent functions, with
+    capped exponential backoff and full jitter.
+
+    Args:
+        max_attempts: Attempts in total, including the first.
+        initial_backoff: Backoff cap before the first retry, in seconds.
+        max_backoff: Largest backoff cap, in seconds.
+        multiplier: Growth of the backoff cap per attempt.
+        jitter: Fraction of the cap that is randomized; 1.0 waits a uniform
+            random time up to the cap, 0.0 always waits the full cap.
+        retry_on: Decides whether a completion error is retryable.
+        tool_errors: Exception types that make an agent function retryable.
+            Functions are not retried unless this is set.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        multiplier: float = 2.0,
+        jitter: float = 1.0,
+        retry_on: Callable[[BaseException], bool] = is_retryable_error,
+        tool_errors: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.tool_errors = tuple(tool_errors)
+
+    def backoff(self, attempt: int) -> float:
+        cap = min(self.max_backoff, self.initial_backoff * self.multiplier**attempt)
+        return cap * (1 - self.jitter) + random.uniform(0, cap * self.jitter)
+
+    def is_retryable_tool_error(self, error: BaseException) -> bool:
+        return bool(self.tool_errors) and isinstance(error, self.tool_errors)
+
+    def _delay(
+        self,
+        error: BaseException,
+        attempt: int,
+        is_retryable: Callable[[BaseException], bool],
+        deadline: Optional[Deadline],
+    ) -> Optional[float]:
+        if attempt + 1 >= self.max_attempts or not is_retryable(error):
+            return None
+        delay = self.backoff(attempt)
+        remaining = deadline.remaining() if deadline else None
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def call(
+        self,
+        fn: Callable,
+        is_retryable: Optional[Callable[[BaseException], bool]] = None,
+        deadline: Optional[Deadline] = None,
+    ):
+        """Calls `fn()` until it succeeds, retries run out or the deadline is near."""
+        is_retryable = is_retryable or self.retry_on
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._delay(e, attempt, is_retryable, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(
+        self,
+        fn: Callable,
+        is_retryable: Optional[Callable[[BaseException], bool]] = None,
+        deadline: Optional[Deadline] = None,
+    ):
+        """Like `call`, for a function returning an awaitable."""
+        is_retryable = is_retryable or self.retry_on
+        attempt = 0
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._delay(e, attempt, is_retryable, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,421 @@
+"""
+A minimal ASGI service for running Swarm agents over HTTP.
+
+    from swarm import AsyncSwarm
+    from swarm.server import SwarmApp
+
+    app = SwarmApp(AsyncSwarm(), agents={"triage": triage_agent})
+
+Serve it with any ASGI server, e.g. `uvicorn myservice:app`, or run
+`python -m swarm.server myservice:triage_agent`.
+
+Endpoints (request and response bodies are JSON):
+
+    POST   /runs                    stateless run: {"messages", "agent"?,
+                                    "context_variables"?, "stream"?}
+    POST   /sessions                {"agent"?, "context_variables"?} -> {"session_id"}
+    GET    /sessions/{id}           the session's agent, messages and context
+    POST   /sessions/{id}/messages  {"message", "stream"?}
+    DELETE /sessions/{id}
+    GET    /health
+
+With "stream": true (or `Accept: text/event-stream`) the reply is a
+Server-Sent Events stream of `start`, `delta`, `end` and finally `response`
+events, or an `error` event if the run fails. Sessions live in the memory
+of one process, so behind a load balancer with several workers, route
+each session to the same worker.
+"""
+
+# Standard library imports
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+# Local imports
+from .clients import configure_clients
+from .core import AsyncSwarm
+from .session import AsyncSession
+from .types import Agent, Response
+
+__SSE_HEADERS__ = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, detail: str, headers: Optional[list] = None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.headers = headers or []
+
+
+def response_to_json(response: Response) -> dict:
+    return {
+        "messages": response.messages,
+        "agent": response.agent.name if response.agent else None,
+        "context_variables": response.context_variables,
+        "deadline_exceeded": response.deadline_exceeded,
+        "usage": response.usage.model_dump(),
+    }
+
+
+def sse_event(event: dict) -> bytes:
+    if "delim" in event:
+        name, data = event["delim"], {}
+    elif "response" in event:
+        name, data = "response", response_to_json(event["response"])
+    else:
+        name, data = "delta", event
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class SwarmApp:
+    """
+    ASGI application exposing an AsyncSwarm.
+
+    Args:
+        swarm: The AsyncSwarm that runs every request.
+        agents: Agents clients can pick by name, or a single default agent.
+            The first agent is the default.
+        max_concurrency: Runs allowed in flight at once in this process.
+        max_pending: Requests allowed to wait for a free slot; beyond that
+            the server answers 503 with Retry-After.
+        max_sessions: Sessions kept in memory; the least recently used
+            session is dropped first.
+        stream_buffer: Events buffered per stream. When a client reads
+            slower than the model writes, the run pauses once the buffer is
+            full instead of queueing without bound.
+        max_body_bytes: Largest request body accepted.
+        warm_connections: Connections to the API opened at startup (ASGI
+            lifespan), so the first requests skip connection setup.
+
+    A client disconnecting cancels its run, including the in-flight
+    completion request. A cancelled or failed turn is dropped from its
+    session (its messages, context_variables updates and handoff), so the
+    session never keeps a tool call without its results; a failed run
+    answers 500.
+    """
+
+    def __init__(
+        self,
+        swarm: AsyncSwarm,
+        agents: Union[Agent, Dict[str, Agent]],
+        max_concurrency: int = 64,
+        max_pending: int = 256,
+        max_sessions: int = 10000,
+        stream_buffer: int = 64,
+        max_body_bytes: int = 1 << 20,
+        warm_connections: int = 0,
+    ):
+        if isinstance(agents, Agent):
+            agents = {agents.name: agents}
+        if not agents:
+            raise ValueError("SwarmApp needs at least one agent")
+        self.swarm = swarm
+        self.agents = dict(agents)
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.max_sessions = max_sessions
+        self.stream_buffer = stream_buffer
+        self.max_body_bytes = max_body_bytes
+        self.warm_connections = warm_connections
+        self.sessions: "OrderedDict[str, AsyncSession]" = OrderedDict()
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._slots = None
+        self._pending = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            await self._dispatch(scope, receive, send)
+        except HTTPError as e:
+            await self._send_json(send, e.status, {"error": e.detail}, e.headers)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.warm_connections:
+                    await self.swarm.warm_up(self.warm_connections)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.swarm.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch(self, scope, receive, send):
+        method = scope["method"]
+        parts = [p for p in scope["path"].split("/") if p]
+
+        if parts == ["health"] and method == "GET":
+            await self._send_json(send, 200, {"status": "ok"})
+        elif parts == ["runs"] and method == "POST":
+            body = await self._read_json(receive)
+            session = AsyncSession(
+                self.swarm,
+                self._agent(body.get("agent")),
+                context_variables=body.get("context_variables"),
+                messages=body.get("messages") or [],
+            )
+            await self._run(scope, receive, send, session, None, body)
+        elif parts == ["sessions"] and method == "POST":
+            body = await self._read_json(receive)
+            session_id = uuid.uuid4().hex
+            self._store_session(
+                session_id,
+                AsyncSession(
+                    self.swarm,
+                    self._agent(body.get("agent")),
+                    context_variables=body.get("context_variables"),
+                ),
+            )
+            await self._send_json(send, 201, {"session_id": session_id})
+        elif len(parts) == 2 and parts[0] == "sessions" and method == "GET":
+            session = self._session(parts[1])
+            await self._send_json(
+                send,
+                200,
+                {
+                    "session_id": parts[1],
+                    "agent": session.agent.name,
+                    "messages": session.messages,
+                    "context_variables": session.context_variables,
+                },
+            )
+        elif len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+            self._session(parts[1])
+            del self.sessions[parts[1]]
+            self._session_locks.pop(parts[1], None)
+            await self._send_json(send, 204, None)
+        elif parts[:1] == ["sessions"] and parts[2:] == ["messages"] and method == "POST":
+            session = self._session(parts[1])
+            body = await self._read_json(receive)
+            if "message" not in body:
+                raise HTTPError(400, "missing 'message'")
+            await self._run(scope, receive, send, session, parts[1], body)
+        else:
+            raise HTTPError(404, "not found")
+
+    def _agent(self, name: Optional[str]) -> Agent:
+        if name is None:
+            return next(iter(self.agents.values()))
+        if name not in self.agents:
+            raise HTTPError(400, f"unknown agent {name!r}")
+        return self.agents[name]
+
+    def _session(self, session_id: str) -> AsyncSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, "unknown session")
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _store_session(self, session_id: str, session: AsyncSession) -> None:
+        self.sessions[session_id] = session
+        while len(self.sessions) > self.max_sessions:
+            evicted, _ = self.sessions.popitem(last=False)
+            self._session_locks.pop(evicted, None)
+
+    async def _acquire_slot(self) -> None:
+        if self._slots is None:
+            # created lazily so it binds to the server's event loop
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self._slots.locked() and self._pending >= self.max_pending:
+            raise HTTPError(503, "server busy", [(b"retry-after", b"1")])
+        self._pending += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._pending -= 1
+
+    async def _run(self, scope, receive, send, session, session_id, body):
+        stream = bool(body.get("stream")) or b"text/event-stream" in dict(
+            scope.get("headers") or []
+        ).get(b"accept", b"")
+        message = body.get("message")
+        lock = None
+        if session_id is not None:
+            lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+
+        await self._acquire_slot()
+        try:
+            if lock:
+                await lock.acquire()
+            # tools update context_variables in place, key by key
+            before = (
+                len(session.messages),
+                dict(session.context_variables),
+                session.agent,
+            )
+            completed = False
+            try:
+                if stream:
+                    completed = await self._stream(send, receive, session, message)
+                else:
+                    completed = await self._respond(send, receive, session, message)
+            finally:
+                if not completed:
+                    self._roll_back(session, *before)
+                if lock:
+                    lock.release()
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _roll_back(
+        session: AsyncSession, length: int, context_variables: dict, agent: Agent
+    ) -> None:
+        del session.messages[length:]
+        session.context_variables.clear()
+        session.context_variables.update(context_variables)
+        session.agent = agent
+
+    async def _send_turn(self, session: AsyncSession, message, stream: bool):
+        if message is not None:
+            return await session.send(message, stream=stream)
+        # stateless run: the messages are already in the session
+        if stream:
+            return self.swarm._run_and_stream(*session._loop_args())
+        return await self.swarm._run(*session._loop_args())
+
+    async def _respond(self, send, receive, session, message) -> bool:
+        run = asyncio.ensure_future(self._send_turn(session, message, stream=False))
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait({run, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not run.done():
+                run.cancel()
+                # let it unwind before its messages are dropped
+                await asyncio.wait({run})
+                return False
+            try:
+                response = run.result()
+            except Exception as e:
+                await self._send_json(send, 500, {"error": str(e)})
+                return False
+            await self._send_json(send, 200, response_to_json(response))
+            return True
+        finally:
+            disconnected.cancel()
+
+    async def _stream(self, send, receive, session, message) -> bool:
+        events = await self._send_turn(session, message, stream=True)
+        buffer = asyncio.Queue(maxsize=self.stream_buffer)
+        failed = False
+
+        async def produce():
+            nonlocal failed
+            try:
+                async for event in events:
+                    await buffer.put(sse_event(event))
+            except Exception as e:
+                failed = True
+                await buffer.put(
+                    f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n".encode()
+                )
+            await buffer.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        await send({"type": "http.response.start", "status": 200, "headers": __SSE_HEADERS__})
+        try:
+            while True:
+                chunk = asyncio.ensure_future(buffer.get())
+                await asyncio.wait({chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    chunk.cancel()
+                    producer.cancel()
+                    await asyncio.wait({producer})
+                    # a run paused on a full buffer is still suspended inside
+                    await events.aclose()
+                    return False
+                data = chunk.result()
+                if data is None:
+                    break
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return not failed
+        finally:
+            disconnected.cancel()
+            if not producer.done():
+                producer.cancel()
+
+    async def _wait_for_disconnect(self, receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _read_json(self, receive) -> dict:
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(400, "client disconnected")
+            body += message.get("body", b"")
+            if len(body) > self.max_body_bytes:
+                raise HTTPError(413, "request body too large")
+            if not message.get("more_body"):
+                break
+        if not body:
+            return {}
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "invalid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "expected a JSON object")
+        return data
+
+    async def _send_json(self, send, status: int, data, headers: Optional[list] = None):
+        body = b"" if data is None else json.dumps(data, default=str).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")] + (headers or []),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def main():
+    import argparse
+    import importlib
+
+    parser = argparse.ArgumentParser(description="Serve a Swarm agent over HTTP.")
+    parser.add_argument("agent", help="the starting agent, as module:attribute")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--http2", action="store_true")
+    parser.add_argument("--warm-connections", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("swarm.server needs an ASGI server: pip install uvicorn")
+
+    module_name, _, attribute = args.agent.partition(":")
+    agent = getattr(importlib.import_module(module_name), attribute)
+    configure_clients(max_connections=args.max_connections, http2=args.http2)
+    app = SwarmApp(
+        AsyncSwarm(),
+        agent,
+        max_concurrency=args.max_concurrency,
+        warm_connections=args.warm_connections,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Standard library imports
+from typing import List, Optional, Union
+
+# Local imports
+from .types import Agent
+
+
+class Session:
+    """
+    A conversation with a Swarm that keeps its own state between turns.
+
+    The session owns the active agent, the context_variables and an
+    append-only message log. Each `send` appends the new user message and
+    runs the loop directly on that log, so nothing already in the
+    conversation is copied again.
+
+    Sessions are not thread-safe; use one per conversation.
+
+    Attributes:
+        swarm (Swarm): The Swarm that runs each turn.
+        agent (Agent): The agent the next message goes to.
+        context_variables (dict): Context shared with agent functions.
+        messages (list): Every message in the conversation so far.
+    """
+
+    def __init__(
+        self,
+        swarm,
+        agent: Agent,
+        context_variables: Optional[dict] = None,
+        messages: Optional[List] = None,
+        model_override: str = None,
+        debug: bool = False,
+        max_turns: int = float("inf"),
+        execute_tools: bool = True,
+        timeout: Optional[float] = None,
+        turn_timeout: Optional[float] = None,
+    ):
+        self.swarm = swarm
+        self.agent = agent
+        self.context_variables = (
+            context_variables if context_variables is not None else {}
+        )
+        self.messages = list(messages or [])
+        self.model_override = model_override
+        self.debug = debug
+        self.max_turns = max_turns
+        self.execute_tools = execute_tools
+        self.timeout = timeout
+        self.turn_timeout = turn_timeout
+
+    def _append_user_message(self, message: Union[str, dict]) -> None:
+        if isinstance(message, str):
+            message = {"role": "user", "content": message}
+        self.messages.append(message)
+
+    def _loop_args(self) -> tuple:
+        return (
+            self.agent,
+            self.messages,
+            self.context_variables,
+            self.model_override,
+            self.debug,
+            self.max_turns,
+            self.execute_tools,
+            self.timeout,
+            self.turn_timeout,
+        )
+
+    def send(self, message: Union[str, dict], stream: bool = False):
+        """
+        Sends a user message (a string or a message dict) and runs the agents
+        until they hand control back. Returns a Response holding only the new
+        messages, or a generator of streaming events when `stream` is set.
+        """
+        self._append_user_message(message)
+        if stream:
+            return self._stream()
+        response = self.swarm._run(*self._loop_args())
+        self.agent = response.agent
+        return response
+
+    def _stream(self):
+        for chunk in self.swarm._run_and_stream(*self._loop_args()):
+            if "response" in chunk:
+                self.agent = chunk["response"].agent
+            yield chunk
+
+
+class AsyncSession(Session):
+    """
+    Session for an AsyncSwarm: `send` is a coroutine and streaming returns
+    an async generator.
+    """
+
+    async def send(self, message: Union[str, dict], stream: bool = False):
+        self._append_user_message(message)
+        if stream:
+            return self._stream()
+        response = await self.swarm._run(*self._loop_args())
+        self.agent = response.agent
+        return response
+
+    async def _stream(self):
+        async for chunk in self.swarm._run_and_stream(*self._loop_args()):
+            if "response" in chunk:
+                self.agent = chunk["response"].agent
+            yield chunk
@@ -0,0 +1,309 @@
+# Standard library imports
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+# Local imports
+from .hedging import aclose_quietly, close_quietly
+from .retry import Deadline, DeadlineExceeded
+
+# what a leader leaves its followers when it was cancelled rather than
+# failed: there's no outcome to share, so one of them makes the request
+_TAKE_OVER = object()
+
+
+class SingleFlight:
+    """
+    Shares one upstream completion request among identical requests that
+    are in flight at the same time (same completion_cache_key, both
+    streaming or both not).
+
+    Callers waiting on a non-streamed request get their own copy of its
+    ChatCompletion. A streamed request is fanned out: every caller iterates
+    the same chunks from the beginning, and the upstream stream is closed
+    once the last of them stops early. Nothing is kept once the request
+    finishes; pair it with a completion cache for that. Errors reach every
+    caller; if the caller making the request is cancelled instead, one of
+    the callers waiting on it makes the request again.
+
+    Pass it as `Swarm(single_flight=SingleFlight())`.
+
+    Attributes:
+        leaders (int): Requests that went upstream.
+        shared (int): Requests that joined one already in flight.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key) -> tuple:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return False, future
+            future = self._in_flight[key] = Future()
+            self.leaders += 1
+            return True, future
+
+    def _forget(self, key, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _lead(self, key, future: Future, completion, stream: bool, fanout_class):
+        if not stream:
+            self._forget(key, future)
+            future.set_result(completion)
+            return completion
+        fanout = fanout_class(completion, lambda: self._forget(key, future))
+        subscriber = fanout.subscribe()
+        future.set_result(fanout)
+        return subscriber
+
+    def _fail(self, key, future: Future, error: BaseException) -> None:
+        self._forget(key, future)
+        if isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            future.set_result(_TAKE_OVER)
+
+    def call(self, key, stream: bool, request: Callable, timeout: Optional[float] = None):
+        """
+        Returns the completion (or a stream of its chunks), calling `request`
+        only if no identical request is in flight.
+        """
+        leader, future = self._join((stream, key))
+        if not leader:
+            shared = future.result(timeout=timeout)
+            if shared is _TAKE_OVER:
+                return self.call(key, stream, request, timeout)
+            if not stream:
+                return shared.model_copy(deep=True)
+            subscriber = shared.subscribe(timeout)
+            if subscriber is not None:
+                return subscriber
+            # every earlier subscriber gave up and the stream was closed
+            return self.call(key, stream, request, timeout)
+        try:
+            completion = request()
+        except BaseException as e:
+            self._fail((stream, key), future, e)
+            raise
+        return self._lead((stream, key), future, completion, stream, StreamFanout)
+
+    async def acall(self, key, stream: bool, request: Callable, timeout: Optional[float] = None):
+        """Like `call`, for a `request` returning an awaitable."""
+        leader, future = self._join((stream, key))
+        if not leader:
+            # shielded: a follower giving up must not cancel the shared future
+            shared = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout
+            )
+            if shared is _TAKE_OVER:
+                return await self.acall(key, stream, request, timeout)
+            if not stream:
+                return shared.model_copy(deep=True)
+            subscriber = shared.subscribe()
+            if subscriber is not None:
+                return subscriber
+            return await self.acall(key, stream, request, timeout)
+        try:
+            completion = await request()
+        except BaseException as e:
+            self._fail((stream, key), future, e)
+            raise
+        return self._lead((stream, key), future, completion, stream, AsyncStreamFanout)
+
+
+class StreamFanout:
+    """
+    One completion stream read by several subscribers. Whichever subscriber
+    is furthest ahead pulls the next chunk; the others replay the buffer.
+    """
+
+    def __init__(self, upstream, on_finish: Callable[[], None]):
+        self.upstream = upstream
+        self.chunks = []
+        self.done = False
+        self.abandoned = False
+        self.error = None
+        self.subscribers = 0
+        self._source = iter(upstream)
+        self._on_finish = on_finish
+        self._pulling = False
+        self._changed = threading.Condition()
+
+    def subscribe(self, timeout: Optional[float] = None) -> Optional["_Subscriber"]:
+        """Returns a new subscriber, or None if the stream was abandoned."""
+        with self._changed:
+            if self.abandoned:
+                return None
+            self.subscribers += 1
+        return _Subscriber(self, Deadline(timeout))
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        # called with self._changed held
+        self.done = True
+        self.error = error
+        self._pulling = False
+        self._changed.notify_all()
+        self._on_finish()
+
+    def next_chunk(self, index: int, deadline: Deadline):
+        while True:
+            with self._changed:
+                while index >= len(self.chunks) and not self.done and self._pulling:
+                    remaining = deadline.remaining()
+                    if remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded("shared completion stream outlived the deadline")
+                    self._changed.wait(remaining)
+                if index < len(self.chunks):
+                    return self.chunks[index]
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    raise StopIteration
+                self._pulling = True
+            try:
+                chunk = next(self._source)
+            except StopIteration:
+                with self._changed:
+                    self._finish()
+                raise
+            except BaseException as e:
+                with self._changed:
+                    self._finish(e)
+                raise
+            with self._changed:
+                self.chunks.append(chunk)
+                self._pulling = False
+                self._changed.notify_all()
+
+    def unsubscribe(self) -> None:
+        with self._changed:
+            self.subscribers -= 1
+            abandon = not self.done and self.subscribers == 0
+            if abandon:
+                self.abandoned = True
+                self._finish()
+        if abandon:
+            close_quietly(self.upstream)
+
+
+class _Subscriber:
+    def __init__(self, fanout: StreamFanout, deadline: Deadline):
+        self.fanout = fanout
+        self.deadline = deadline
+        self.index = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        try:
+            chunk = self.fanout.next_chunk(self.index, self.deadline)
+        except BaseException:
+            self.close()
+            raise
+        self.index += 1
+        return chunk
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.fanout.unsubscribe()
+
+
+class AsyncStreamFanout:
+    """
+    StreamFanout for an async completion stream, on a single event loop.
+    Chunks are pulled in a task of their own, so a subscriber being
+    cancelled doesn't cancel the upstream read the others are waiting on.
+    """
+
+    def __init__(self, upstream, on_finish: Callable[[], None]):
+        self.upstream = upstream
+        self.chunks = []
+        self.done = False
+        self.abandoned = False
+        self.error = None
+        self.subscribers = 0
+        self._source = upstream.__aiter__()
+        self._on_finish = on_finish
+        self._pull = None
+
+    def subscribe(self) -> Optional["_AsyncSubscriber"]:
+        if self.abandoned:
+            return None
+        self.subscribers += 1
+        return _AsyncSubscriber(self)
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._on_finish()
+
+    async def _pull_next(self) -> None:
+        try:
+            self.chunks.append(await self._source.__anext__())
+        except StopAsyncIteration:
+            self._finish()
+        except Exception as e:
+            self._finish(e)
+        finally:
+            self._pull = None
+
+    async def next_chunk(self, index: int):
+        while True:
+            if index < len(self.chunks):
+                return self.chunks[index]
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                raise StopAsyncIteration
+            if self._pull is None:
+                self._pull = asyncio.ensure_future(self._pull_next())
+            await asyncio.shield(self._pull)
+
+    async def unsubscribe(self) -> None:
+        self.subscribers -= 1
+        if not self.done and self.subscribers == 0:
+            self.abandoned = True
+            if self._pull is not None:
+                self._pull.cancel()
+            self._finish()
+            await aclose_quietly(self.upstream)
+
+
+class _AsyncSubscriber:
+    def __init__(self, fanout: AsyncStreamFanout):
+        self.fanout = fanout
+        self.index = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        try:
+            chunk = await self.fanout.next_chunk(self.index)
+        except BaseException:
+            await self.aclose()
+            raise
+        self.index += 1
+        return chunk
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            self.closed = True
+            await self.fanout.unsubscribe()
@@ -0,0 +1,236 @@
+# Standard library imports
+import asyncio
+import copy
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional, Tuple
+
+# Local imports
+from .compiled import __CTX_VARS_NAME__, set_tool_option
+from .types import AgentFunction
+
+# what a call leaves the identical calls waiting on it when it was
+# cancelled rather than failed: one of them runs the function instead
+_TAKE_OVER = object()
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when an agent function runs past its timeout."""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"Tool {name} did not finish within {timeout}s.")
+        self.name = name
+        self.timeout = timeout
+
+    def tool_content(self) -> str:
+        """The tool result the model gets instead of the function's output."""
+        return json.dumps(
+            {
+                "error": "timeout",
+                "tool": self.name,
+                "timeout_seconds": self.timeout,
+                "message": f"{self} It was cancelled; try again or use another approach.",
+            }
+        )
+
+
+def default_tool_key(**kwargs) -> Hashable:
+    """The arguments the model passed, ignoring context_variables."""
+    kwargs.pop(__CTX_VARS_NAME__, None)
+    return json.dumps(kwargs, sort_keys=True, default=repr)
+
+
+class ToolCache:
+    """
+    Results of one agent function, keyed on its arguments, with single-flight
+    deduplication: while a call is running, identical calls wait for it and
+    share its result instead of running again. Errors are never cached;
+    if the running call is cancelled, one of the waiting calls runs instead.
+
+    Attributes:
+        hits (int): Calls answered from the cache.
+        misses (int): Calls that ran the function.
+        shared (int): Calls that waited for an identical call in flight.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        maxsize: int = 1024,
+        key: Callable[..., Hashable] = default_tool_key,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Hashable) -> Tuple[str, object]:
+        # returns ("hit", value), ("shared", future) or ("miss", future)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return "hit", value
+                del self._entries[key]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return "shared", future
+            future = self._in_flight[key] = Future()
+            self.misses += 1
+            return "miss", future
+
+    def _finish(self, key: Hashable, future: Future, value=None, error=None) -> None:
+        with self._lock:
+            del self._in_flight[key]
+            if error is None:
+                expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+                self._entries[key] = (expires_at, value)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        if error is None:
+            future.set_result(value)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            future.set_result(_TAKE_OVER)
+
+    def call(self, args: dict, invoke: Callable[[], object]) -> Tuple[object, str]:
+        """Returns (result, outcome), running `invoke` only on a miss."""
+        key = self.key(**args)
+        outcome, found = self._lookup(key)
+        if outcome == "hit":
+            return found, outcome
+        if outcome == "shared":
+            value = found.result()
+            if value is _TAKE_OVER:
+                return self.call(args, invoke)
+            return value, outcome
+        try:
+            value = invoke()
+        except BaseException as e:
+            self._finish(key, found, error=e)
+            raise
+        self._finish(key, found, value)
+        return value, outcome
+
+    async def acall(self, args: dict, invoke: Callable[[], object]) -> Tuple[object, str]:
+        """Like `call`, for an `invoke` returning an awaitable."""
+        key = self.key(**args)
+        outcome, found = self._lookup(key)
+        if outcome == "hit":
+            return found, outcome
+        if outcome == "shared":
+            # shielded: a waiting call being cancelled must not cancel the
+            # shared future the running call reports to
+            value = await asyncio.shield(asyncio.wrap_future(found))
+            if value is _TAKE_OVER:
+                return await self.acall(args, invoke)
+            return value, outcome
+        try:
+            value = await invoke()
+        except BaseException as e:
+            self._finish(key, found, error=e)
+            raise
+        self._finish(key, found, value)
+        return value, outcome
+
+
+def cacheable(
+    func: Optional[AgentFunction] = None,
+    *,
+    ttl: Optional[float] = None,
+    maxsize: int = 1024,
+    key: Optional[Callable[..., Hashable]] = None,
+):
+    """
+    Lets Swarm reuse an agent function's results for identical arguments.
+
+    Use as `@cacheable` or `@cacheable(ttl=300, maxsize=512, key=...)`.
+    `key` is called with the same keyword arguments as the function and
+    returns a hashable cache key; by default it is the arguments minus
+    context_variables, so functions whose result depends on the context
+    need their own key. Cached results are shared, so treat them as
+    read-only.
+
+    The function is returned as is, with the cache attached as
+    `func.tool_cache`; only calls made by Swarm go through it.
+    """
+
+    def decorate(func: AgentFunction) -> AgentFunction:
+        cache = ToolCache(ttl=ttl, maxsize=maxsize, key=key or default_tool_key)
+        func.tool_cache = cache
+        return set_tool_option(func, "cache", cache)
+
+    if func is not None:
+        return decorate(func)
+    return decorate
+
+
+def run_in_process(func: AgentFunction) -> AgentFunction:
+    """
+    Runs an agent function in Swarm's process pool instead of a thread, so
+    CPU-bound work doesn't hold the GIL while other conversations run.
+
+    The function, its arguments and its result must be picklable; in
+    practice the function has to be defined at module level of an
+    importable module, since workers start fresh (forkserver, or spawn
+    where that's unavailable) rather than being forked. It gets a
+    snapshot of context_variables: keys it sets or changes there, and any
+    Result.context_variables it returns, are merged back after it finishes.
+    """
+    return set_tool_option(func, "in_process", True)
+
+
+def call_in_process(func: AgentFunction, kwargs: dict) -> Tuple[object, dict]:
+    """
+    Worker-side entry point for run_in_process functions. Returns the result
+    and the context_variables entries the function added or changed.
+    """
+    context = kwargs.get(__CTX_VARS_NAME__)
+    before = copy.deepcopy(context) if context is not None else None
+    result = func(**kwargs)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    if context is None:
+        return result, {}
+    changed = {
+        key: value
+        for key, value in context.items()
+        if key not in before or before[key] != value
+    }
+    return result, changed
+
+
+def tool_timeout(seconds: Optional[float]):
+    """
+    Sets how long Swarm lets an agent function run, overriding
+    `Swarm(tool_timeout=...)`; None means no limit.
+
+    When the time is up, coroutine functions are cancelled and threaded
+    functions are abandoned (they keep running, but their result is
+    dropped), and the model gets a JSON timeout error as the tool result.
+    Functions with a timeout always run on a worker thread, even when tool
+    calls aren't run in parallel.
+    """
+
+    def decorate(func: AgentFunction) -> AgentFunction:
+        return set_tool_option(func, "timeout", seconds)
+
+    return decorate
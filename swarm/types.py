@@ -1,16 +1,36 @@
-from openai.types.chat import ChatCompletionMessage
-from openai.types.chat.chat_completion_message_tool_call import (
-    ChatCompletionMessageToolCall,
-    Function,
-)
-from typing import List, Callable, Union, Optional
+# Standard library imports
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List, Callable, Union, Optional
 
 # Third-party imports
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessage
+    from openai.types.chat.chat_completion_message_tool_call import (
+        ChatCompletionMessageToolCall,
+        Function,
+    )
+
+# importing openai takes most of a second, so its types load on first use
+__OPENAI_TYPES__ = {
+    "ChatCompletionMessage": "openai.types.chat",
+    "ChatCompletionMessageToolCall": "openai.types.chat.chat_completion_message_tool_call",
+    "Function": "openai.types.chat.chat_completion_message_tool_call",
+}
+
 AgentFunction = Callable[[], Union[str, "Agent", dict]]
 
 
+def __getattr__(name: str):
+    module = __OPENAI_TYPES__.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
 class Agent(BaseModel):
     name: str = "Agent"
     model: str = "gpt-4o"
@@ -18,12 +38,74 @@ class Agent(BaseModel):
     functions: List[AgentFunction] = []
     tool_choice: str = None
     parallel_tool_calls: bool = True
+    # start each streamed tool call as soon as its arguments are complete,
+    # while the rest of the completion streams (needs parallel_tool_calls)
+    speculative_tool_calls: bool = False
+    hedge_policy: Optional[Any] = None
+
+
+class UsageStats(BaseModel):
+    """
+    Token and time accounting for completions and tool calls.
+
+    Attributes:
+        completions (int): Completions received.
+        prompt_tokens (int): Prompt tokens reported by the API.
+        completion_tokens (int): Completion tokens reported by the API.
+        cached_tokens (int): Prompt tokens served from the API's prompt cache.
+        model_time (float): Seconds spent waiting for completions.
+        tool_time (float): Seconds spent running tool calls.
+    """
+
+    completions: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    model_time: float = 0.0
+    tool_time: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add_completion(self, latency: float, usage: Optional[Any]) -> None:
+        self.completions += 1
+        self.model_time += latency
+        if usage is None:
+            return
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.completion_tokens += usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_tokens += getattr(details, "cached_tokens", None) or 0
+
+
+class RunUsage(UsageStats):
+    """UsageStats for a whole run, plus a breakdown by agent name."""
+
+    agents: Dict[str, UsageStats] = {}
+
+    def _for_agent(self, name: str) -> UsageStats:
+        if name not in self.agents:
+            self.agents[name] = UsageStats()
+        return self.agents[name]
+
+    def add_completion(
+        self, latency: float, usage: Optional[Any], agent_name: str = None
+    ) -> None:
+        super().add_completion(latency, usage)
+        self._for_agent(agent_name).add_completion(latency, usage)
+
+    def add_tool_time(self, seconds: float, agent_name: str = None) -> None:
+        self.tool_time += seconds
+        self._for_agent(agent_name).tool_time += seconds
 
 
 class Response(BaseModel):
     messages: List = []
     agent: Optional[Agent] = None
     context_variables: dict = {}
+    deadline_exceeded: bool = False
+    usage: RunUsage = RunUsage()
 
 
 class Result(BaseModel):
@@ -1,6 +1,13 @@
+import asyncio
 import inspect
+import json
+import threading
+from concurrent.futures import Future
 from datetime import datetime
 
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
 
 def debug_print(debug: bool, *args: str) -> None:
     if not debug:
@@ -10,6 +17,51 @@ def debug_print(debug: bool, *args: str) -> None:
     print(f"\033[97m[\033[90m{timestamp}\033[97m]\033[90m {message}\033[0m")
 
 
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns a process-wide event loop running in a daemon thread, starting it
+    on first use. Synchronous code uses it to run coroutines without spinning
+    up a new loop per call.
+    """
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="swarm-loop", daemon=True
+                ).start()
+                _background_loop = loop
+    return _background_loop
+
+
+def run_coroutine_sync(coro):
+    """Runs a coroutine on the background loop and blocks for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result()
+
+
+def run_in_daemon_thread(fn, args: tuple = (), kwargs: dict = None, name: str = None) -> Future:
+    """
+    Runs fn on a new daemon thread and returns a Future for its result.
+
+    For work that may be abandoned when it runs late: the thread belongs to
+    no pool, so a call that never returns doesn't take a worker from
+    anything else, and it doesn't keep the interpreter from exiting.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **(kwargs or {})))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
 def merge_fields(target, source):
     for key, value in source.items():
         if isinstance(value, str):
@@ -28,6 +80,108 @@ def merge_chunk(final_response: dict, delta: dict) -> None:
         merge_fields(final_response["tool_calls"][index], tool_calls[0])
 
 
+class StreamAccumulator:
+    """
+    Builds an assistant message from streamed completion deltas.
+
+    Content and tool-call argument fragments are kept in lists and joined
+    once in `message()`, and deltas are read attribute by attribute rather
+    than round-tripped through JSON, so the cost per chunk stays constant.
+    """
+
+    __slots__ = ("role", "content", "tool_calls")
+
+    def __init__(self):
+        self.role = "assistant"
+        self.content = []
+        # index -> [id, type, name fragments, argument fragments]
+        self.tool_calls = {}
+
+    def add(self, delta, sender: str = None) -> dict:
+        """
+        Merges one ChoiceDelta and returns it as a streaming event dict with
+        the same keys the delta's JSON form has, plus `sender` on the first
+        assistant chunk.
+        """
+        role = delta.role
+        if role:
+            self.role = role
+        content = delta.content
+        if content:
+            self.content.append(content)
+
+        tool_call_events = None
+        if delta.tool_calls:
+            tool_call_events = []
+            for tool_call in delta.tool_calls:
+                entry = self.tool_calls.get(tool_call.index)
+                if entry is None:
+                    entry = self.tool_calls[tool_call.index] = ["", "", [], []]
+                function = tool_call.function
+                name = function.name if function else None
+                arguments = function.arguments if function else None
+                if tool_call.id:
+                    entry[0] = tool_call.id
+                if tool_call.type:
+                    entry[1] = tool_call.type
+                if name:
+                    entry[2].append(name)
+                if arguments:
+                    entry[3].append(arguments)
+                tool_call_events.append(
+                    {
+                        "index": tool_call.index,
+                        "id": tool_call.id,
+                        "function": {"arguments": arguments, "name": name},
+                        "type": tool_call.type,
+                    }
+                )
+
+        event = {
+            "content": content,
+            "function_call": None,
+            "refusal": getattr(delta, "refusal", None),
+            "role": role,
+            "tool_calls": tool_call_events,
+        }
+        if role == "assistant":
+            event["sender"] = sender
+        return event
+
+    def tool_call_dict(self, index: int) -> dict:
+        tool_call_id, tool_call_type, name, arguments = self.tool_calls[index]
+        return {
+            "function": {"arguments": "".join(arguments), "name": "".join(name)},
+            "id": tool_call_id,
+            "type": tool_call_type,
+        }
+
+    def tool_call_dicts(self) -> list:
+        return [self.tool_call_dict(index) for index in sorted(self.tool_calls)]
+
+    def arguments_complete(self, index: int) -> bool:
+        """Whether tool call `index`'s arguments already form a whole JSON object."""
+        arguments = self.tool_calls[index][3]
+        # only try parsing once a fragment ends the way a whole object does
+        if not arguments or not arguments[-1].rstrip().endswith("}"):
+            return False
+        try:
+            json.loads("".join(arguments))
+        except ValueError:
+            return False
+        return True
+
+    def message(self, sender: str = None) -> dict:
+        """Returns the accumulated message in the shape Swarm stores in history."""
+        return {
+            "content": "".join(self.content),
+            "sender": sender,
+            "role": "assistant",
+            "function_call": None,
+            "tool_calls": self.tool_call_dicts() or None,
+        }
+
+
 def function_to_json(func) -> dict:
     """
     Converts a Python function into a JSON-serializable dictionary
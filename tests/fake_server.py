@@ -0,0 +1,279 @@
+"""
+A local stand-in for the OpenAI chat.completions endpoint, for end-to-end
+tests and benchmarks that should go through the real HTTP client.
+
+The default responder calls every offered tool that the conversation has
+not called yet (all in one parallel batch) and otherwise answers with
+`response_tokens` words of text, so agents with tools run one tool round
+and handoff chains follow every transfer_to_* function in turn.
+
+Run it standalone with `python -m tests.fake_server --port 8000` and point a
+client at http://127.0.0.1:8000/v1.
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Union
+
+Seconds = Union[float, Callable[[], float]]
+
+_PLACEHOLDERS = {
+    "string": "x",
+    "integer": 0,
+    "number": 0,
+    "boolean": False,
+    "array": [],
+    "object": {},
+}
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Callable[[], float]:
+    """Samples with the given median and a long right tail, like real latencies."""
+    if median <= 0:
+        return lambda: 0.0
+    mu = math.log(median)
+    return lambda: random.lognormvariate(mu, sigma)
+
+
+def _sample(value: Optional[Seconds]) -> float:
+    if value is None:
+        return 0.0
+    return value() if callable(value) else value
+
+
+def _placeholder_args(tool: dict) -> dict:
+    parameters = tool["function"].get("parameters") or {}
+    properties = parameters.get("properties") or {}
+    return {
+        name: _PLACEHOLDERS.get(properties.get(name, {}).get("type"), "x")
+        for name in parameters.get("required") or []
+    }
+
+
+def default_responder(request: dict, response_tokens: int = 20) -> dict:
+    called = {
+        tool_call["function"]["name"]
+        for message in request["messages"]
+        for tool_call in message.get("tool_calls") or []
+    }
+    pending = [
+        tool
+        for tool in request.get("tools") or []
+        if tool["function"]["name"] not in called
+    ]
+    if pending:
+        return {
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {
+                        "name": tool["function"]["name"],
+                        "arguments": json.dumps(_placeholder_args(tool)),
+                    },
+                }
+                for tool in pending
+            ],
+        }
+    return {"content": " ".join(["token"] * response_tokens), "tool_calls": None}
+
+
+def _count_tokens(request: dict) -> int:
+    return sum(len(json.dumps(m)) for m in request["messages"]) // 4
+
+
+class FakeOpenAIServer:
+    """
+    Threaded HTTP server answering POST /v1/chat/completions.
+
+    Args:
+        host, port: Address to listen on; port 0 picks a free port.
+        latency: Seconds before the first token (or the whole response when
+            not streaming); a number or a callable sampled per request,
+            e.g. lognormal(0.2).
+        tokens_per_second: Streaming rate for the remaining tokens, a number
+            or a callable; None streams as fast as possible.
+        responder: Maps the request body to the assistant message dict
+            ({"content", "tool_calls"}); defaults to default_responder.
+
+    Use as a context manager, or call start() and stop().
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[Seconds] = None,
+        tokens_per_second: Optional[Seconds] = None,
+        responder: Callable[[dict], dict] = default_responder,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.responder = responder
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="fake-openai", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                with server._lock:
+                    server.requests += 1
+                message = server.responder(request)
+                if request.get("stream"):
+                    server._stream(self, request, message)
+                else:
+                    server._complete(self, request, message)
+
+        return Handler
+
+    def _usage(self, request: dict, message: dict) -> dict:
+        prompt = _count_tokens(request)
+        completion = len(json.dumps(message)) // 4
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+        }
+
+    def _complete(self, handler, request: dict, message: dict) -> None:
+        time.sleep(_sample(self.latency))
+        body = json.dumps(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", **message},
+                        "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                    }
+                ],
+                "usage": self._usage(request, message),
+            }
+        ).encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _stream(self, handler, request: dict, message: dict) -> None:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def chunk(delta: dict, finish_reason=None, usage=None) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": request["model"],
+                "choices": [] if usage else [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                "usage": usage,
+            }
+
+        def send(payload: str) -> None:
+            data = f"data: {payload}\n\n".encode()
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            handler.wfile.flush()
+
+        deltas = [{"role": "assistant", "content": ""}]
+        words = (message.get("content") or "").split(" ")
+        deltas += [
+            {"content": word if i == 0 else " " + word}
+            for i, word in enumerate(words)
+            if word
+        ]
+        for index, tool_call in enumerate(message.get("tool_calls") or []):
+            deltas.append({"tool_calls": [{"index": index, **tool_call}]})
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        time.sleep(_sample(self.latency))
+        rate = _sample(self.tokens_per_second)
+        for i, delta in enumerate(deltas):
+            if rate and i > 1:
+                time.sleep(1.0 / rate)
+            send(json.dumps(chunk(delta)))
+        send(json.dumps(chunk({}, "tool_calls" if message.get("tool_calls") else "stop")))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send(json.dumps(chunk({}, usage=self._usage(request, message))))
+        send("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="median seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        args.host,
+        args.port,
+        latency=lognormal(args.latency) if args.latency else None,
+        tokens_per_second=args.tokens_per_second,
+    )
+    print(server.base_url, flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
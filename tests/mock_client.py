@@ -1,7 +1,14 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from swarm.types import ChatCompletionMessage, ChatCompletionMessageToolCall, Function
 from openai import OpenAI
 from openai.types.chat.chat_completion import ChatCompletion, Choice
+from openai.types.chat.chat_completion_chunk import (
+    ChatCompletionChunk,
+    Choice as ChunkChoice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
 import json
 
 
@@ -41,10 +48,80 @@ def create_mock_response(message, function_calls=[], model="gpt-4o"):
     )
 
 
+def create_mock_stream(message, function_calls=[], model="gpt-4o"):
+    """
+    Build the list of chunks a streamed completion would produce for the
+    given message: one chunk per word of content, then one per tool call.
+    """
+
+    def chunk(delta):
+        return ChatCompletionChunk(
+            id="mock_cc_id",
+            created=1234567890,
+            model=model,
+            object="chat.completion.chunk",
+            choices=[ChunkChoice(delta=delta, index=0, finish_reason=None)],
+        )
+
+    chunks = [chunk(ChoiceDelta(role=message.get("role", "assistant")))]
+    for word in message.get("content", "").split(" "):
+        if word:
+            chunks.append(chunk(ChoiceDelta(content=word + " ")))
+    for index, call in enumerate(function_calls):
+        chunks.append(
+            chunk(
+                ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=index,
+                            id=f"mock_tc_id_{index}",
+                            type="function",
+                            function=ChoiceDeltaToolCallFunction(
+                                name=call.get("name", ""),
+                                arguments=json.dumps(call.get("args", {})),
+                            ),
+                        )
+                    ]
+                )
+            )
+        )
+    return chunks
+
+
+class MockAsyncStream:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class MockRawResponse:
+    """What `with_raw_response.create` returns: headers plus the parsed result."""
+
+    def __init__(self, result, headers: dict):
+        self.result = result
+        self.headers = headers
+
+    def parse(self):
+        return self.result
+
+
 class MockOpenAIClient:
     def __init__(self):
         self.chat = MagicMock()
         self.chat.completions = MagicMock()
+        # headers returned with every raw response
+        self.response_headers = {}
+        self.chat.completions.with_raw_response.create = self._create_raw
+
+    def _create_raw(self, **kwargs):
+        result = self.chat.completions.create(**kwargs)
+        return MockRawResponse(result, self.response_headers)
 
     def set_response(self, response: ChatCompletion):
         """
@@ -64,6 +141,17 @@ class MockOpenAIClient:
         self.chat.completions.create.assert_called_with(**kwargs)
 
 
+class MockAsyncOpenAIClient(MockOpenAIClient):
+    def __init__(self):
+        super().__init__()
+        self.chat.completions.create = AsyncMock()
+        self.chat.completions.with_raw_response.create = self._acreate_raw
+
+    async def _acreate_raw(self, **kwargs):
+        result = await self.chat.completions.create(**kwargs)
+        return MockRawResponse(result, self.response_headers)
+
+
 # Initialize the mock client
 client = MockOpenAIClient()
 
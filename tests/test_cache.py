@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.cache import CompletionCache, MemoryCache, SQLiteCache, completion_cache_key
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+def test_cache_key_ignores_stream_and_is_stable():
+    params = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hi"}],
+        "tools": None,
+        "tool_choice": None,
+    }
+    assert completion_cache_key({**params, "stream": True}) == completion_cache_key(
+        dict(reversed(list(params.items())))
+    )
+    assert completion_cache_key(params) != completion_cache_key(
+        {**params, "model": "gpt-4o-mini"}
+    )
+
+
+def test_cache_subclass_must_implement_get_and_set():
+    class GetOnly(CompletionCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_memory_cache_lru_and_ttl():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", {"content": "a"})
+    cache.set("b", {"content": "b"})
+    cache.get("a")
+    cache.set("c", {"content": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"content": "a"}
+
+    expired = MemoryCache(ttl=0)
+    expired.set("a", {"content": "a"})
+    assert expired.get("a") is None
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "completions.db")
+    cache = SQLiteCache(path)
+    cache.set("a", {"content": "a"})
+    cache.close()
+
+    assert SQLiteCache(path).get("a") == {"content": "a"}
+    assert SQLiteCache(path, ttl=0).get("a") is None
+
+
+def test_cached_run_skips_client():
+    client = MockOpenAIClient()
+    client.set_response(
+        create_mock_response(
+            {"role": "assistant", "content": ""},
+            [{"name": "get_weather", "args": {"location": "Rome"}}],
+        )
+    )
+    swarm = Swarm(client=client, cache=MemoryCache())
+
+    def get_weather(location):
+        return "sunny"
+
+    agent = Agent(functions=[get_weather])
+    messages = [{"role": "user", "content": "Weather in Rome?"}]
+    first = swarm.run(agent=agent, messages=messages, execute_tools=False)
+    second = swarm.run(agent=agent, messages=messages, execute_tools=False)
+
+    assert client.chat.completions.create.call_count == 1
+    assert first.messages == second.messages
+
+    # a streamed run of the same request replays from the cache too
+    chunks = list(
+        swarm.run(agent=agent, messages=messages, execute_tools=False, stream=True)
+    )
+    assert client.chat.completions.create.call_count == 1
+    streamed = chunks[-1]["response"].messages[-1]
+    assert streamed["tool_calls"][0]["function"]["name"] == "get_weather"
+    assert streamed["tool_calls"][0]["id"] == first.messages[-1]["tool_calls"][0]["id"]
+
+
+def test_streamed_miss_is_recorded():
+    client = MockOpenAIClient()
+    client.set_response(
+        iter(create_mock_stream({"role": "assistant", "content": "hello there"}))
+    )
+    swarm = Swarm(client=client, cache=MemoryCache())
+    messages = [{"role": "user", "content": "Hi"}]
+
+    list(swarm.run(agent=Agent(), messages=messages, stream=True))
+    response = swarm.run(agent=Agent(), messages=messages)
+
+    assert client.chat.completions.create.call_count == 1
+    assert response.messages[-1]["content"] == "hello there "
+
+
+def test_async_cached_stream():
+    client = MockAsyncOpenAIClient()
+    client.set_response(
+        MockAsyncStream(create_mock_stream({"role": "assistant", "content": "hi"}))
+    )
+    swarm = AsyncSwarm(client=client, cache=MemoryCache())
+    messages = [{"role": "user", "content": "Hi"}]
+
+    async def collect():
+        stream = await swarm.run(agent=Agent(), messages=messages, stream=True)
+        return [chunk async for chunk in stream]
+
+    first = asyncio.run(collect())
+    second = asyncio.run(collect())
+
+    assert client.chat.completions.create.call_count == 1
+    assert first[-1]["response"].messages == second[-1]["response"].messages
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from swarm import AsyncSwarm, Swarm
+from swarm.clients import (
+    awarm_up,
+    configure_clients,
+    get_async_client,
+    get_client,
+    warm_up,
+)
+from tests.fake_server import FakeOpenAIServer
+
+
+def test_client_is_shared_and_configured_once():
+    client = get_client("test-shared", api_key="fake", timeout=30, max_retries=1)
+
+    assert get_client("test-shared", timeout=5) is client
+    assert client.timeout.read == 30
+    assert client.max_retries == 1
+
+
+def test_swarm_defaults_to_shared_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+
+    assert Swarm().client is Swarm().client is get_client()
+
+
+def test_async_client_is_shared_per_event_loop():
+    get_client("test-async", api_key="fake", timeout=30)
+
+    async def clients():
+        return get_async_client("test-async"), get_async_client("test-async")
+
+    first, again = asyncio.run(clients())
+    other, _ = asyncio.run(clients())
+
+    assert first is again
+    assert first is not other
+    assert first.timeout.read == 30
+    assert get_async_client("test-async") is not get_async_client("test-async")
+
+
+def test_client_keeps_openai_defaults_for_options_not_given():
+    client = get_client("test-defaults", api_key="fake", max_connections=500)
+    pool = client._client._transport._pool
+
+    assert pool._max_connections == 500
+    assert pool._max_keepalive_connections == 100
+    assert pool._keepalive_expiry == 5.0
+
+
+def test_configured_options_are_fixed_once_decided():
+    configure_clients("test-configured", api_key="fake", timeout=30)
+    configure_clients("test-configured", api_key="fake", timeout=30)
+
+    assert get_client("test-configured", timeout=5).timeout.read == 30
+    with pytest.raises(RuntimeError):
+        configure_clients("test-configured", api_key="fake", timeout=60)
+    get_client("test-unconfigured", api_key="fake")
+    with pytest.raises(RuntimeError):
+        configure_clients("test-unconfigured", api_key="fake", timeout=60)
+
+
+def test_async_swarm_made_before_the_loop_shares_its_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    first, second = AsyncSwarm(), AsyncSwarm()
+
+    async def clients():
+        return first.client, second.client, get_async_client()
+
+    assert len({id(client) for client in asyncio.run(clients())}) == 1
+
+
+def test_warm_up_opens_connections():
+    with FakeOpenAIServer() as server:
+        client = get_client("test-warm", api_key="fake", base_url=server.base_url)
+        assert warm_up(client, connections=3) == 3
+
+        async def warm_async():
+            swarm = AsyncSwarm(client=get_async_client("test-warm"))
+            return await swarm.warm_up(connections=2)
+
+        assert asyncio.run(warm_async()) == 2
+
+
+def test_warm_up_reports_unreachable_server():
+    client = get_client(
+        "test-unreachable", api_key="fake", base_url="http://127.0.0.1:9", timeout=1
+    )
+    assert warm_up(client) == 0
+    assert asyncio.run(awarm_up(get_async_client("test-unreachable"))) == 0
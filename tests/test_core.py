@@ -1,6 +1,15 @@
+import asyncio
+import threading
 import pytest
-from swarm import Swarm, Agent
-from tests.mock_client import MockOpenAIClient, create_mock_response
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.types import Result
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
 from unittest.mock import Mock
 import json
 
@@ -143,3 +152,585 @@ def test_handoff(mock_openai_client: MockOpenAIClient):
     assert response.agent == agent2
     assert response.messages[-1]["role"] == "assistant"
     assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_run_and_stream_tool_call(mock_openai_client: MockOpenAIClient):
+    get_weather_mock = Mock()
+
+    def get_weather(location):
+        get_weather_mock(location=location)
+        return "It's sunny today."
+
+    agent = Agent(name="Test Agent", functions=[get_weather])
+    mock_openai_client.set_sequential_responses(
+        [
+            iter(
+                create_mock_stream(
+                    {"role": "assistant", "content": ""},
+                    [{"name": "get_weather", "args": {"location": "Paris"}}],
+                )
+            ),
+            iter(
+                create_mock_stream(
+                    {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+                )
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    messages = [{"role": "user", "content": "Weather in Paris?"}]
+    chunks = list(client.run(agent=agent, messages=messages, stream=True))
+    response = chunks[-1]["response"]
+
+    get_weather_mock.assert_called_once_with(location="Paris")
+    assert [m["role"] for m in response.messages] == ["assistant", "tool", "assistant"]
+    assert response.messages[-1]["content"].strip() == DEFAULT_RESPONSE_CONTENT
+    assert response.messages[-1]["sender"] == "Test Agent"
+
+
+@pytest.fixture
+def mock_async_openai_client():
+    m = MockAsyncOpenAIClient()
+    m.set_response(
+        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+    )
+    return m
+
+
+def test_async_run_with_simple_message(mock_async_openai_client):
+    client = AsyncSwarm(client=mock_async_openai_client)
+    messages = [{"role": "user", "content": "Hello, how are you?"}]
+    response = asyncio.run(client.run(agent=Agent(), messages=messages))
+
+    assert response.messages[-1]["role"] == "assistant"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_async_handoff_with_context_variables(mock_async_openai_client):
+    def transfer_to_agent2(context_variables):
+        return Result(agent=agent2, context_variables={"seen": True})
+
+    agent1 = Agent(name="Test Agent 1", functions=[transfer_to_agent2])
+    agent2 = Agent(name="Test Agent 2")
+    mock_async_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "transfer_to_agent2"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = AsyncSwarm(client=mock_async_openai_client)
+    messages = [{"role": "user", "content": "I want to talk to agent 2"}]
+    response = asyncio.run(client.run(agent=agent1, messages=messages))
+
+    assert response.agent == agent2
+    assert response.context_variables == {"seen": True}
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_async_run_and_stream(mock_async_openai_client):
+    mock_async_openai_client.set_response(
+        MockAsyncStream(
+            create_mock_stream({"role": "assistant", "content": "hello there"})
+        )
+    )
+    client = AsyncSwarm(client=mock_async_openai_client)
+    messages = [{"role": "user", "content": "Hi"}]
+
+    async def collect():
+        stream = await client.run(agent=Agent(), messages=messages, stream=True)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(collect())
+    assert chunks[0] == {"delim": "start"}
+    assert chunks[-2] == {"delim": "end"}
+    response = chunks[-1]["response"]
+    assert response.messages[-1]["content"] == "hello there "
+
+
+def test_parallel_tool_calls_run_concurrently(mock_openai_client: MockOpenAIClient):
+    # both tools must be inside the barrier at the same time to pass it
+    barrier = threading.Barrier(2, timeout=5)
+
+    def lookup_a():
+        barrier.wait()
+        return Result(value="a", context_variables={"key": "a", "a": 1})
+
+    def lookup_b():
+        barrier.wait()
+        return Result(value="b", context_variables={"key": "b", "b": 2})
+
+    agent = Agent(name="Test Agent", functions=[lookup_a, lookup_b])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "lookup_a"}, {"name": "lookup_b"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client, max_tool_workers=2)
+    messages = [{"role": "user", "content": "Look up a and b"}]
+    response = client.run(agent=agent, messages=messages)
+    client.close()
+
+    tool_messages = [m for m in response.messages if m["role"] == "tool"]
+    assert [m["content"] for m in tool_messages] == ["a", "b"]
+    assert response.context_variables == {"key": "b", "a": 1, "b": 2}
+
+
+def test_async_function_with_sync_runner(mock_openai_client: MockOpenAIClient):
+    async def get_weather(location):
+        await asyncio.sleep(0)
+        return f"It's sunny in {location}."
+
+    agent = Agent(name="Test Agent", functions=[get_weather])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "get_weather", "args": {"location": "Oslo"}}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    messages = [{"role": "user", "content": "Weather in Oslo?"}]
+    response = client.run(agent=agent, messages=messages)
+
+    assert response.messages[1]["content"] == "It's sunny in Oslo."
+
+
+def test_async_functions_run_concurrently(mock_async_openai_client):
+    started = []
+
+    async def lookup_a():
+        started.append("a")
+        # only finishes once lookup_b has started too
+        while len(started) < 2:
+            await asyncio.sleep(0)
+        return "a"
+
+    async def lookup_b():
+        started.append("b")
+        while len(started) < 2:
+            await asyncio.sleep(0)
+        return "b"
+
+    agent = Agent(name="Test Agent", functions=[lookup_a, lookup_b])
+    mock_async_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "lookup_a"}, {"name": "lookup_b"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = AsyncSwarm(client=mock_async_openai_client)
+    messages = [{"role": "user", "content": "Look up a and b"}]
+    response = asyncio.run(
+        asyncio.wait_for(client.run(agent=agent, messages=messages), timeout=5)
+    )
+
+    tool_messages = [m for m in response.messages if m["role"] == "tool"]
+    assert [m["content"] for m in tool_messages] == ["a", "b"]
+
+
+def test_async_runs_overlap_blocking_functions():
+    # each run's lookup only returns once the other run's has started, so
+    # they deadlock if either blocks the event loop
+    barrier = threading.Barrier(2, timeout=2)
+
+    def lookup():
+        barrier.wait()
+        return "found"
+
+    def new_client():
+        client = MockAsyncOpenAIClient()
+        client.set_sequential_responses(
+            [
+                create_mock_response(
+                    message={"role": "assistant", "content": ""},
+                    function_calls=[{"name": "lookup"}],
+                ),
+                create_mock_response(
+                    {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+                ),
+            ]
+        )
+        return client
+
+    agent = Agent(functions=[lookup], parallel_tool_calls=False)
+    messages = [{"role": "user", "content": "Look it up"}]
+
+    async def main():
+        runs = [
+            AsyncSwarm(client=new_client()).run(agent=agent, messages=messages)
+            for _ in range(2)
+        ]
+        return await asyncio.wait_for(asyncio.gather(*runs), timeout=5)
+
+    responses = asyncio.run(main())
+
+    assert [r.messages[1]["content"] for r in responses] == ["found", "found"]
+
+
+def test_compile_walks_handoffs_and_caches(mock_openai_client, monkeypatch):
+    import swarm.compiled
+
+    calls = []
+    real_function_to_json = swarm.compiled.function_to_json
+
+    def counting_function_to_json(func):
+        calls.append(func.__name__)
+        return real_function_to_json(func)
+
+    monkeypatch.setattr(swarm.compiled, "function_to_json", counting_function_to_json)
+
+    def lookup_order(order_id, context_variables):
+        return order_id
+
+    def transfer_to_agent2():
+        return agent2
+
+    agent2 = Agent(name="Test Agent 2", functions=[lookup_order])
+    agent1 = Agent(name="Test Agent 1", functions=[transfer_to_agent2])
+
+    client = Swarm(client=mock_openai_client)
+    compiled = client.compile(agent1)
+
+    assert compiled.handoffs == [agent2]
+    assert sorted(calls) == ["lookup_order", "transfer_to_agent2"]
+    schema = client._compile_functions(agent2.functions).tools[0]
+    assert schema["function"]["parameters"]["required"] == ["order_id"]
+
+    # running reuses the compiled schemas
+    client.run(agent=agent1, messages=[{"role": "user", "content": "Hi"}])
+    client.run(agent=agent1, messages=[{"role": "user", "content": "Hi"}])
+    assert len(calls) == 2
+
+    # changing an agent's functions recompiles it
+    def cancel_order(order_id):
+        return order_id
+
+    agent2.functions.append(cancel_order)
+    tools = client._compile_functions(agent2.functions).tools
+    assert [t["function"]["name"] for t in tools] == ["lookup_order", "cancel_order"]
+
+
+@pytest.mark.parametrize("copy_mode", ["deep", "shallow", "none"])
+def test_copy_mode(mock_openai_client: MockOpenAIClient, copy_mode):
+    def remember(context_variables):
+        return Result(value="ok", context_variables={"remembered": True})
+
+    agent = Agent(name="Test Agent", functions=[remember])
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "remember"}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    messages = [{"role": "user", "content": "Remember this"}]
+    context_variables = {"user": "ada"}
+    response = client.run(
+        agent=agent,
+        messages=messages,
+        context_variables=context_variables,
+        copy_mode=copy_mode,
+    )
+
+    # the caller's transcript is never appended to
+    assert len(messages) == 1
+    assert response.context_variables == {"user": "ada", "remembered": True}
+    if copy_mode == "none":
+        assert context_variables == {"user": "ada", "remembered": True}
+    else:
+        assert context_variables == {"user": "ada"}
+
+
+def test_unknown_copy_mode(mock_openai_client: MockOpenAIClient):
+    client = Swarm(client=mock_openai_client)
+    with pytest.raises(ValueError):
+        client.run(agent=Agent(), messages=[], copy_mode="cow")
+
+
+def test_session_keeps_state_between_turns(mock_openai_client: MockOpenAIClient):
+    def transfer_to_agent2():
+        return Result(agent=agent2, context_variables={"transferred": True})
+
+    agent1 = Agent(name="Test Agent 1", functions=[transfer_to_agent2])
+    agent2 = Agent(name="Test Agent 2")
+    mock_openai_client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "transfer_to_agent2"}],
+            ),
+            create_mock_response({"role": "assistant", "content": "first"}),
+            iter(create_mock_stream({"role": "assistant", "content": "second"})),
+        ]
+    )
+
+    client = Swarm(client=mock_openai_client)
+    session = client.session(agent1)
+    response = session.send("I want to talk to agent 2")
+
+    assert session.agent == agent2
+    assert session.context_variables == {"transferred": True}
+    assert len(response.messages) == 3
+    assert session.messages[0] == {"role": "user", "content": "I want to talk to agent 2"}
+
+    chunks = list(session.send("And again", stream=True))
+    response = chunks[-1]["response"]
+    assert [m["role"] for m in response.messages] == ["assistant"]
+    assert len(session.messages) == 6
+    assert session.messages[-1]["sender"] == "Test Agent 2"
+
+
+def test_async_session(mock_async_openai_client):
+    client = AsyncSwarm(client=mock_async_openai_client)
+    session = client.session(Agent())
+
+    async def converse():
+        await session.send("Hello")
+        return await session.send({"role": "user", "content": "Still there?"})
+
+    response = asyncio.run(converse())
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert [m["role"] for m in session.messages] == [
+        "user",
+        "assistant",
+        "user",
+        "assistant",
+    ]
+
+
+def _failing_instructions(context_variables):
+    raise RuntimeError("bad job")
+
+
+def test_run_many_isolates_errors(mock_openai_client: MockOpenAIClient):
+    jobs = [
+        {"agent": Agent(), "messages": [{"role": "user", "content": f"Hi {i}"}]}
+        for i in range(5)
+    ]
+    jobs[2]["agent"] = Agent(instructions=_failing_instructions)
+    progress = []
+
+    client = Swarm(client=mock_openai_client)
+    results = list(
+        client.run_many(
+            jobs,
+            max_concurrency=2,
+            on_progress=lambda done, total, result: progress.append((done, total)),
+        )
+    )
+
+    assert sorted(r.index for r in results) == [0, 1, 2, 3, 4]
+    failed = [r for r in results if not r.ok]
+    assert [r.index for r in failed] == [2]
+    assert isinstance(failed[0].error, RuntimeError)
+    assert all(
+        r.response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+        for r in results
+        if r.ok
+    )
+    assert progress == [(i, 5) for i in range(1, 6)]
+
+
+def test_async_run_many(mock_async_openai_client):
+    jobs = (
+        {"agent": Agent(), "messages": [{"role": "user", "content": f"Hi {i}"}]}
+        for i in range(4)
+    )
+    client = AsyncSwarm(client=mock_async_openai_client)
+
+    async def collect():
+        return [r async for r in client.run_many(jobs, max_concurrency=3, rate_limit=1000)]
+
+    results = asyncio.run(collect())
+    assert sorted(r.index for r in results) == [0, 1, 2, 3]
+    assert all(r.ok for r in results)
+
+
+def test_response_reports_usage_per_agent(mock_openai_client: MockOpenAIClient):
+    from openai.types.completion_usage import CompletionUsage, PromptTokensDetails
+
+    second_agent = Agent(name="Second")
+
+    def transfer():
+        return second_agent
+
+    responses = [
+        create_mock_response(
+            message={"role": "assistant", "content": ""},
+            function_calls=[{"name": "transfer", "args": {}}],
+        ),
+        create_mock_response(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+        ),
+    ]
+    responses[0].usage = CompletionUsage(
+        prompt_tokens=100,
+        completion_tokens=10,
+        total_tokens=110,
+        prompt_tokens_details=PromptTokensDetails(cached_tokens=64),
+    )
+    responses[1].usage = CompletionUsage(
+        prompt_tokens=120, completion_tokens=20, total_tokens=140
+    )
+    mock_openai_client.set_sequential_responses(responses)
+
+    client = Swarm(client=mock_openai_client)
+    response = client.run(
+        agent=Agent(name="First", functions=[transfer]),
+        messages=[{"role": "user", "content": "Hi"}],
+    )
+
+    usage = response.usage
+    assert (usage.completions, usage.total_tokens, usage.cached_tokens) == (2, 250, 64)
+    assert usage.agents["First"].prompt_tokens == 100
+    assert usage.agents["First"].tool_time > 0
+    assert usage.agents["Second"].completion_tokens == 20
+    assert usage.agents["Second"].tool_time == 0
+
+
+def test_stream_requests_and_reports_usage(mock_openai_client: MockOpenAIClient):
+    from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+    from openai.types.completion_usage import CompletionUsage
+
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+    )
+    chunks.append(
+        ChatCompletionChunk(
+            id="mock_cc_id",
+            created=1234567890,
+            model="gpt-4o",
+            object="chat.completion.chunk",
+            choices=[],
+            usage=CompletionUsage(prompt_tokens=7, completion_tokens=3, total_tokens=10),
+        )
+    )
+    mock_openai_client.chat.completions.create.return_value = iter(chunks)
+
+    client = Swarm(client=mock_openai_client)
+    events = list(
+        client.run(
+            agent=Agent(),
+            messages=[{"role": "user", "content": "Hi"}],
+            stream=True,
+        )
+    )
+
+    params = mock_openai_client.chat.completions.create.call_args.kwargs
+    assert params["stream_options"] == {"include_usage": True}
+    usage = events[-1]["response"].usage
+    assert (usage.completions, usage.prompt_tokens, usage.completion_tokens) == (1, 7, 3)
+    assert usage.model_time > 0
+
+
+@pytest.mark.parametrize("speculative", [True, False])
+def test_speculative_tool_calls_start_while_streaming(
+    mock_openai_client: MockOpenAIClient, speculative
+):
+    first_started = threading.Event()
+    seen_before_stream_end = []
+
+    def lookup(query):
+        if query == "first":
+            first_started.set()
+        return f"found {query}"
+
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": ""},
+        [{"name": "lookup", "args": {"query": "first"}},
+         {"name": "lookup", "args": {"query": "second"}}],
+    )
+
+    def slow_stream():
+        yield from chunks[:-1]
+        # the first call is complete here; give it a chance to start
+        seen_before_stream_end.append(first_started.wait(1 if speculative else 0.1))
+        yield chunks[-1]
+
+    mock_openai_client.chat.completions.create.side_effect = [
+        slow_stream(),
+        iter(create_mock_stream({"role": "assistant", "content": "done"})),
+    ]
+    client = Swarm(client=mock_openai_client)
+    agent = Agent(functions=[lookup], speculative_tool_calls=speculative)
+
+    events = list(
+        client.run(agent=agent, messages=[{"role": "user", "content": "Hi"}], stream=True)
+    )
+    client.close()
+
+    response = events[-1]["response"]
+    assert seen_before_stream_end == [speculative]
+    assert [m["content"] for m in response.messages[1:3]] == [
+        "found first",
+        "found second",
+    ]
+
+
+def test_async_speculative_tool_calls(mock_async_openai_client):
+    order = []
+
+    async def lookup(query):
+        order.append(f"tool {query}")
+        return f"found {query}"
+
+    chunks = create_mock_stream(
+        {"role": "assistant", "content": ""},
+        [{"name": "lookup", "args": {"query": "first"}},
+         {"name": "lookup", "args": {"query": "second"}}],
+    )
+
+    async def slow_stream():
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(0.01)
+        order.append("stream end")
+
+    mock_async_openai_client.chat.completions.create.side_effect = [
+        slow_stream(),
+        MockAsyncStream(create_mock_stream({"role": "assistant", "content": "done"})),
+    ]
+    client = AsyncSwarm(client=mock_async_openai_client)
+    agent = Agent(functions=[lookup], speculative_tool_calls=True)
+
+    async def run():
+        stream = client.run_and_stream(
+            agent=agent, messages=[{"role": "user", "content": "Hi"}]
+        )
+        return [event async for event in stream]
+
+    events = asyncio.run(run())
+
+    assert order == ["tool first", "tool second", "stream end"]
+    assert events[-1]["response"].messages[-1]["content"].strip() == "done"
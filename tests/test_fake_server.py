@@ -0,0 +1,91 @@
+import asyncio
+
+from openai import AsyncOpenAI, OpenAI
+
+from swarm import Swarm, AsyncSwarm, Agent
+from tests.fake_server import FakeOpenAIServer
+
+second_agent = Agent(name="Second")
+
+
+def get_weather(location: str):
+    return f"Sunny in {location}"
+
+
+def transfer_to_second():
+    return second_agent
+
+
+def tool_agent():
+    return Agent(name="First", functions=[get_weather, transfer_to_second])
+
+
+def test_run_over_http():
+    with FakeOpenAIServer() as server:
+        swarm = Swarm(client=OpenAI(base_url=server.base_url, api_key="fake"))
+        response = swarm.run(
+            agent=tool_agent(), messages=[{"role": "user", "content": "Hi"}]
+        )
+        swarm.close()
+
+    assert [m["role"] for m in response.messages] == [
+        "assistant",
+        "tool",
+        "tool",
+        "assistant",
+    ]
+    assert response.messages[1]["content"] == "Sunny in x"
+    assert response.agent.name == "Second"
+    assert response.usage.completions == 2 and response.usage.prompt_tokens > 0
+    assert server.requests == 2
+
+
+def test_stream_over_http():
+    with FakeOpenAIServer(tokens_per_second=1000) as server:
+        swarm = Swarm(client=OpenAI(base_url=server.base_url, api_key="fake"))
+        events = list(
+            swarm.run(
+                agent=tool_agent(),
+                messages=[{"role": "user", "content": "Hi"}],
+                stream=True,
+            )
+        )
+        swarm.close()
+
+    response = events[-1]["response"]
+    assert response.agent.name == "Second"
+    assert response.messages[-1]["content"].startswith("token token")
+    assert response.usage.completion_tokens > 0
+    assert sum(1 for e in events if "content" in e and e["content"]) == 20
+
+
+def test_async_stream_over_http():
+    async def run(server):
+        swarm = AsyncSwarm(client=AsyncOpenAI(base_url=server.base_url, api_key="fake"))
+        stream = swarm.run_and_stream(
+            agent=tool_agent(), messages=[{"role": "user", "content": "Hi"}]
+        )
+        return [event async for event in stream]
+
+    with FakeOpenAIServer() as server:
+        events = asyncio.run(run(server))
+
+    assert events[-1]["response"].agent.name == "Second"
+
+
+def test_rate_limited_runs_over_http():
+    from swarm.ratelimit import AdaptiveConcurrency, RateLimiter
+
+    limiter = RateLimiter(tokens_per_minute=100_000, concurrency=AdaptiveConcurrency())
+    with FakeOpenAIServer() as server:
+        swarm = Swarm(
+            client=OpenAI(base_url=server.base_url, api_key="fake"), rate_limiter=limiter
+        )
+        response = swarm.run(agent=tool_agent(), messages=[{"role": "user", "content": "Hi"}])
+        events = list(
+            swarm.run(agent=tool_agent(), messages=[{"role": "user", "content": "Hi"}], stream=True)
+        )
+        swarm.close()
+
+    assert response.agent.name == events[-1]["response"].agent.name == "Second"
+    assert limiter.concurrency.in_flight == 0
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.hedging import HedgePolicy
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+def slow_primary_client(release: threading.Event):
+    client = MockOpenAIClient()
+
+    def create(**params):
+        if params["model"] == "primary":
+            release.wait(5)
+            return create_mock_response({"role": "assistant", "content": "slow"})
+        return create_mock_response({"role": "assistant", "content": "fast"})
+
+    client.chat.completions.create.side_effect = create
+    return client
+
+
+def test_delay_follows_observed_latency_percentile():
+    policy = HedgePolicy(percentile=0.9, min_samples=10, initial_delay=3.0)
+    assert policy.current_delay() == 3.0
+    for latency in range(1, 11):
+        policy.record_latency(latency / 10)
+    assert policy.current_delay() == 1.0
+    assert HedgePolicy(delay=0.2).current_delay() == 0.2
+
+
+def test_slow_request_is_hedged_to_fallback_model():
+    release = threading.Event()
+    policy = HedgePolicy(delay=0.05, fallback_model="fallback")
+    swarm = Swarm(client=slow_primary_client(release))
+    agent = Agent(model="primary", hedge_policy=policy)
+
+    response = swarm.run(agent=agent, messages=[{"role": "user", "content": "Hi"}])
+    release.set()
+    swarm.close()
+
+    assert response.messages[-1]["content"] == "fast"
+    assert (policy.hedges_fired, policy.hedges_won) == (1, 1)
+
+
+def test_fast_request_is_not_hedged():
+    policy = HedgePolicy(delay=5, fallback_model="fallback")
+    client = MockOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    swarm = Swarm(client=client, hedge_policy=policy)
+
+    response = swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+    swarm.close()
+
+    assert response.messages[-1]["content"] == "ok"
+    assert policy.hedges_fired == 0
+    assert client.chat.completions.create.call_count == 1
+
+
+def test_concurrent_fast_requests_are_not_hedged():
+    # more runs at once than a default thread pool has workers
+    def create(**params):
+        time.sleep(0.03)
+        return create_mock_response({"role": "assistant", "content": "ok"})
+
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = create
+    policy = HedgePolicy(delay=0.1)
+    swarm = Swarm(client=client, hedge_policy=policy)
+
+    threads = [
+        threading.Thread(
+            target=swarm.run,
+            kwargs={"agent": Agent(), "messages": [{"role": "user", "content": "Hi"}]},
+        )
+        for _ in range(40)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    swarm.close()
+
+    assert policy.hedges_fired == 0
+    assert client.chat.completions.create.call_count == 40
+
+
+def test_streamed_hedge_waits_for_first_chunk():
+    def stalled_stream():
+        time.sleep(0.5)
+        yield from create_mock_stream({"role": "assistant", "content": "slow"})
+
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = lambda **params: (
+        stalled_stream()
+        if params["model"] == "primary"
+        else iter(create_mock_stream({"role": "assistant", "content": "fast"}))
+    )
+    policy = HedgePolicy(delay=0.05, fallback_model="fallback")
+    swarm = Swarm(client=client)
+    agent = Agent(model="primary", hedge_policy=policy)
+
+    chunks = list(swarm.run(agent=agent, messages=[], stream=True))
+    swarm.close()
+
+    assert chunks[-1]["response"].messages[-1]["content"] == "fast "
+    assert policy.hedges_won == 1
+
+
+def test_async_hedge_cancels_loser():
+    cancelled = []
+    client = MockAsyncOpenAIClient()
+
+    async def create(**params):
+        if params["model"] == "primary":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        return MockAsyncStream(create_mock_stream({"role": "assistant", "content": "fast"}))
+
+    client.chat.completions.create.side_effect = create
+    policy = HedgePolicy(delay=0.01, fallback_model="fallback")
+    swarm = AsyncSwarm(client=client)
+    agent = Agent(model="primary", hedge_policy=policy)
+
+    async def collect():
+        stream = await swarm.run(agent=agent, messages=[], stream=True)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(collect())
+    assert chunks[-1]["response"].messages[-1]["content"] == "fast "
+    assert cancelled == [True]
+    assert (policy.hedges_fired, policy.hedges_won) == (1, 1)
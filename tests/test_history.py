@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.history import (
+    MessageWindow,
+    SummarizeOldTurns,
+    TokenWindow,
+    TruncateToolOutputs,
+    estimate_tokens,
+)
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+)
+
+
+def tool_exchange(i, output="ok"):
+    return [
+        {"role": "user", "content": f"question {i}"},
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [
+                {
+                    "id": f"call_{i}",
+                    "type": "function",
+                    "function": {"name": "lookup", "arguments": "{}"},
+                }
+            ],
+        },
+        {"role": "tool", "tool_call_id": f"call_{i}", "content": output},
+        {"role": "assistant", "content": f"answer {i}"},
+    ]
+
+
+def test_message_window_never_starts_on_tool_result():
+    history = tool_exchange(0) + tool_exchange(1)
+    windowed = MessageWindow(max_messages=6).apply(history)
+
+    # the window would start on call_0's result, so that result is dropped too
+    assert windowed == history[3:]
+    assert MessageWindow(max_messages=10).apply(history) is history
+
+
+def test_windows_keep_a_trailing_multi_tool_exchange():
+    history = tool_exchange(0)[:2]
+    history[1]["tool_calls"].append(
+        {
+            "id": "call_0b",
+            "type": "function",
+            "function": {"name": "lookup", "arguments": "{}"},
+        }
+    )
+    history += [
+        {"role": "tool", "tool_call_id": "call_0", "content": "ok"},
+        {"role": "tool", "tool_call_id": "call_0b", "content": "ok"},
+    ]
+
+    # the results the model answers next keep the call that asked for them
+    assert MessageWindow(max_messages=2).apply(history) == history[1:]
+    assert TokenWindow(max_tokens=15).apply(history) == history[1:]
+
+
+def test_token_window_keeps_recent_messages_within_budget():
+    history = tool_exchange(0) + tool_exchange(1)
+    windowed = TokenWindow(max_tokens=20).apply(history)
+
+    assert windowed[0]["role"] != "tool"
+    assert windowed[-1] == history[-1]
+    assert len(windowed) < len(history)
+    assert sum(estimate_tokens(m) for m in windowed) <= 20
+
+    huge = [{"role": "user", "content": "x" * 1000}]
+    assert TokenWindow(max_tokens=10).apply(huge) == huge
+
+
+def test_truncate_tool_outputs_leaves_recent_and_input_untouched():
+    history = tool_exchange(0, "a" * 50) + tool_exchange(1, "b" * 50)
+    truncated = TruncateToolOutputs(max_chars=10, keep_recent=4).apply(history)
+
+    assert truncated[2]["content"] == "a" * 10 + "... [truncated 40 characters]"
+    assert truncated[6]["content"] == "b" * 50
+    assert history[2]["content"] == "a" * 50
+
+
+def test_summarize_old_turns_compacts_in_batches():
+    calls = []
+
+    def summarize(messages):
+        calls.append(messages)
+        return f"summary of {len(messages)}"
+
+    policy = SummarizeOldTurns(summarize, max_messages=6, keep_recent=2)
+    history = tool_exchange(0) + tool_exchange(1)
+
+    first = policy.apply(history)
+    assert first[0] == {
+        "role": "system",
+        "content": "Summary of the earlier conversation: summary of 7",
+    }
+    # the cut would land on a tool result, so it moves past it
+    assert first[1:] == history[7:]
+
+    # the summary is reused while the messages after it fit in max_messages
+    policy.apply(history)
+    history += tool_exchange(2)
+    assert policy.apply(history)[1:] == history[7:]
+    assert len(calls) == 1
+
+    # past that, only the summary and what was dropped since are summarized
+    history += tool_exchange(3)
+    compacted = policy.apply(history)
+    assert len(calls) == 2
+    assert calls[1][0]["content"].endswith("summary of 7")
+    assert calls[1][1:] == history[7:15]
+    assert compacted[1:] == history[15:]
+
+
+def test_summarize_old_turns_keeps_a_summary_per_conversation():
+    calls = []
+
+    def summarize(messages):
+        calls.append(len(messages))
+        return "summary"
+
+    policy = SummarizeOldTurns(summarize, max_messages=6, keep_recent=2)
+    first = tool_exchange(0) + tool_exchange(1)
+    second = tool_exchange(5) + tool_exchange(6)
+
+    # two sessions taking turns don't evict each other's summary
+    for _ in range(3):
+        policy.apply(first)
+        policy.apply(second)
+
+    assert calls == [7, 7]
+
+
+def test_swarm_applies_history_policy():
+    client = MockOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    swarm = Swarm(client=client, history_policy=[MessageWindow(max_messages=2)])
+
+    messages = tool_exchange(0) + [{"role": "user", "content": "latest"}]
+    response = swarm.run(agent=Agent(), messages=messages)
+
+    sent = client.chat.completions.create.call_args.kwargs["messages"]
+    assert [m["role"] for m in sent] == ["system", "assistant", "user"]
+    assert response.messages[-1]["content"] == "ok"
+
+
+def test_async_swarm_summarizes_off_the_event_loop():
+    other_ran = threading.Event()
+
+    def summarize(messages):
+        # only returns once a coroutine on the loop got to run meanwhile
+        assert other_ran.wait(2)
+        return "summary"
+
+    client = MockAsyncOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    policy = SummarizeOldTurns(summarize, max_messages=6, keep_recent=2)
+    swarm = AsyncSwarm(client=client, history_policy=policy)
+
+    async def main():
+        async def other():
+            other_ran.set()
+
+        run = swarm.run(agent=Agent(), messages=tool_exchange(0) + tool_exchange(1))
+        response, _ = await asyncio.gather(run, other())
+        return response
+
+    assert asyncio.run(main()).messages[-1]["content"] == "ok"
+    sent = client.chat.completions.create.call_args.kwargs["messages"]
+    assert sent[1]["content"].endswith("summary")
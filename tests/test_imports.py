@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+
+def test_import_swarm_does_not_load_openai():
+    code = "import sys, swarm; print('openai' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
+
+
+def test_openai_types_load_on_first_use():
+    from openai.types.chat import ChatCompletionMessage
+
+    from swarm import types
+
+    assert types.ChatCompletionMessage is ChatCompletionMessage
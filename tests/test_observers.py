@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.observers import RunProfiler, SwarmObserver
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+class RecordingObserver(SwarmObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_turn_start(self, agent, turn):
+        self.events.append(("turn", agent.name, turn))
+
+    def on_completion(self, agent, latency, time_to_first_token, usage):
+        self.events.append(("completion", agent.name, time_to_first_token is not None))
+
+    def on_tool_start(self, name, tool_call_id):
+        self.events.append(("tool_start", name))
+
+    def on_tool_end(self, name, tool_call_id, duration, result_size, error):
+        self.events.append(("tool_end", name, result_size))
+
+    def on_handoff(self, from_agent, to_agent):
+        self.events.append(("handoff", from_agent.name, to_agent.name))
+
+    def on_run_end(self, response, duration):
+        self.events.append(("run_end", response.agent.name))
+
+
+second_agent = Agent(name="Second")
+
+
+def transfer():
+    return second_agent
+
+
+def tool_then_answer():
+    return [
+        {
+            "message": {"role": "assistant", "content": ""},
+            "function_calls": [{"name": "transfer", "args": {}}],
+        },
+        {"message": {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}},
+    ]
+
+
+def test_observer_sees_turns_tools_and_handoffs():
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [create_mock_response(**step) for step in tool_then_answer()]
+    )
+    observer = RecordingObserver()
+    swarm = Swarm(client=client, observers=[observer])
+
+    swarm.run(
+        agent=Agent(name="First", functions=[transfer]),
+        messages=[{"role": "user", "content": "Hi"}],
+    )
+
+    assert observer.events == [
+        ("turn", "First", 0),
+        ("completion", "First", False),
+        ("tool_start", "transfer"),
+        ("tool_end", "transfer", len('{"assistant": "Second"}')),
+        ("handoff", "First", "Second"),
+        ("turn", "Second", 1),
+        ("completion", "Second", False),
+        ("run_end", "Second"),
+    ]
+
+
+def test_streamed_completion_reports_time_to_first_token():
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = [
+        MockAsyncStream(create_mock_stream(**step)) for step in tool_then_answer()
+    ]
+    observer = RecordingObserver()
+    swarm = AsyncSwarm(client=client, observers=[observer])
+
+    async def run():
+        stream = swarm.run_and_stream(
+            agent=Agent(name="First", functions=[transfer]),
+            messages=[{"role": "user", "content": "Hi"}],
+        )
+        return [chunk async for chunk in stream]
+
+    asyncio.run(run())
+
+    completions = [e for e in observer.events if e[0] == "completion"]
+    assert completions == [("completion", "First", True), ("completion", "Second", True)]
+    assert observer.events[-1] == ("run_end", "Second")
+
+
+def test_profiler_splits_model_and_tool_time():
+    def slow_tool():
+        time.sleep(0.05)
+        return "done"
+
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "slow_tool", "args": {}}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+    profiler = RunProfiler()
+    swarm = Swarm(client=client, observers=[profiler])
+
+    swarm.run(
+        agent=Agent(functions=[slow_tool]),
+        messages=[{"role": "user", "content": "Hi"}],
+    )
+
+    assert (profiler.runs, profiler.turns) == (1, 2)
+    assert profiler.tool_time >= 0.05
+    assert profiler.run_time >= profiler.tool_time + profiler.model_time
+    assert profiler.overhead >= 0
@@ -0,0 +1,235 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.ratelimit import (
+    AdaptiveConcurrency,
+    RateLimiter,
+    TokenBucket,
+    _parse_reset,
+    get_rate_limiter,
+)
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers=headers)
+
+
+def test_token_bucket_serves_in_order():
+    bucket = TokenBucket(per_minute=60)  # one token per second, capacity 60
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2.0, abs=0.05)
+
+
+def test_adaptive_concurrency_aimd():
+    controller = AdaptiveConcurrency(initial=8, max_limit=9, cooldown=60)
+    controller.acquire()
+    controller.release(throttled=True)
+    assert controller.limit == 4
+    # a second 429 inside the cooldown doesn't halve again
+    controller.acquire()
+    controller.release(throttled=True)
+    assert controller.limit == 4
+
+    for _ in range(100):
+        controller.acquire()
+        controller.release()
+    assert controller.limit == 9
+    assert controller.in_flight == 0
+
+
+def test_sync_run_stops_waiting_for_the_limiter_at_its_deadline():
+    client = MockOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    concurrency = AdaptiveConcurrency(initial=1)
+    limiter = RateLimiter(requests_per_minute=60, concurrency=concurrency)
+    swarm = Swarm(client=client, rate_limiter=limiter)
+    concurrency.acquire()  # another request holds the only slot
+
+    started = time.monotonic()
+    response = swarm.run(agent=Agent(), messages=[], timeout=0.1)
+
+    assert time.monotonic() - started < 1
+    assert response.deadline_exceeded
+    assert client.chat.completions.create.call_count == 0
+    # the abandoned waiter is gone and the request it reserved is given back
+    assert not concurrency._waiters
+    assert limiter.requests.reserve(0) == 0
+    concurrency.release()
+    assert concurrency.in_flight == 0
+
+    # a wait for the buckets longer than the deadline isn't started at all
+    limiter.requests.reserve(60)
+    response = swarm.run(agent=Agent(), messages=[], timeout=0.1)
+    assert response.deadline_exceeded
+    assert time.monotonic() - started < 1
+
+
+def test_parse_reset():
+    assert _parse_reset("2") == 2.0
+    assert _parse_reset("1m30s") == 90.0
+    assert _parse_reset("250ms") == 0.25
+    assert _parse_reset(None) is None
+
+
+def test_rate_limited_error_drains_buckets_and_shrinks_concurrency():
+    limiter = RateLimiter(
+        requests_per_minute=600, concurrency=AdaptiveConcurrency(initial=4)
+    )
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = FakeRateLimitError({"retry-after": "3"})
+
+    with pytest.raises(FakeRateLimitError):
+        Swarm(client=client, rate_limiter=limiter).run(agent=Agent(), messages=[])
+
+    assert limiter.concurrency.limit == 2
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.requests.reserve(0) == pytest.approx(3.0, abs=0.1)
+
+
+def test_stream_holds_concurrency_slot_until_consumed():
+    limiter = RateLimiter(tokens_per_minute=100_000, concurrency=AdaptiveConcurrency())
+    client = MockOpenAIClient()
+    client.set_response(iter(create_mock_stream({"role": "assistant", "content": "hi"})))
+    swarm = Swarm(client=client, rate_limiter=limiter)
+
+    stream = swarm.run(agent=Agent(), messages=[], stream=True)
+    next(stream)
+    next(stream)
+    assert limiter.concurrency.in_flight == 1
+    list(stream)
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_abandoned_stream_releases_concurrency_slot():
+    limiter = RateLimiter(concurrency=AdaptiveConcurrency(initial=1))
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = lambda **params: iter(
+        create_mock_stream({"role": "assistant", "content": "hi"})
+    )
+    swarm = Swarm(client=client, rate_limiter=limiter)
+
+    stream = swarm.run(agent=Agent(), messages=[], stream=True)
+    assert next(stream) == {"delim": "start"}
+    stream.close()
+    assert limiter.concurrency.in_flight == 0
+
+    # the slot is free for the next request
+    events = list(swarm.run(agent=Agent(), messages=[], stream=True))
+    assert events[-1]["response"].messages[-1]["content"].strip() == "hi"
+
+
+def test_async_abandoned_stream_releases_concurrency_slot():
+    limiter = RateLimiter(concurrency=AdaptiveConcurrency(initial=1))
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = lambda **params: MockAsyncStream(
+        create_mock_stream({"role": "assistant", "content": "hi"})
+    )
+    swarm = AsyncSwarm(client=client, rate_limiter=limiter)
+
+    async def abandon():
+        stream = await swarm.run(agent=Agent(), messages=[], stream=True)
+        assert await stream.__anext__() == {"delim": "start"}
+        await stream.aclose()
+        return limiter.concurrency.in_flight
+
+    assert asyncio.run(abandon()) == 0
+
+
+def test_async_waiters_get_slots_in_arrival_order():
+    controller = AdaptiveConcurrency(initial=1, max_limit=1)
+
+    async def main():
+        await controller.aacquire()
+        order = []
+
+        async def waiter(i):
+            await controller.aacquire()
+            order.append(i)
+            await asyncio.sleep(0.01)
+            controller.release()
+
+        tasks = [asyncio.ensure_future(waiter(i)) for i in range(4)]
+        await asyncio.sleep(0.01)
+        tasks[1].cancel()
+        controller.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return order
+
+    assert asyncio.run(main()) == [0, 2, 3]
+    assert controller.in_flight == 0
+
+
+def test_stream_usage_corrects_token_estimate():
+    from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+    from openai.types.completion_usage import CompletionUsage
+
+    chunks = create_mock_stream({"role": "assistant", "content": "hi"})
+    chunks.append(
+        ChatCompletionChunk(
+            id="mock_cc_id",
+            created=1234567890,
+            model="gpt-4o",
+            object="chat.completion.chunk",
+            choices=[],
+            usage=CompletionUsage(prompt_tokens=1000, completion_tokens=0, total_tokens=1000),
+        )
+    )
+    limiter = RateLimiter(tokens_per_minute=100_000)
+    client = MockOpenAIClient()
+    client.set_response(iter(chunks))
+
+    list(Swarm(client=client, rate_limiter=limiter).run(agent=Agent(), messages=[], stream=True))
+
+    # the estimate was far below the 1000 tokens reported
+    assert limiter.tokens._level == pytest.approx(99_000, abs=5)
+
+
+def test_low_remaining_headers_shrink_concurrency_before_429():
+    limiter = RateLimiter(
+        tokens_per_minute=100_000, concurrency=AdaptiveConcurrency(initial=8)
+    )
+    client = MockOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    swarm = Swarm(client=client, rate_limiter=limiter)
+
+    client.response_headers = {
+        "x-ratelimit-limit-tokens": "100000",
+        "x-ratelimit-remaining-tokens": "50000",
+    }
+    swarm.run(agent=Agent(), messages=[])
+    assert limiter.concurrency.limit > 8
+    assert limiter.tokens._level <= 50_000
+
+    client.response_headers = {
+        "x-ratelimit-limit-tokens": "100000",
+        "x-ratelimit-remaining-tokens": "2000",
+    }
+    swarm.run(agent=Agent(), messages=[])
+    assert limiter.concurrency.limit < 8
+    assert limiter.tokens._level <= 2000
+
+
+def test_async_run_with_shared_limiter():
+    limiter = get_rate_limiter("test_async_run_with_shared_limiter", requests_per_minute=6000)
+    assert get_rate_limiter("test_async_run_with_shared_limiter") is limiter
+
+    client = MockAsyncOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    swarm = AsyncSwarm(client=client, rate_limiter=limiter)
+
+    response = asyncio.run(swarm.run(agent=Agent(), messages=[]))
+    assert response.messages[-1]["content"] == "ok"
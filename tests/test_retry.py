@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.retry import Deadline, RetryPolicy, is_retryable_error
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+)
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def test_retryable_errors():
+    assert is_retryable_error(StatusError(429))
+    assert is_retryable_error(StatusError(503))
+    assert not is_retryable_error(StatusError(400))
+    assert not is_retryable_error(ValueError("bad"))
+
+
+def test_backoff_is_capped_and_jittered():
+    policy = RetryPolicy(initial_backoff=1.0, max_backoff=4.0, jitter=0.0)
+    assert [policy.backoff(a) for a in range(4)] == [1.0, 2.0, 4.0, 4.0]
+    jittered = RetryPolicy(initial_backoff=1.0, max_backoff=4.0)
+    assert all(0 <= jittered.backoff(3) <= 4.0 for _ in range(50))
+
+
+def test_deadline_earliest():
+    run = Deadline(0.05)
+    assert Deadline.earliest(run, 10).expires_at == run.expires_at
+    assert Deadline.earliest(Deadline(), None).remaining() is None
+    time.sleep(0.06)
+    assert run.expired()
+
+
+def test_completion_is_retried():
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = [
+        StatusError(503),
+        StatusError(429),
+        create_mock_response(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+        ),
+    ]
+    swarm = Swarm(client=client, retry_policy=RetryPolicy(initial_backoff=0))
+
+    response = swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+    assert client.chat.completions.create.call_count == 3
+
+
+def test_non_retryable_error_is_raised():
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = StatusError(400)
+    swarm = Swarm(client=client, retry_policy=RetryPolicy(initial_backoff=0))
+
+    with pytest.raises(StatusError):
+        swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+    assert client.chat.completions.create.call_count == 1
+
+
+def test_tool_is_retried_on_listed_errors():
+    attempts = []
+
+    def flaky_tool():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("flaky")
+        return "done"
+
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "flaky_tool", "args": {}}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+    swarm = Swarm(
+        client=client,
+        retry_policy=RetryPolicy(initial_backoff=0, tool_errors=(ConnectionError,)),
+    )
+
+    response = swarm.run(
+        agent=Agent(functions=[flaky_tool]),
+        messages=[{"role": "user", "content": "Hi"}],
+    )
+
+    assert len(attempts) == 3
+    assert response.messages[1]["content"] == "done"
+
+
+def test_run_timeout_abandons_slow_tool():
+    release = threading.Event()
+
+    def slow_tool():
+        release.wait(5)
+        return "late"
+
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "slow_tool", "args": {}}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+    swarm = Swarm(client=client)
+
+    response = swarm.run(
+        agent=Agent(functions=[slow_tool]),
+        messages=[{"role": "user", "content": "Hi"}],
+        timeout=0.1,
+    )
+    release.set()
+    swarm.close()
+
+    assert response.deadline_exceeded
+    assert [m["role"] for m in response.messages] == ["assistant", "tool"]
+    assert "deadline exceeded" in response.messages[1]["content"]
+    assert client.chat.completions.create.call_count == 1
+
+
+def test_async_turn_timeout_stops_slow_completion():
+    client = MockAsyncOpenAIClient()
+
+    async def slow_create(**params):
+        await asyncio.sleep(5)
+
+    client.chat.completions.create.side_effect = slow_create
+    swarm = AsyncSwarm(client=client)
+
+    async def run():
+        return await swarm.run(
+            agent=Agent(),
+            messages=[{"role": "user", "content": "Hi"}],
+            turn_timeout=0.05,
+        )
+
+    started = time.monotonic()
+    response = asyncio.run(run())
+
+    assert time.monotonic() - started < 1
+    assert response.deadline_exceeded
+    assert response.messages == []
+    assert client.chat.completions.create.call_args.kwargs["timeout"] <= 0.05
@@ -0,0 +1,289 @@
+import asyncio
+import json
+
+from swarm import Agent, AsyncSwarm
+from swarm.server import SwarmApp
+from swarm.types import Result
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    create_mock_response,
+    create_mock_stream,
+)
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+async def request(app, method, path, body=None, headers=(), disconnect_after=None):
+    """Drives the ASGI app directly; returns (status, headers, body)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    incoming = [{"type": "http.request", "body": payload, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        if disconnect_after is not None:
+            await asyncio.sleep(disconnect_after)
+            return {"type": "http.disconnect"}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    await app(scope, receive, send)
+    if not sent:
+        return None, {}, b""
+    return (
+        sent[0]["status"],
+        dict(sent[0]["headers"]),
+        b"".join(m.get("body", b"") for m in sent[1:]),
+    )
+
+
+def parse_sse(body: bytes):
+    events = []
+    for block in body.decode().strip().split("\n\n"):
+        name, data = (line.split(": ", 1)[1] for line in block.split("\n"))
+        events.append((name, json.loads(data)))
+    return events
+
+
+def make_app(client, **kwargs):
+    return SwarmApp(
+        AsyncSwarm(client=client),
+        {"helper": Agent(name="helper"), "other": Agent(name="other")},
+        **kwargs,
+    )
+
+
+def test_session_keeps_history_between_messages():
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = [
+        create_mock_response({"role": "assistant", "content": "first"}),
+        create_mock_response({"role": "assistant", "content": "second"}),
+    ]
+    app = make_app(client)
+
+    async def conversation():
+        status, _, body = await request(app, "POST", "/sessions", {"agent": "other"})
+        assert status == 201
+        session_id = json.loads(body)["session_id"]
+        for message in ("Hi", "Again"):
+            status, _, body = await request(
+                app, "POST", f"/sessions/{session_id}/messages", {"message": message}
+            )
+            assert status == 200
+        reply = json.loads(body)
+        _, _, body = await request(app, "GET", f"/sessions/{session_id}")
+        return reply, json.loads(body)
+
+    reply, session = asyncio.run(conversation())
+
+    assert reply["agent"] == "other"
+    assert reply["messages"][-1]["content"] == "second"
+    assert [m["content"] for m in session["messages"]] == ["Hi", "first", "Again", "second"]
+    sent = client.chat.completions.create.call_args.kwargs["messages"]
+    assert [m["content"] for m in sent[1:]] == ["Hi", "first", "Again"]
+
+
+def test_stream_sends_server_sent_events():
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.return_value = MockAsyncStream(
+        create_mock_stream({"role": "assistant", "content": "hello there"})
+    )
+    app = make_app(client)
+
+    status, headers, body = asyncio.run(
+        request(
+            app,
+            "POST",
+            "/runs",
+            {"messages": [{"role": "user", "content": "Hi"}], "stream": True},
+        )
+    )
+
+    assert status == 200
+    assert headers[b"content-type"] == b"text/event-stream"
+    events = parse_sse(body)
+    names = [name for name, _ in events]
+    assert names[0] == "start" and names[-2:] == ["end", "response"]
+    content = "".join(data.get("content") or "" for name, data in events if name == "delta")
+    assert content.strip() == "hello there"
+    assert events[-1][1]["messages"][-1]["content"].strip() == "hello there"
+
+
+def test_client_disconnect_cancels_run():
+    cancelled = asyncio.Event()
+
+    async def slow_completion(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = slow_completion
+    app = make_app(client)
+
+    async def run():
+        result = await request(
+            app,
+            "POST",
+            "/runs",
+            {"messages": [{"role": "user", "content": "Hi"}]},
+            disconnect_after=0.05,
+        )
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return result
+
+    status, _, _ = asyncio.run(run())
+    assert status is None
+    assert cancelled.is_set()
+
+
+def test_busy_server_rejects_beyond_pending_limit():
+    release = asyncio.Event()
+
+    async def blocked_completion(**kwargs):
+        await release.wait()
+        return create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT})
+
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = blocked_completion
+    app = make_app(client, max_concurrency=1, max_pending=1)
+    body = {"messages": [{"role": "user", "content": "Hi"}]}
+
+    async def run():
+        running = asyncio.ensure_future(request(app, "POST", "/runs", body))
+        waiting = asyncio.ensure_future(request(app, "POST", "/runs", body))
+        await asyncio.sleep(0.02)
+        rejected = await request(app, "POST", "/runs", body)
+        release.set()
+        return rejected, await running, await waiting
+
+    rejected, running, waiting = asyncio.run(run())
+
+    assert rejected[0] == 503
+    assert rejected[1][b"retry-after"] == b"1"
+    assert running[0] == waiting[0] == 200
+
+
+def test_errors():
+    app = make_app(MockAsyncOpenAIClient())
+
+    async def run():
+        return [
+            await request(app, "POST", "/sessions/missing/messages", {"message": "Hi"}),
+            await request(app, "POST", "/runs", {"agent": "nobody"}),
+            await request(app, "GET", "/nowhere"),
+        ]
+
+    statuses = [status for status, _, _ in asyncio.run(run())]
+    assert statuses == [404, 400, 404]
+
+
+def test_cancelled_turn_is_dropped_from_session():
+    async def slow_lookup():
+        await asyncio.sleep(5)
+        return "found"
+
+    tool_call = {"role": "assistant", "content": ""}
+    calls = [{"name": "slow_lookup", "args": {}}]
+
+    client = MockAsyncOpenAIClient()
+    app = SwarmApp(AsyncSwarm(client=client), Agent(functions=[slow_lookup]))
+
+    async def conversation(stream):
+        client.chat.completions.create.side_effect = [
+            create_mock_response({"role": "assistant", "content": "first"})
+        ]
+        _, _, body = await request(app, "POST", "/sessions", {})
+        session_id = json.loads(body)["session_id"]
+        path = f"/sessions/{session_id}/messages"
+        await request(app, "POST", path, {"message": "Hi"})
+
+        client.chat.completions.create.side_effect = [
+            MockAsyncStream(create_mock_stream(tool_call, calls))
+            if stream
+            else create_mock_response(tool_call, calls)
+        ]
+        await request(
+            app,
+            "POST",
+            path,
+            {"message": "Look it up", "stream": stream},
+            disconnect_after=0.05,
+        )
+        _, _, body = await request(app, "GET", f"/sessions/{session_id}")
+        return json.loads(body)["messages"]
+
+    for stream in (False, True):
+        messages = asyncio.run(conversation(stream))
+        # no assistant tool call is left without its result
+        assert [m["content"] for m in messages] == ["Hi", "first"]
+
+
+def test_failed_run_answers_500_and_keeps_session():
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = RuntimeError("upstream broke")
+    app = make_app(client)
+
+    async def run():
+        _, _, body = await request(app, "POST", "/sessions", {})
+        session_id = json.loads(body)["session_id"]
+        reply = await request(
+            app, "POST", f"/sessions/{session_id}/messages", {"message": "Hi"}
+        )
+        _, _, body = await request(app, "GET", f"/sessions/{session_id}")
+        return reply, json.loads(body)["messages"]
+
+    (status, _, body), messages = asyncio.run(run())
+
+    assert status == 500
+    assert json.loads(body) == {"error": "upstream broke"}
+    assert messages == []
+
+
+def test_cancelled_turn_restores_context_and_agent():
+    other = Agent(name="other")
+
+    def transfer():
+        return Result(value="done", agent=other, context_variables={"order": "42"})
+
+    async def respond(**kwargs):
+        if len(kwargs["messages"]) > 2:
+            await asyncio.sleep(5)
+        return create_mock_response(
+            {"role": "assistant", "content": ""}, [{"name": "transfer", "args": {}}]
+        )
+
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = respond
+    app = SwarmApp(
+        AsyncSwarm(client=client),
+        {"helper": Agent(name="helper", functions=[transfer]), "other": other},
+    )
+
+    async def run():
+        _, _, body = await request(
+            app, "POST", "/sessions", {"context_variables": {"user": "ann"}}
+        )
+        session_id = json.loads(body)["session_id"]
+        await request(
+            app,
+            "POST",
+            f"/sessions/{session_id}/messages",
+            {"message": "Hi"},
+            disconnect_after=0.05,
+        )
+        _, _, body = await request(app, "GET", f"/sessions/{session_id}")
+        return json.loads(body)
+
+    session = asyncio.run(run())
+
+    assert session["messages"] == []
+    assert session["context_variables"] == {"user": "ann"}
+    assert session["agent"] == "helper"
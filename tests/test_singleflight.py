@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+
+from swarm import Swarm, AsyncSwarm, Agent
+from swarm.singleflight import SingleFlight
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockAsyncStream,
+    MockOpenAIClient,
+    create_mock_response,
+    create_mock_stream,
+)
+
+MESSAGES = [{"role": "user", "content": "I want a refund"}]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def run_concurrently(target, count):
+    results = [None] * count
+
+    def run(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_identical_requests_share_one_completion():
+    release = threading.Event()
+    single_flight = SingleFlight()
+
+    def create(**params):
+        release.wait(5)
+        return create_mock_response({"role": "assistant", "content": "refund issued"})
+
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = create
+    swarm = Swarm(client=client, single_flight=single_flight)
+
+    threads, responses = run_concurrently(
+        lambda: swarm.run(agent=Agent(), messages=MESSAGES), 3
+    )
+    wait_for(lambda: single_flight.shared == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert client.chat.completions.create.call_count == 1
+    assert [r.messages[-1]["content"] for r in responses] == ["refund issued"] * 3
+    assert (single_flight.leaders, single_flight.shared) == (1, 2)
+    # each caller got its own copy of the completion
+    assert len({id(r.messages[-1]) for r in responses}) == 3
+
+
+def test_different_requests_are_not_shared():
+    client = MockOpenAIClient()
+    client.set_response(create_mock_response({"role": "assistant", "content": "ok"}))
+    single_flight = SingleFlight()
+    swarm = Swarm(client=client, single_flight=single_flight)
+
+    swarm.run(agent=Agent(), messages=MESSAGES)
+    swarm.run(agent=Agent(), messages=MESSAGES)
+    swarm.run(agent=Agent(), messages=[{"role": "user", "content": "Hi"}])
+
+    assert client.chat.completions.create.call_count == 3
+    assert single_flight.shared == 0
+
+
+def test_stream_fans_out_to_every_subscriber():
+    release = threading.Event()
+    single_flight = SingleFlight()
+
+    def create(**params):
+        def chunks():
+            release.wait(5)
+            yield from create_mock_stream(
+                {"role": "assistant", "content": "your refund is on its way"}
+            )
+
+        return chunks()
+
+    client = MockOpenAIClient()
+    client.chat.completions.create.side_effect = create
+    swarm = Swarm(client=client, single_flight=single_flight)
+
+    def stream():
+        return list(swarm.run(agent=Agent(), messages=MESSAGES, stream=True))
+
+    threads, results = run_concurrently(stream, 3)
+    wait_for(lambda: single_flight.shared == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert client.chat.completions.create.call_count == 1
+    contents = [events[-1]["response"].messages[-1]["content"] for events in results]
+    assert contents[0].strip() == "your refund is on its way"
+    assert contents == [contents[0]] * 3
+
+
+def test_stream_is_closed_once_every_subscriber_leaves():
+    closed = []
+
+    def upstream():
+        try:
+            for i in range(100):
+                yield i
+        finally:
+            closed.append(True)
+
+    single_flight = SingleFlight()
+    first = single_flight.call("key", True, upstream)
+    second = single_flight.call("key", True, upstream)
+
+    assert [next(first), next(first)] == [0, 1]
+    assert next(second) == 0
+    first.close()
+    assert closed == []
+    second.close()
+    assert closed == [True]
+
+    # the next identical request goes upstream again
+    assert list(single_flight.call("key", True, lambda: iter([7]))) == [7]
+
+
+def test_async_requests_share_one_completion():
+    single_flight = SingleFlight()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def create(**params):
+            await release.wait()
+            return create_mock_response({"role": "assistant", "content": "refund issued"})
+
+        client = MockAsyncOpenAIClient()
+        client.chat.completions.create.side_effect = create
+        swarm = AsyncSwarm(client=client, single_flight=single_flight)
+        runs = [
+            asyncio.ensure_future(swarm.run(agent=Agent(), messages=MESSAGES))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        return client, await asyncio.gather(*runs)
+
+    client, responses = asyncio.run(main())
+
+    assert client.chat.completions.create.call_count == 1
+    assert [r.messages[-1]["content"] for r in responses] == ["refund issued"] * 3
+
+
+def test_async_stream_survives_a_cancelled_subscriber():
+    single_flight = SingleFlight()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def create(**params):
+            await release.wait()
+            return MockAsyncStream(
+                create_mock_stream({"role": "assistant", "content": "refund issued"})
+            )
+
+        client = MockAsyncOpenAIClient()
+        client.chat.completions.create.side_effect = create
+        swarm = AsyncSwarm(client=client, single_flight=single_flight)
+
+        async def stream():
+            events = await swarm.run(agent=Agent(), messages=MESSAGES, stream=True)
+            return [event async for event in events]
+
+        kept, cancelled = asyncio.ensure_future(stream()), asyncio.ensure_future(stream())
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return client, await kept
+
+    client, events = asyncio.run(main())
+
+    assert client.chat.completions.create.call_count == 1
+    assert events[-1]["response"].messages[-1]["content"].strip() == "refund issued"
+
+
+def test_cancelled_leader_hands_the_request_to_a_follower():
+    single_flight = SingleFlight()
+
+    async def main():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(5)
+
+        async def answer():
+            return "refund issued"
+
+        leader = asyncio.ensure_future(single_flight.acall("key", False, hang))
+        await started.wait()
+        follower = asyncio.ensure_future(single_flight.acall("key", False, answer))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.wait_for(follower, 1)
+
+    assert asyncio.run(main()) == "refund issued"
+    assert (single_flight.leaders, single_flight.shared) == (2, 1)
+
+
+def test_cancelled_follower_leaves_the_others_waiting():
+    single_flight = SingleFlight()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def request():
+            await release.wait()
+            return create_mock_response({"role": "assistant", "content": "refund issued"})
+
+        def answer():
+            raise AssertionError("followers should not go upstream")
+
+        leader = asyncio.ensure_future(single_flight.acall("key", False, request))
+        await asyncio.sleep(0)
+        cancelled, kept = (
+            asyncio.ensure_future(single_flight.acall("key", False, answer))
+            for _ in range(2)
+        )
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(leader, kept), 1), cancelled
+
+    results, cancelled = asyncio.run(main())
+
+    assert [r.choices[0].message.content for r in results] == ["refund issued"] * 2
+    assert cancelled.cancelled()
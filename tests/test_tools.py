@@ -0,0 +1,348 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from swarm import Swarm, AsyncSwarm, Agent, cacheable, run_in_process, tool_timeout
+from swarm.observers import RunProfiler
+from swarm.tools import ToolCache
+from swarm.types import Result
+from tests.mock_client import (
+    MockAsyncOpenAIClient,
+    MockOpenAIClient,
+    create_mock_response,
+)
+
+DEFAULT_RESPONSE_CONTENT = "sample response content"
+
+
+def tool_responses(name, calls):
+    return [
+        create_mock_response(
+            message={"role": "assistant", "content": ""},
+            function_calls=[{"name": name, "args": args} for args in calls],
+        ),
+        create_mock_response(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+        ),
+    ]
+
+
+def test_cache_hits_and_ttl():
+    cache = ToolCache(ttl=0.05)
+    calls = []
+
+    def invoke():
+        calls.append(1)
+        return "value"
+
+    assert cache.call({"x": 1}, invoke) == ("value", "miss")
+    assert cache.call({"x": 1}, invoke) == ("value", "hit")
+    assert cache.call({"x": 2}, invoke) == ("value", "miss")
+    time.sleep(0.06)
+    assert cache.call({"x": 1}, invoke) == ("value", "miss")
+    assert (cache.hits, cache.misses, len(calls)) == (1, 3, 3)
+
+
+def test_errors_are_not_cached():
+    cache = ToolCache()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.call({}, fail)
+    assert cache.call({}, lambda: "ok") == ("ok", "miss")
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    cache = ToolCache()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return "shared"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.call({"q": 1}, slow)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(cache.call({"q": 1}, slow)))
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(runs) == 1
+    assert sorted(results) == [("shared", "miss"), ("shared", "shared")]
+
+
+def test_async_cancelled_callers_do_not_break_shared_calls():
+    cache = ToolCache()
+
+    async def main():
+        release = asyncio.Event()
+        runs = []
+
+        async def slow():
+            runs.append(1)
+            await release.wait()
+            return "shared"
+
+        # a waiting call that gives up leaves the running call alone
+        leader = asyncio.ensure_future(cache.acall({"q": 1}, slow))
+        await asyncio.sleep(0)
+        cancelled, kept = (
+            asyncio.ensure_future(cache.acall({"q": 1}, slow)) for _ in range(2)
+        )
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        shared = await asyncio.wait_for(asyncio.gather(leader, kept), 1)
+
+        # a running call that is cancelled hands over to a waiting one
+        release.clear()
+        leader = asyncio.ensure_future(cache.acall({"q": 2}, slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.acall({"q": 2}, slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        return shared, await asyncio.wait_for(follower, 1), len(runs)
+
+    shared, took_over, runs = asyncio.run(main())
+
+    assert shared == [("shared", "miss"), ("shared", "shared")]
+    assert took_over == ("shared", "miss")
+    assert runs == 3
+
+
+def test_swarm_uses_cache_across_runs():
+    calls = []
+
+    @cacheable(maxsize=10)
+    def get_weather(location, context_variables):
+        calls.append(location)
+        return f"Sunny in {location}"
+
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        tool_responses("get_weather", [{"location": "Paris"}]) * 2
+    )
+    profiler = RunProfiler()
+    swarm = Swarm(client=client, observers=[profiler])
+    agent = Agent(functions=[get_weather])
+
+    for _ in range(2):
+        response = swarm.run(agent=agent, messages=[{"role": "user", "content": "Hi"}])
+        assert response.messages[1]["content"] == "Sunny in Paris"
+
+    assert calls == ["Paris"]
+    assert (get_weather.tool_cache.hits, get_weather.tool_cache.misses) == (1, 1)
+    assert profiler.tool_cache == {"hit": 1, "miss": 1, "shared": 0}
+
+
+def test_async_parallel_identical_calls_are_deduplicated():
+    calls = []
+
+    @cacheable(key=lambda query: query.lower())
+    async def query_docs(query):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return f"Docs for {query}"
+
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = tool_responses(
+        "query_docs", [{"query": "Refunds"}, {"query": "refunds"}]
+    )
+    swarm = AsyncSwarm(client=client)
+
+    response = asyncio.run(
+        swarm.run(
+            agent=Agent(functions=[query_docs]),
+            messages=[{"role": "user", "content": "Hi"}],
+        )
+    )
+
+    assert len(calls) == 1
+    assert response.messages[1]["content"] == response.messages[2]["content"]
+    assert query_docs.tool_cache.shared == 1
+
+
+def test_hung_tool_times_out_and_run_continues():
+    release = threading.Event()
+
+    @tool_timeout(0.05)
+    def hung():
+        release.wait(5)
+        return "late"
+
+    def quick():
+        return "quick"
+
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "hung", "args": {}}, {"name": "quick", "args": {}}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+    swarm = Swarm(client=client)
+
+    response = swarm.run(
+        agent=Agent(functions=[hung, quick], parallel_tool_calls=False),
+        messages=[{"role": "user", "content": "Hi"}],
+    )
+    release.set()
+    swarm.close()
+
+    error = json.loads(response.messages[1]["content"])
+    assert (error["error"], error["tool"], error["timeout_seconds"]) == ("timeout", "hung", 0.05)
+    assert response.messages[2]["content"] == "quick"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_abandoned_hung_tools_do_not_starve_later_calls():
+    release = threading.Event()
+    hung_calls = (os.cpu_count() or 1) + 4
+
+    def hung():
+        release.wait(5)
+        return "late"
+
+    def quick():
+        return "quick"
+
+    client = MockOpenAIClient()
+    client.set_sequential_responses(
+        [
+            create_mock_response(
+                message={"role": "assistant", "content": ""},
+                function_calls=[{"name": "hung", "args": {}}] * hung_calls
+                + [{"name": "quick", "args": {}}],
+            ),
+            create_mock_response(
+                {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+            ),
+        ]
+    )
+    swarm = Swarm(client=client, tool_timeout=0.05)
+
+    response = swarm.run(
+        agent=Agent(functions=[hung, quick], parallel_tool_calls=False),
+        messages=[{"role": "user", "content": "Hi"}],
+    )
+    release.set()
+    swarm.close()
+
+    assert response.messages[hung_calls + 1]["content"] == "quick"
+    assert response.messages[-1]["content"] == DEFAULT_RESPONSE_CONTENT
+
+
+def test_default_timeout_cancels_async_tool():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    @tool_timeout(None)
+    async def unlimited():
+        await asyncio.sleep(0.1)
+        return "finished"
+
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = [
+        create_mock_response(
+            message={"role": "assistant", "content": ""},
+            function_calls=[{"name": "slow", "args": {}}, {"name": "unlimited", "args": {}}],
+        ),
+        create_mock_response({"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}),
+    ]
+    swarm = AsyncSwarm(client=client, tool_timeout=0.05)
+
+    response = asyncio.run(
+        swarm.run(
+            agent=Agent(functions=[slow, unlimited]),
+            messages=[{"role": "user", "content": "Hi"}],
+        )
+    )
+
+    assert cancelled == [True]
+    assert json.loads(response.messages[1]["content"])["error"] == "timeout"
+    assert response.messages[2]["content"] == "finished"
+
+
+@run_in_process
+def count_primes(limit, context_variables):
+    primes = [n for n in range(2, int(limit)) if all(n % d for d in range(2, n))]
+    context_variables["worker_pid"] = os.getpid()
+    context_variables["calls"] = context_variables.get("calls", 0) + 1
+    return Result(value=str(len(primes)), context_variables={"last_limit": limit})
+
+
+def prime_responses():
+    return [
+        create_mock_response(
+            message={"role": "assistant", "content": ""},
+            function_calls=[{"name": "count_primes", "args": {"limit": 100}}],
+        ),
+        create_mock_response(
+            {"role": "assistant", "content": DEFAULT_RESPONSE_CONTENT}
+        ),
+    ]
+
+
+def test_process_tool_merges_context_changes():
+    client = MockOpenAIClient()
+    client.set_sequential_responses(prime_responses())
+    swarm = Swarm(client=client, max_process_workers=1)
+    context_variables = {"calls": 1}
+
+    response = swarm.run(
+        agent=Agent(functions=[count_primes]),
+        messages=[{"role": "user", "content": "Hi"}],
+        context_variables=context_variables,
+    )
+    swarm.close()
+
+    assert response.messages[1]["content"] == "25"
+    assert response.context_variables["worker_pid"] != os.getpid()
+    assert response.context_variables["calls"] == 2
+    assert response.context_variables["last_limit"] == 100
+    assert context_variables == {"calls": 1}
+
+
+def test_async_process_tool():
+    client = MockAsyncOpenAIClient()
+    client.chat.completions.create.side_effect = prime_responses()
+    swarm = AsyncSwarm(client=client, max_process_workers=1)
+
+    response = asyncio.run(
+        swarm.run(
+            agent=Agent(functions=[count_primes]),
+            messages=[{"role": "user", "content": "Hi"}],
+        )
+    )
+    swarm.close()
+
+    assert response.messages[1]["content"] == "25"
+    assert response.context_variables["worker_pid"] != os.getpid()
@@ -1,4 +1,9 @@
-from swarm.util import function_to_json
+from openai.types.chat.chat_completion_chunk import (
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction,
+)
+from swarm.util import StreamAccumulator, function_to_json
 
 
 def test_basic_function():
@@ -48,3 +53,59 @@ def test_complex_function():
             },
         },
     }
+
+
+def test_stream_accumulator():
+    def tool_delta(index, arguments, name=None, id=None):
+        return ChoiceDelta(
+            tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=index,
+                    id=id,
+                    type="function" if id else None,
+                    function=ChoiceDeltaToolCallFunction(name=name, arguments=arguments),
+                )
+            ]
+        )
+
+    deltas = [
+        ChoiceDelta(role="assistant", content=""),
+        ChoiceDelta(content="Checking "),
+        ChoiceDelta(content="now."),
+        tool_delta(0, "", name="get_weather", id="call_0"),
+        tool_delta(0, '{"location": '),
+        tool_delta(0, '"Paris"}'),
+        tool_delta(1, "{}", name="get_time", id="call_1"),
+    ]
+    accumulator = StreamAccumulator()
+    events = [accumulator.add(delta, "Weather Agent") for delta in deltas]
+
+    assert events[0]["sender"] == "Weather Agent"
+    assert "sender" not in events[1]
+    assert events[1]["content"] == "Checking "
+    assert events[4]["tool_calls"] == [
+        {
+            "index": 0,
+            "id": None,
+            "function": {"arguments": '{"location": ', "name": None},
+            "type": None,
+        }
+    ]
+    assert accumulator.message("Weather Agent") == {
+        "content": "Checking now.",
+        "sender": "Weather Agent",
+        "role": "assistant",
+        "function_call": None,
+        "tool_calls": [
+            {
+                "function": {"arguments": '{"location": "Paris"}', "name": "get_weather"},
+                "id": "call_0",
+                "type": "function",
+            },
+            {
+                "function": {"arguments": "{}", "name": "get_time"},
+                "id": "call_1",
+                "type": "function",
+            },
+        ],
+    }